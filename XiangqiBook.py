@@ -0,0 +1,280 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: An opening book for Xiangqi. The builder replays the opening moves of games from binary game record
+#              files, counts how often each move was played from each position and how those games ended, and writes
+#              the totals to a book file sorted by position hash. An OpeningBook memory-maps the file and finds the
+#              moves for a position with a binary search, so there is no load step, and any number of processes that
+#              open the same file share one copy of it through the page cache.
+#
+#              File layout: the 4 byte magic number b'XQB1' and the number of entries (4 bytes), followed by the
+#              entries sorted by position hash and then by move. Each entry is the little-endian Zobrist hash of the
+#              position (8 bytes), the move code of XiangqiRecords (2 bytes), and the number of games the move was
+#              played in, won by the player who played it, and drawn (4 bytes each).
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+
+from XiangqiGame import BOARD_SQUARES, game_from_moves
+from XiangqiRecords import GameRecordReader, decode_move
+
+
+# Marks the start of a book file, and names its version.
+MAGIC = b'XQB1'
+
+# The header after the magic number, and each entry of the book.
+_HEADER = struct.Struct('<I')
+_ENTRY = struct.Struct('<QHIII')
+_HASH = struct.Struct('<Q')
+
+# How many plies of each game are put in the book when no other number is given.
+DEFAULT_BOOK_PLIES = 20
+
+
+class BookMove:
+    """ A move found in an opening book for a position, with the number of games it was played in and their results
+    for the player who played it. """
+
+    def __init__(self, code, games, wins, draws):
+        """ Initializes a book move from its move code and its game counts. """
+
+        self._code = code
+        self._games = games
+        self._wins = wins
+        self._draws = draws
+
+    def get_move(self):
+        """ Returns the move as a (pos1, pos2) tuple. """
+
+        return decode_move(self._code)
+
+    def get_code(self):
+        """ Returns the move code of the move. """
+
+        return self._code
+
+    def get_games(self):
+        """ Returns the number of games the move was played in. """
+
+        return self._games
+
+    def get_wins(self):
+        """ Returns the number of those games won by the player who played the move. """
+
+        return self._wins
+
+    def get_draws(self):
+        """ Returns the number of those games drawn or left unfinished. """
+
+        return self._draws
+
+    def get_losses(self):
+        """ Returns the number of those games lost by the player who played the move. """
+
+        return self._games - self._wins - self._draws
+
+    def get_score(self):
+        """ Returns the share of points the move scored for the player who played it, counting a draw as half a
+        win. """
+
+        return (self._wins + self._draws / 2) / self._games if self._games > 0 else 0.0
+
+
+class OpeningBook:
+    """ Reads an opening book file from a memory map. Can be used as a context manager, which closes the file. """
+
+    def __init__(self, path):
+        """ Opens and memory-maps an opening book file. Raises a ValueError if it is not a complete book file. """
+
+        self._file = open(path, 'rb')
+        self._start = len(MAGIC) + _HEADER.size
+
+        # An empty file cannot be memory-mapped, and one too short for the header cannot be a book file.
+        if os.fstat(self._file.fileno()).st_size < self._start:
+            self._file.close()
+            raise ValueError(f"Not an opening book file: {path}")
+
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not an opening book file: {path}")
+
+        self._size = _HEADER.unpack_from(self._map, len(MAGIC))[0]
+        if len(self._map) != self._start + self._size * _ENTRY.size:
+            self.close()
+            raise ValueError(f"Opening book file is incomplete: {path}")
+
+    def __enter__(self):
+        """ Returns the book for use in a with statement. """
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """ Closes the book at the end of a with statement. """
+
+        self.close()
+
+    def __len__(self):
+        """ Returns the number of entries in the book, one for each move from each position. """
+
+        return self._size
+
+    def lookup(self, position_hash):
+        """ Returns a list of the BookMoves stored for the position with the given hash (see XiangqiGame.get_hash),
+        most played first, or an empty list if the position is not in the book. """
+
+        # Binary search for the first entry of the position.
+        low = 0
+        high = self._size
+
+        while low < high:
+            middle = (low + high) // 2
+            if _HASH.unpack_from(self._map, self._start + middle * _ENTRY.size)[0] < position_hash:
+                low = middle + 1
+            else:
+                high = middle
+
+        moves = []
+
+        for index in range(low, self._size):
+            entry_hash, code, games, wins, draws = _ENTRY.unpack_from(self._map, self._start + index * _ENTRY.size)
+            if entry_hash != position_hash:
+                break
+            moves.append(BookMove(code, games, wins, draws))
+
+        moves.sort(key=lambda move: move.get_games(), reverse=True)
+
+        return moves
+
+    def close(self):
+        """ Closes the memory map and the file. """
+
+        self._map.close()
+        self._file.close()
+
+
+def choose_book_move(game, book, rng=None, min_games=1):
+    """ Picks a move for the player to move in game from an opening book, at random in proportion to how often each
+    move was played, leaving out moves played in fewer than min_games games. Returns it as a (pos1, pos2) tuple, or None
+    if the position has no such moves in the book. """
+
+    moves = [move for move in game.get_book_moves(book) if move.get_games() >= min_games]
+    if len(moves) == 0:
+        return None
+
+    rng = random if rng is None else rng
+
+    return rng.choices(moves, weights=[move.get_games() for move in moves])[0].get_move()
+
+
+def build_book(record_paths, output, max_plies=DEFAULT_BOOK_PLIES, min_games=1):
+    """ Builds an opening book from the first max_plies moves of every game in a list of binary game record files,
+    keeping only the moves played in at least min_games games, and writes it to output. The book is written to a
+    temporary file first and then moved into place, so processes reading an older copy are not disturbed. Returns a
+    tuple of the number of games read and the number of entries written. Raises a ValueError if a game is illegal. """
+
+    # Totals for each (position hash, move code) pair: games, wins for the player who moved, and draws.
+    totals = {}
+    games = 0
+
+    for path in record_paths:
+        with GameRecordReader(path) as reader:
+            for record in reader:
+                games += 1
+                _add_game(totals, record, max_plies)
+
+    entries = sorted(key for key, counts in totals.items() if counts[0] >= min_games)
+    temporary = output + '.tmp'
+
+    with open(temporary, 'wb') as file:
+        file.write(MAGIC)
+        file.write(_HEADER.pack(len(entries)))
+        for position_hash, code in entries:
+            file.write(_ENTRY.pack(position_hash, code, *totals[(position_hash, code)]))
+
+    os.replace(temporary, output)
+
+    return games, len(entries)
+
+
+def _add_game(totals, record, max_plies):
+    """ Helper function that replays the first max_plies moves of a GameRecord and adds each move to the totals. """
+
+    game = game_from_moves([], record.get_fen())
+    result = record.get_result()
+    winner = {'RED_WON': 'R', 'BLACK_WON': 'B'}.get(result)
+
+    for code in record.get_move_codes()[:max_plies]:
+        key = (game.get_hash(), code)
+        counts = totals.get(key)
+        if counts is None:
+            counts = totals[key] = [0, 0, 0]
+
+        counts[0] += 1
+        if winner is None:
+            counts[2] += 1
+        elif winner == game._current_player:
+            counts[1] += 1
+
+        sq1, sq2 = divmod(code, BOARD_SQUARES)
+        if game._make_move(sq1, sq2) is not True:
+            raise ValueError(f"Illegal move in game record: {''.join(decode_move(code))}")
+
+
+def main(argv=None):
+    """ Command line entry point. Builds a book from game record files, or shows the book moves for a position. Run
+    with -h for usage. """
+
+    parser = argparse.ArgumentParser(description="Build or probe a Xiangqi opening book.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="build a book from binary game record files")
+    build.add_argument('output', help="book file to write")
+    build.add_argument('records', nargs='+', help="binary game record files to read")
+    build.add_argument('--plies', type=int, default=DEFAULT_BOOK_PLIES,
+                       help=f"plies of each game to put in the book (default {DEFAULT_BOOK_PLIES})")
+    build.add_argument('--min-games', type=int, default=1, help="games a move must be played in to be kept (default 1)")
+
+    probe = commands.add_parser('probe', help="show the book moves for a position")
+    probe.add_argument('book', help="book file to read")
+    probe.add_argument('--fen', default=None, help="position to look up, in FEN (default: the starting position)")
+    probe.add_argument('--moves', nargs='+', default=[], metavar='MOVE',
+                       help="moves played from the starting position (or --fen) first, e.g. h3e3 h10g8")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        if args.plies < 1 or args.min_games < 1:
+            parser.error("--plies and --min-games must be at least 1")
+
+        try:
+            games, entries = build_book(args.records, args.output, args.plies, args.min_games)
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+
+        print(f"{games} games, {entries} entries, {os.path.getsize(args.output)} bytes")
+        return 0
+
+    try:
+        game = game_from_moves(args.moves, args.fen)
+        with OpeningBook(args.book) as book:
+            moves = game.get_book_moves(book)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    if len(moves) == 0:
+        print("position not in book")
+
+    for move in moves:
+        pos1, pos2 = move.get_move()
+        print(f"{pos1}{pos2}: {move.get_games()} games, +{move.get_wins()} ={move.get_draws()} -{move.get_losses()} "
+              f"({move.get_score():.0%})")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
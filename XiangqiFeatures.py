@@ -0,0 +1,409 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Batch features of Xiangqi positions computed with NumPy. Many positions, given as XiangqiGames or FEN
+#              strings, are encoded as one N x 10 x 9 array of piece codes, and material, mobility, attacked squares,
+#              and check status are computed for the whole batch at once with array operations instead of one game at
+#              a time. The features agree with those of XiangqiGame: a side's attacked squares are the points in its
+#              attack map, and its mobility is the number of moves in it. NumPy is only needed by this module.
+
+import argparse
+import random
+import re
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from XiangqiGame import BOARD_HEIGHT, BOARD_WIDTH, XiangqiGame, _FEN_LETTERS, _FEN_TYPES
+from XiangqiSearch import CROSSED_SOLDIER_VALUE, MOBILITY_VALUE, PIECE_VALUES, Searcher
+
+
+# Piece types in the order of their codes. A Red piece of type PIECE_TYPES[i] is stored as i + 1 and a Black one as
+# -(i + 1), with 0 for an empty point.
+PIECE_TYPES = 'GAEHCNS'
+_CODES = {piece_type: code for code, piece_type in enumerate(PIECE_TYPES, start=1)}
+
+# The sides, in the order of the side axis of every feature array.
+SIDES = ('R', 'B')
+
+# The code of each FEN letter, including the 'h' and 'e' some programs use for the Horse and Elephant, with '.' for
+# an empty point, and the FEN letter of each kind of piece on the board (e.g. 'CR'). A code of _INVALID_CODE marks a
+# character that is not a FEN letter.
+_LETTER_CODES = dict(
+    [('.', 0)] +
+    [(letter.upper(), _CODES[piece_type]) for letter, piece_type in _FEN_TYPES.items()] +
+    [(letter, -_CODES[piece_type]) for letter, piece_type in _FEN_TYPES.items()]
+)
+_LABEL_LETTERS = dict(
+    [('--', '.')] +
+    [(piece_type + SIDES[0], letter.upper()) for piece_type, letter in _FEN_LETTERS.items()] +
+    [(piece_type + SIDES[1], letter) for piece_type, letter in _FEN_LETTERS.items()]
+)
+_INVALID_CODE = 127
+_EMPTY_RUN_PATTERN = re.compile(r'\d')
+
+# The (row, column) offsets of each kind of step, and of each blockable move paired with the offset of the point
+# that blocks it.
+_ORTHOGONAL_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+_DIAGONAL_STEPS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+_ELEPHANT_MOVES = tuple(((2 * d_row, 2 * d_col), (d_row, d_col)) for d_row, d_col in _DIAGONAL_STEPS)
+_HORSE_MOVES = (
+    ((1, 2), (0, 1)), ((-1, 2), (0, 1)), ((2, 1), (1, 0)), ((2, -1), (1, 0)),
+    ((1, -2), (0, -1)), ((-1, -2), (0, -1)), ((-2, 1), (-1, 0)), ((-2, -1), (-1, 0))
+)
+
+
+def _require_numpy():
+    """ Helper function that raises an ImportError if NumPy is not installed. """
+
+    if np is None:
+        raise ImportError("XiangqiFeatures requires NumPy (pip install numpy)")
+
+
+def encode_positions(positions):
+    """ Encodes an iterable of positions, each a XiangqiGame or a FEN string, as a tuple of an N x 10 x 9 int8 array of
+    piece codes (see PIECE_TYPES) indexed by [position, row, column] with row 0 on Red's side, and a boolean array of
+    length N that is True where Red is to move. FENs are translated in bulk, so only their layout is checked: a
+    ValueError is raised if one is malformed or a side does not have exactly one General. """
+
+    _require_numpy()
+
+    layouts = []
+    red_to_move = []
+
+    # Each position is written out as 90 FEN letters in square order, with '.' for an empty point.
+    for position in positions:
+        if isinstance(position, XiangqiGame):
+            layouts.append(''.join(_LABEL_LETTERS[label[:2]] for label in position._board.get_squares()))
+            red_to_move.append(position._current_player == SIDES[0])
+            continue
+
+        fields = position.split()
+        ranks = _EMPTY_RUN_PATTERN.sub(lambda match: '.' * int(match.group()), fields[0] if fields else '').split('/')
+        layout = ''.join(reversed(ranks))
+        if len(ranks) != BOARD_HEIGHT or len(layout) != BOARD_WIDTH * BOARD_HEIGHT or not layout.isascii():
+            raise ValueError(f"Invalid FEN: {position}")
+
+        layouts.append(layout)
+        red_to_move.append(len(fields) < 2 or fields[1] != 'b')
+
+    # Translate every letter at once through a table indexed by character code.
+    table = np.full(128, _INVALID_CODE, dtype=np.int8)
+    for letter, code in _LETTER_CODES.items():
+        table[ord(letter)] = code
+
+    letters = np.frombuffer(''.join(layouts).encode('ascii'), dtype=np.uint8)
+    boards = table[letters].reshape(-1, BOARD_HEIGHT, BOARD_WIDTH)
+
+    invalid = (boards == _INVALID_CODE).any(axis=(1, 2))
+    invalid |= ((boards == _CODES['G']).sum(axis=(1, 2)) != 1) | ((boards == -_CODES['G']).sum(axis=(1, 2)) != 1)
+    if invalid.any():
+        raise ValueError(f"Invalid FEN in position {int(np.argmax(invalid))}")
+
+    return boards, np.array(red_to_move, dtype=bool)
+
+
+def piece_planes(boards):
+    """ Returns an N x 14 x 10 x 9 boolean array of one plane per kind of piece for a batch of encoded boards: the
+    Red pieces in PIECE_TYPES order, then the Black ones. """
+
+    _require_numpy()
+
+    kinds = np.array([_CODES[piece_type] for piece_type in PIECE_TYPES] +
+                     [-_CODES[piece_type] for piece_type in PIECE_TYPES], dtype=np.int8)
+
+    return boards[:, None, :, :] == kinds[None, :, None, None]
+
+
+def _shift(planes, d_row, d_col):
+    """ Helper function that moves every point of a batch of N x 10 x 9 planes by (d_row, d_col), dropping the points
+    that leave the board and leaving the points uncovered False. """
+
+    shifted = np.zeros_like(planes)
+    rows = slice(max(d_row, 0), BOARD_HEIGHT + min(d_row, 0))
+    cols = slice(max(d_col, 0), BOARD_WIDTH + min(d_col, 0))
+    source_rows = slice(max(-d_row, 0), BOARD_HEIGHT + min(-d_row, 0))
+    source_cols = slice(max(-d_col, 0), BOARD_WIDTH + min(-d_col, 0))
+    shifted[:, rows, cols] = planes[:, source_rows, source_cols]
+
+    return shifted
+
+
+def _rays(origins, empty, steps):
+    """ Helper function that returns a list of planes, one for each step, of the points reached from the origin planes
+    by sliding in that direction up to and including the first piece. """
+
+    rays = []
+
+    for d_row, d_col in steps:
+        reached = np.zeros_like(origins)
+        front = origins
+
+        for _ in range(max(BOARD_HEIGHT, BOARD_WIDTH) - 1):
+            front = _shift(front, d_row, d_col)
+            reached |= front
+            front = front & empty
+            if not front.any():
+                break
+
+        rays.append(reached)
+
+    return rays
+
+
+def _cannon_rays(origins, empty):
+    """ Helper function that returns a list of planes, one for each orthogonal direction, of the points a Cannon on
+    the origin planes reaches: the empty points before its screen, and the first piece beyond the screen. """
+
+    rays = []
+
+    for d_row, d_col in _ORTHOGONAL_STEPS:
+        reached = np.zeros_like(origins)
+        front = origins
+        screened = np.zeros_like(origins)
+
+        for _ in range(max(BOARD_HEIGHT, BOARD_WIDTH) - 1):
+            # Past the screen, the ray slides on to the first piece and stops there.
+            screened = _shift(screened, d_row, d_col)
+            reached |= screened & ~empty
+            screened &= empty
+
+            # Before it, the ray reaches every empty point, and the first piece becomes the screen.
+            front = _shift(front, d_row, d_col)
+            reached |= front & empty
+            screened |= front & ~empty
+            front &= empty
+
+            if not (front.any() or screened.any()):
+                break
+
+        rays.append(reached)
+
+    return rays
+
+
+def _side_moves(boards, side, occupied):
+    """ Helper function that returns a list of the destination planes of each kind of move the given side can make,
+    without leaving its own pieces' points. The planes add up to the side's moves and their union is its attack map.
+    Like the attack maps of XiangqiGame, moves that would leave the General in check are included, but General moves
+    that face the enemy General are not. """
+
+    sign = 1 if side == SIDES[0] else -1
+    own = boards * sign > 0
+    empty = ~occupied
+    rows = np.arange(BOARD_HEIGHT)[None, :, None]
+    cols = np.arange(BOARD_WIDTH)[None, None, :]
+    own_half = rows < BOARD_HEIGHT // 2 if sign == 1 else rows >= BOARD_HEIGHT // 2
+    palace = own_half & (np.abs(rows - (1 if sign == 1 else BOARD_HEIGHT - 2)) <= 1) & (np.abs(cols - 4) <= 1)
+    forward = sign
+
+    def _pieces(piece_type):
+        """ Returns the planes of the side's pieces of one type. """
+
+        return boards == sign * _CODES[piece_type]
+
+    moves = []
+
+    # Fixed-pattern pieces: a destination needs its blocking point (if any) empty at the origin and must stay in
+    # bounds, which for the Advisor and General is the palace and for the Elephant is its own side of the river.
+    general = _pieces('G')
+    enemy_general = boards == -sign * _CODES['G']
+    enemy_sight = _rays(enemy_general, empty | general, ((1, 0), (-1, 0)))
+    for d_row, d_col in _ORTHOGONAL_STEPS:
+        moves.append(_shift(general, d_row, d_col) & palace & ~enemy_sight[0] & ~enemy_sight[1])
+
+    advisor = _pieces('A')
+    for d_row, d_col in _DIAGONAL_STEPS:
+        moves.append(_shift(advisor, d_row, d_col) & palace)
+
+    elephant = _pieces('E')
+    for (d_row, d_col), (b_row, b_col) in _ELEPHANT_MOVES:
+        moves.append(_shift(elephant & _shift(empty, -b_row, -b_col), d_row, d_col) & own_half)
+
+    horse = _pieces('H')
+    for (d_row, d_col), (b_row, b_col) in _HORSE_MOVES:
+        moves.append(_shift(horse & _shift(empty, -b_row, -b_col), d_row, d_col))
+
+    # A Soldier always moves forward, and sideways too once it has crossed the river.
+    soldier = _pieces('S')
+    moves.append(_shift(soldier, forward, 0))
+    crossed = soldier & ~own_half
+    moves.append(_shift(crossed, 0, 1))
+    moves.append(_shift(crossed, 0, -1))
+
+    moves += _rays(_pieces('C'), empty, _ORTHOGONAL_STEPS)
+    moves += _cannon_rays(_pieces('N'), empty)
+
+    return [plane & ~own for plane in moves]
+
+
+def compute_features(boards):
+    """ Computes the features of a batch of encoded boards for both sides at once. Returns a dictionary of arrays
+    whose second axis is the side, in SIDES order:
+        'piece_counts': N x 2 x 7 counts of each type of piece, in PIECE_TYPES order.
+        'material': N x 2 material values, using the values of XiangqiSearch.
+        'attacked': N x 2 x 10 x 9 boolean planes of the points each side attacks.
+        'mobility': N x 2 counts of the moves each side could make, before checks are considered.
+        'in_check': N x 2 booleans that are True where the side's General is attacked. """
+
+    _require_numpy()
+
+    planes = piece_planes(boards).reshape(len(boards), len(SIDES), len(PIECE_TYPES), BOARD_HEIGHT, BOARD_WIDTH)
+    occupied = boards != 0
+    piece_counts = planes.sum(axis=(3, 4), dtype=np.int32)
+
+    # A Soldier that has crossed the river is worth more, and the rest are worth their type's value.
+    values = np.array([PIECE_VALUES[piece_type] for piece_type in PIECE_TYPES], dtype=np.int32)
+    soldiers = planes[:, :, _CODES['S'] - 1]
+    crossed = np.stack([soldiers[:, 0, BOARD_HEIGHT // 2:].sum(axis=(1, 2)),
+                        soldiers[:, 1, :BOARD_HEIGHT // 2].sum(axis=(1, 2))], axis=1)
+    material = (piece_counts * values).sum(axis=2) + crossed * (CROSSED_SOLDIER_VALUE - PIECE_VALUES['S'])
+
+    attacked = []
+    mobility = []
+
+    for side in SIDES:
+        moves = _side_moves(boards, side, occupied)
+        attacked.append(np.logical_or.reduce(moves))
+        mobility.append(np.add.reduce([plane.sum(axis=(1, 2), dtype=np.int32) for plane in moves]))
+
+    attacked = np.stack(attacked, axis=1)
+
+    # A General is in check if the enemy attacks its point, or if it faces the enemy General along an open column.
+    generals = planes[:, :, _CODES['G'] - 1]
+    facing = (_rays(generals[:, 0], ~occupied, ((1, 0),))[0] & generals[:, 1]).any(axis=(1, 2))
+    in_check = (generals & attacked[:, ::-1]).any(axis=(2, 3)) | facing[:, None]
+
+    return {
+        'piece_counts': piece_counts,
+        'material': material.astype(np.int32),
+        'attacked': attacked,
+        'mobility': np.stack(mobility, axis=1),
+        'in_check': in_check,
+    }
+
+
+def evaluate_batch(boards, red_to_move, features=None):
+    """ Returns an int32 array of the static evaluation of each encoded board for the player to move, the same as the
+    search's evaluation: the difference in material plus MOBILITY_VALUE for each point attacked. Features already
+    computed by compute_features can be passed to avoid computing them again. """
+
+    _require_numpy()
+
+    if features is None:
+        features = compute_features(boards)
+
+    attacked = features['attacked'].sum(axis=(2, 3), dtype=np.int32)
+    score = features['material'] + attacked * MOBILITY_VALUE
+    red_score = score[:, 0] - score[:, 1]
+
+    return np.where(red_to_move, red_score, -red_score).astype(np.int32)
+
+
+def random_positions(count, seed=0, max_plies=120):
+    """ Returns a list of count XiangqiGames, each played out with random legal moves from the starting position for
+    a random number of plies up to max_plies, or until it ends. """
+
+    rng = random.Random(seed)
+    games = []
+
+    for _ in range(count):
+        game = XiangqiGame()
+        for _ in range(rng.randrange(max_plies + 1)):
+            moves = list(game._legal_moves())
+            if game.get_game_state() != 'UNFINISHED' or len(moves) == 0:
+                break
+            game._make_move(*rng.choice(moves))
+        games.append(game)
+
+    return games
+
+
+def verify(games, boards, red_to_move, features):
+    """ Checks the batch features of each game against those computed by the game itself, one game at a time. Returns
+    a list of (index, feature) pairs for every mismatch. """
+
+    mismatches = []
+    evaluations = evaluate_batch(boards, red_to_move, features)
+    searcher = Searcher()
+
+    for index, game in enumerate(games):
+        pieces = game._pieces
+
+        for side_index, side in enumerate(SIDES):
+            attack_map = pieces.get_attack_map(side)
+            attacked = {row * BOARD_WIDTH + col
+                        for row, col in zip(*np.nonzero(features['attacked'][index, side_index]))}
+
+            if attacked != set(attack_map):
+                mismatches.append((index, 'attacked'))
+            if features['mobility'][index, side_index] != len(pieces.get_all_possible_moves(side)):
+                mismatches.append((index, 'mobility'))
+            if features['in_check'][index, side_index] != game.is_in_check(side):
+                mismatches.append((index, 'in_check'))
+
+        if evaluations[index] != searcher._evaluate(game):
+            mismatches.append((index, 'evaluation'))
+
+    return mismatches
+
+
+def main(argv=None):
+    """ Command line entry point. Computes the features of a batch of random positions and reports the time taken,
+    against computing them one game at a time. Run with -h for usage. """
+
+    parser = argparse.ArgumentParser(description="Compute batch features of random Xiangqi positions with NumPy.")
+    parser.add_argument('count', type=int, nargs='?', default=1000, help="number of positions (default 1000)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random positions (default 0)")
+    parser.add_argument('--verify', action='store_true', help="check every feature against the games themselves")
+    args = parser.parse_args(argv)
+
+    if args.count < 1:
+        parser.error("count must be at least 1")
+
+    try:
+        _require_numpy()
+    except ImportError as error:
+        parser.error(str(error))
+
+    games = random_positions(args.count, args.seed)
+    fens = [game.get_fen() for game in games]
+
+    start = time.perf_counter()
+    boards, red_to_move = encode_positions(fens)
+    encoded = time.perf_counter()
+    features = compute_features(boards)
+    evaluate_batch(boards, red_to_move, features)
+    elapsed = time.perf_counter() - start
+
+    print(f"batch: {args.count} positions encoded in {encoded - start:.3f}s, "
+          f"features in {elapsed - encoded + start:.3f}s "
+          f"({args.count / elapsed:,.0f} positions/s)")
+
+    # The same features one game at a time: each position is set up from its FEN and evaluated as the search does.
+    searcher = Searcher()
+    start = time.perf_counter()
+    for fen in fens:
+        game = XiangqiGame(fen=fen)
+        for side in SIDES:
+            game._pieces.get_all_possible_moves(side)
+            game.is_in_check(side)
+        searcher._evaluate(game)
+    single = time.perf_counter() - start
+    print(f"one game at a time: {single:.3f}s ({args.count / single:,.0f} positions/s)")
+
+    if args.verify is True:
+        mismatches = verify(games, boards, red_to_move, features)
+        for index, feature in mismatches[:20]:
+            print(f"MISMATCH in position {index}: {feature}: {games[index].get_fen()}")
+        print("verified" if len(mismatches) == 0 else f"FAILED: {len(mismatches)} mismatches")
+        return 0 if len(mismatches) == 0 else 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
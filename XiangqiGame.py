@@ -4,82 +4,665 @@
 #              allows players to make legal moves, capture pieces, reports the game status, and determines a winning
 #              game situation.
 
+import random
+import re
+import time
+
+
+# The board is 9 points wide and 10 points high. Internally, every point is an integer square from 0 to 89, numbered
+# row by row from Red's side of the board, so a square's row is square // 9 and its column is square % 9.
+BOARD_WIDTH = 9
+BOARD_HEIGHT = 10
+BOARD_SQUARES = BOARD_WIDTH * BOARD_HEIGHT
+
+# A move written as two cardinal positions together, e.g. 'h3e3', as read from the command line and other text.
+MOVE_PATTERN = re.compile(r'^([a-i](?:10|[1-9]))([a-i](?:10|[1-9]))$')
+
+# Cardinal positions ('a1' through 'i10') indexed by square, and the reverse lookup from position to square.
+_POSITIONS = tuple(col + str(row) for row in range(1, BOARD_HEIGHT + 1) for col in 'abcdefghi')
+_SQUARES = {pos: sq for sq, pos in enumerate(_POSITIONS)}
+
+# The squares of each row and each column, from low to high.
+_ROW_SQUARES = tuple(tuple(range(row * BOARD_WIDTH, (row + 1) * BOARD_WIDTH)) for row in range(BOARD_HEIGHT))
+_COLUMN_SQUARES = tuple(tuple(range(col, BOARD_SQUARES, BOARD_WIDTH)) for col in range(BOARD_WIDTH))
+
+# The squares of each color's palace. Squares below _RIVER are on Red's side of the river; the rest are on Black's.
+_PALACE_SQUARES = {
+    'R': frozenset(_SQUARES[pos] for pos in ('d1', 'e1', 'f1', 'd2', 'e2', 'f2', 'd3', 'e3', 'f3')),
+    'B': frozenset(_SQUARES[pos] for pos in ('d8', 'e8', 'f8', 'd9', 'e9', 'f9', 'd10', 'e10', 'f10'))
+}
+_RIVER = BOARD_SQUARES // 2
+
+
+# Bitboards are ints with one bit per square (bit sq for square sq). Occupancy is also kept in a second, column-major
+# bitboard where bit (column * 10 + row) stands for a square, so that a whole column can be shifted out at once.
+_BITS = tuple(1 << sq for sq in range(BOARD_SQUARES))
+_COLUMN_BITS = tuple(1 << (sq % BOARD_WIDTH * BOARD_HEIGHT + sq // BOARD_WIDTH) for sq in range(BOARD_SQUARES))
+_ROW_MASK = (1 << BOARD_WIDTH) - 1
+_COLUMN_MASK = (1 << BOARD_HEIGHT) - 1
+
+
+def _build_line_attacks(length):
+    """ Builds the Chariot and Cannon attacks along a single line of the given length (a row or a column) from every
+    point on the line, for every occupancy of the line. Returns a (chariot, cannon) pair of tables indexed by
+    [point][occupancy], whose values use bit i for point i on the line. A Chariot reaches every point up to and
+    including the closest piece in each direction. A Cannon reaches every empty point before the closest piece (its
+    screen) and the first piece beyond the screen. """
+
+    chariot_table = []
+    cannon_table = []
+
+    for point in range(length):
+        chariot_row = []
+        cannon_row = []
+
+        for occupancy in range(1 << length):
+            chariot = 0
+            cannon = 0
+
+            for step in (-1, 1):
+                i = point + step
+                screened = False
+                while 0 <= i < length:
+                    if not screened:
+                        chariot |= 1 << i
+                        if occupancy & (1 << i):
+                            screened = True
+                        else:
+                            cannon |= 1 << i
+                    elif occupancy & (1 << i):
+                        cannon |= 1 << i
+                        break
+                    i += step
+
+            chariot_row.append(chariot)
+            cannon_row.append(cannon)
+
+        chariot_table.append(tuple(chariot_row))
+        cannon_table.append(tuple(cannon_row))
+
+    return tuple(chariot_table), tuple(cannon_table)
+
+
+def _build_column_spreads():
+    """ Builds a table indexed by [column][line bits] that converts the bits of a single column (bit i for row i)
+    into a regular bitboard. """
+
+    table = []
+
+    for col in range(BOARD_WIDTH):
+        spreads = [0] * (1 << BOARD_HEIGHT)
+        for line_bits in range(1, 1 << BOARD_HEIGHT):
+            low_bit = line_bits & -line_bits
+            spreads[line_bits] = spreads[line_bits ^ low_bit] | _BITS[(low_bit.bit_length() - 1) * BOARD_WIDTH + col]
+        table.append(tuple(spreads))
+
+    return tuple(table)
+
+
+def _squares_of(bitboard):
+    """ Returns a list of the squares set in a bitboard, from low to high. """
+
+    squares = []
+
+    while bitboard:
+        low_bit = bitboard & -bitboard
+        squares.append(low_bit.bit_length() - 1)
+        bitboard ^= low_bit
+
+    return squares
+
+
+# Chariot and Cannon attacks along a row indexed by [column][row occupancy], along a column indexed by
+# [row][column occupancy], and the conversion of column attacks back to regular bitboards.
+_ROW_CHARIOT_ATTACKS, _ROW_CANNON_ATTACKS = _build_line_attacks(BOARD_WIDTH)
+_COLUMN_CHARIOT_ATTACKS, _COLUMN_CANNON_ATTACKS = _build_line_attacks(BOARD_HEIGHT)
+_COLUMN_SPREADS = _build_column_spreads()
+
+# Zobrist keys: a random 64-bit number for every kind of piece (type and color, e.g. 'CR') on every square, and one
+# more for Black to move. A position's hash is the XOR of the keys that apply to it. The generator is seeded so that
+# hashes are the same in every process.
+_ZOBRIST_RANDOM = random.Random(0x58514751)
+_ZOBRIST_PIECES = {
+    piece_type + color: tuple(_ZOBRIST_RANDOM.getrandbits(64) for _ in range(BOARD_SQUARES))
+    for piece_type in 'GAEHCNS' for color in 'RB'
+}
+_ZOBRIST_BLACK_TO_MOVE = _ZOBRIST_RANDOM.getrandbits(64)
+
+
+def _build_move_table(offsets, is_allowed):
+    """ Builds a table of the moves a fixed-pattern piece can make from every square. Each offset is a (column, row)
+    destination offset paired with the (column, row) offset of the point that blocks that move, or None if the move
+    cannot be blocked. Returns a tuple indexed by square of dictionaries that map each reachable destination to its
+    blocking square (or None). Destinations off the board or rejected by is_allowed(sq, dest) are left out. """
+
+    table = []
+
+    for sq in range(BOARD_SQUARES):
+        row, col = divmod(sq, BOARD_WIDTH)
+        moves = {}
+
+        for (d_col, d_row), block in offsets:
+            dest_col = col + d_col
+            dest_row = row + d_row
+            if not (0 <= dest_col < BOARD_WIDTH and 0 <= dest_row < BOARD_HEIGHT):
+                continue
+
+            dest = dest_row * BOARD_WIDTH + dest_col
+            if is_allowed(sq, dest):
+                moves[dest] = None if block is None else (row + block[1]) * BOARD_WIDTH + col + block[0]
+
+        table.append(moves)
+
+    return tuple(table)
+
+
+# The standard starting position in Xiangqi FEN. Ranks are listed from Black's side (rank 10) to Red's (rank 1), Red's
+# pieces are upper case and Black's lower case, and 'w' means Red is to move.
+START_FEN = 'rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1'
+
+# The piece type for each FEN letter, and the lower case FEN letter for each piece type. Some programs use 'h' for
+# the Horse and 'e' for the Elephant, so both are read as well.
+_FEN_TYPES = {'k': 'G', 'a': 'A', 'b': 'E', 'e': 'E', 'n': 'H', 'h': 'H', 'r': 'C', 'c': 'N', 'p': 'S'}
+_FEN_LETTERS = {'G': 'k', 'A': 'a', 'E': 'b', 'H': 'n', 'C': 'r', 'N': 'c', 'S': 'p'}
+
+# The most pieces of each type a side can have.
+_MAX_PIECES = {'G': 1, 'A': 2, 'E': 2, 'H': 2, 'C': 2, 'N': 2, 'S': 5}
+
+# The only squares each kind of piece can ever stand on. Generals stay in their palace, Advisors on its diagonals, and
+# Elephants on their own side of the river; Soldiers never move back, so on their own side they stay on the files they
+# start on. Kinds not listed can stand anywhere.
+_FEN_SQUARES = {
+    'GR': _PALACE_SQUARES['R'],
+    'GB': _PALACE_SQUARES['B'],
+    'AR': frozenset(_SQUARES[pos] for pos in ('d1', 'f1', 'e2', 'd3', 'f3')),
+    'AB': frozenset(_SQUARES[pos] for pos in ('d10', 'f10', 'e9', 'd8', 'f8')),
+    'ER': frozenset(_SQUARES[pos] for pos in ('c1', 'g1', 'a3', 'e3', 'i3', 'c5', 'g5')),
+    'EB': frozenset(_SQUARES[pos] for pos in ('c10', 'g10', 'a8', 'e8', 'i8', 'c6', 'g6')),
+    'SR': frozenset(sq for sq in range(BOARD_SQUARES)
+                    if sq >= BOARD_SQUARES // 2 or (sq >= 3 * BOARD_WIDTH and sq % BOARD_WIDTH % 2 == 0)),
+    'SB': frozenset(sq for sq in range(BOARD_SQUARES)
+                    if sq < BOARD_SQUARES // 2 or (sq < 7 * BOARD_WIDTH and sq % BOARD_WIDTH % 2 == 0)),
+}
+
+# The number of times a position must be reached for the game to end by repetition.
+REPETITION_LIMIT = 3
+
+
+def _parse_fen(fen):
+    """ Parses a position in Xiangqi FEN. Returns a tuple of the board labels indexed by square, the color to move
+    ('R' or 'B'), the halfmove clock, and the fullmove number. Pieces of each kind are numbered in square order. Raises
+    a ValueError if the FEN is malformed, a side does not have exactly one General, or a piece stands on a square it
+    could never reach. """
+
+    fields = fen.split()
+    if len(fields) < 1 or len(fields) > 6:
+        raise ValueError(f"Invalid FEN: {fen}")
+
+    ranks = fields[0].split('/')
+    if len(ranks) != BOARD_HEIGHT:
+        raise ValueError(f"Invalid FEN, expected {BOARD_HEIGHT} ranks: {fen}")
+
+    squares = ['---'] * BOARD_SQUARES
+    counts = {piece_type + color: 0 for piece_type in _MAX_PIECES for color in 'RB'}
+
+    # The first rank listed is the top of the board, row 9.
+    for row, rank in zip(range(BOARD_HEIGHT - 1, -1, -1), ranks):
+        col = 0
+
+        for char in rank:
+            if char.isdigit():
+                col += int(char)
+                continue
+
+            if char.lower() not in _FEN_TYPES or col >= BOARD_WIDTH:
+                raise ValueError(f"Invalid FEN rank '{rank}': {fen}")
+
+            kind = _FEN_TYPES[char.lower()] + ('R' if char.isupper() else 'B')
+            if kind in _FEN_SQUARES and row * BOARD_WIDTH + col not in _FEN_SQUARES[kind]:
+                raise ValueError(f"Invalid FEN, {char} stands where it never could: {fen}")
+
+            counts[kind] += 1
+            if counts[kind] > _MAX_PIECES[kind[0]]:
+                raise ValueError(f"Invalid FEN, too many pieces of one kind: {fen}")
+
+            squares[row * BOARD_WIDTH + col] = kind + str(counts[kind])
+            col += 1
+
+        if col != BOARD_WIDTH:
+            raise ValueError(f"Invalid FEN rank '{rank}': {fen}")
+
+    if counts['GR'] != 1 or counts['GB'] != 1:
+        raise ValueError(f"Invalid FEN, each side needs one General: {fen}")
+
+    # Renumber each kind of piece in square order, so labels match those of the starting layout.
+    numbers = {kind: 0 for kind in counts}
+    for sq, label in enumerate(squares):
+        if label != '---':
+            numbers[label[:2]] += 1
+            squares[sq] = label[:2] + str(numbers[label[:2]])
+
+    side = fields[1] if len(fields) > 1 else 'w'
+    if side not in ('w', 'r', 'b'):
+        raise ValueError(f"Invalid FEN side to move '{side}': {fen}")
+
+    try:
+        halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+    except ValueError:
+        raise ValueError(f"Invalid FEN move counters: {fen}")
+
+    return squares, 'B' if side == 'b' else 'R', halfmove_clock, max(fullmove_number, 1)
+
+
+def _invert_move_table(table):
+    """ Inverts a move table built by _build_move_table. Returns a tuple indexed by square of dictionaries that map
+    each square a piece could reach that square from to the blocking square of that move (or None). """
+
+    inverted = [{} for _ in range(BOARD_SQUARES)]
+
+    for sq, moves in enumerate(table):
+        for dest, block in moves.items():
+            inverted[dest][sq] = block
+
+    return tuple(inverted)
+
 
 class XiangqiGame:
     """ A class that defines a game of Xiangqi, to include a Board, Players, and Pieces. """
 
-    def __init__(self):
-        """ Initializes a new Xiangqi game with a new board, piece set, game state, and player definitions. """
+    # The game that new games from the starting position are copied from. See _get_prototype.
+    _prototype = None
+
+    def __init__(self, incremental=True, debug=False, fen=None, repetition_limit=REPETITION_LIMIT):
+        """ Initializes a new Xiangqi game with a new board, piece set, game state, and player definitions.
+        If incremental is True, only the pieces affected by a move are remapped after it is made or undone. If debug is
+        True, every incremental remap is cross-checked against a full rebuild of both attack maps, and every hash update
+        against a hash computed from scratch. If fen is given, the game starts from that position instead of the
+        starting position; a ValueError is raised if it is not a valid position. The game ends once a position has
+        been reached repetition_limit times, or never ends by repetition if it is None. """
 
-        self._board = Board()
-        self._pieces = Pieces(self._board)
+        # A new game from the starting position is copied from a prototype, so it is only set up from scratch once.
+        if fen is None:
+            XiangqiGame._get_prototype()._copy_into(self, incremental, debug, repetition_limit)
+            return
+
+        squares, player, halfmove_clock, fullmove_number = _parse_fen(fen)
+        self._initialize(squares, player, halfmove_clock, fullmove_number, incremental, debug, repetition_limit)
+
+        # A position given by FEN may have the player not to move in check, which cannot happen in a game, or the
+        # player to move with no legal moves, in which case the game is already over.
+        if self.is_in_check(self._players[1] if player == self._players[0] else self._players[0]) is True:
+            raise ValueError(f"Invalid FEN, the player not to move is in check: {fen}")
+
+        self._update_game_state()
+
+    def _initialize(self, squares, player, halfmove_clock, fullmove_number, incremental, debug, repetition_limit):
+        """ Helper method that sets up a game from the labels of a list indexed by square (or the starting layout if
+        None), the player to move, and the FEN move counters. See __init__ for the other arguments. """
+
+        self._board = Board(squares)
+        self._pieces = Pieces(self._board, incremental, debug)
         self._players = (self._board.red(), self._board.black())
-        self._game_states = ('UNFINISHED', 'RED_WON', 'BLACK_WON')
+        self._game_states = ('UNFINISHED', 'RED_WON', 'BLACK_WON', 'DRAW')
         self._current_game_state = self._game_states[0]
-        self._current_player = self._players[0]
+        self._end_reason = None
+        self._current_player = player
+        self._debug = debug
+
+        # The FEN move counters of the position the game started from: the plies since the last capture, and the
+        # number of plies before it counting from Red's first move.
+        self._start_halfmove_clock = halfmove_clock
+        self._start_ply = (fullmove_number - 1) * 2 + (0 if player == self._players[0] else 1)
 
         # Maps all initial attack ranges for each piece on the board.
         self._pieces.map_all_attack_ranges(self._board, self._pieces)
 
+        # The Zobrist hash of the current position, updated as moves are made and undone.
+        self._hash = self._compute_hash()
+
+        # A stack of every move made and not yet undone, most recent last. Each entry is a tuple of the moved piece,
+        # its origin and destination squares, the captured piece (or None), the hash before the move, and the attack
+        # ranges the move replaced as a flat list of pieces each followed by its old attack range (cheaper to keep than
+        # a list of pairs when games are long), so that the move can be undone in O(changed).
+        self._move_stack = []
+
+        # Objects told about every move made with make_move or taken back with pop. See add_move_listener.
+        self._move_listeners = []
+
+        # The plies at which each position has been reached, keyed by hash, and whether each move made gave check.
+        # Both are kept for moves made with make_move and taken back with pop, so that a repeated position is found,
+        # and the moves since it was first reached are known, at a constant cost per move.
+        self._repetition_limit = repetition_limit
+        self._position_plies = {self._hash: [0]}
+        self._checks = []
+
+        # The profiler the game's hot paths report to, if any. See set_profiler.
+        self._profiler = None
+
+    @staticmethod
+    def _get_prototype():
+        """ Helper method that returns the game new games from the starting position are copied from, setting it up the
+        first time. The prototype itself is never played. """
+
+        if XiangqiGame._prototype is None:
+            prototype = object.__new__(XiangqiGame)
+            prototype._initialize(None, 'R', 0, 1, True, False, REPETITION_LIMIT)
+            XiangqiGame._prototype = prototype
+
+        return XiangqiGame._prototype
+
+    def set_profiler(self, profiler):
+        """ Reports the calls and the time taken by the game's hot paths (see XiangqiProfiler.STAGES) to profiler, which
+        may be shared by many games, or stops reporting if it is None. A game without a profiler runs no timing code at
+        all: the timed versions of the methods are swapped in when a profiler is set, rather than checked for on every
+        call. """
+
+        self._profiler = profiler
+        self._board.set_profiler(profiler)
+        self._pieces.set_profiler(profiler)
+
+        if profiler is None:
+            self.__dict__.pop('_is_game_over', None)
+        else:
+            self._is_game_over = self._profiled_is_game_over
+
+    def get_profiler(self):
+        """ Returns the profiler the game reports to, or None. """
+
+        return self._profiler
+
+    def _profiled_is_game_over(self):
+        """ Helper method that stands in for _is_game_over while the game has a profiler, timing it. """
+
+        start = time.perf_counter()
+        game_over = type(self)._is_game_over(self)
+        self._profiler.record('is_game_over', time.perf_counter() - start)
+
+        return game_over
+
+    def clone(self):
+        """ Returns an independent copy of the game in its current position, with its move history, so moves made in
+        either game do not affect the other, and the copy's moves can be taken back with pop as far as the original's.
+        Move listeners are not copied, but a clone reports to the same profiler. Only the mutable parts of the game are
+        copied; the rest, such as the attack ranges, are shared, so a clone takes a small fraction of the time of
+        setting up a game. """
+
+        game = object.__new__(type(self))
+        self._copy_into(game, self._pieces._incremental, self._debug, self._repetition_limit)
+
+        return game
+
+    def _copy_into(self, game, incremental, debug, repetition_limit):
+        """ Helper method that makes game, an uninitialized XiangqiGame, a copy of this one with the given switches. See
+        clone. """
+
+        # Each piece is copied once, and its copy is used everywhere the piece appears, including on the move stack.
+        copies = {}
+
+        def _copy(piece):
+            """ Returns the copy of a piece, such as a captured one, copying it the first time, or None if it is
+            None. """
+
+            if piece is None:
+                return None
+
+            copy = copies.get(piece)
+            if copy is None:
+                copy = copies[piece] = piece.copy()
+
+            return copy
+
+        game.__dict__.update(self.__dict__)
+        game.__dict__.pop('_is_game_over', None)
+        game._board = self._board.copy()
+        game._pieces = self._pieces.copy(copies, incremental, debug)
+        game._debug = debug
+        game._repetition_limit = repetition_limit
+        game._move_listeners = []
+        game._position_plies = {position_hash: list(plies) for position_hash, plies in self._position_plies.items()}
+        game._checks = list(self._checks)
+        game._move_stack = []
+
+        for moved_piece, sq1, sq2, captured_piece, previous_hash, changed_ranges in self._move_stack:
+            changed_ranges = list(changed_ranges)
+            changed_ranges[::2] = [_copy(piece) for piece in changed_ranges[::2]]
+            game._move_stack.append(
+                (_copy(moved_piece), sq1, sq2, _copy(captured_piece), previous_hash, changed_ranges)
+            )
+
+        if self._profiler is not None:
+            game.set_profiler(self._profiler)
+
     def print_board(self):
         """ Prints the current board layout. """
 
         self._board.print_board()
 
     def get_game_state(self):
-        """ Returns the current game state. """
+        """ Returns the current game state: 'UNFINISHED', 'RED_WON', 'BLACK_WON', or 'DRAW'. """
 
         return self._current_game_state
 
+    def get_end_reason(self):
+        """ Returns why the game ended, or None if it has not: 'CHECKMATE' or 'STALEMATE' if the player to move has no
+        legal moves, 'PERPETUAL_CHECK' or 'PERPETUAL_CHASE' if a player lost for repeating the position with nothing
+        but checks or chases, or 'REPETITION' if the game was drawn by repetition. """
+
+        return self._end_reason
+
+    def get_repetition_count(self):
+        """ Returns the number of times the current position has been reached in this game, counting this time. """
+
+        return len(self._position_plies.get(self._hash, ()))
+
     def is_in_check(self, color):
-        """ Determines whether or not the given General is in check by checking the opponent's attack map. """
+        """ Determines whether or not the given General is in check by looking outward from its square. """
+
+        return self._pieces.is_in_check(color, self._board)
+
+    def legal_moves(self):
+        """ Generates every legal move for the current player as a (pos1, pos2) tuple of cardinal positions, without
+        making any of them. Generates nothing once the game is over. The moves are found lazily from the live position,
+        so no move may be made or taken back while iterating; to make moves along the way, iterate over
+        list(game.legal_moves()) instead. """
 
-        return self._pieces.is_in_check(color)
+        if self._current_game_state != self._game_states[0]:
+            return
+
+        for sq1, sq2 in self._legal_moves():
+            yield self._board.get_pos_from_square(sq1), self._board.get_pos_from_square(sq2)
+
+    def push(self, move):
+        """ Makes a move given as a (pos1, pos2) tuple, such as one generated by legal_moves. Returns True or False
+        like make_move. A move that was made can be taken back with pop, as can moves made with make_move. """
+
+        pos1, pos2 = move
+
+        return self.make_move(pos1, pos2)
+
+    def pop(self):
+        """ Takes back the most recent move that has not yet been taken back, restoring the position, player to move,
+        hash, and game state from before it. Returns the move as a (pos1, pos2) tuple, or None if no moves are left. """
+
+        if len(self._move_stack) == 0:
+            return None
+
+        sq1, sq2 = self._move_stack[-1][1:3]
+
+        # Forget that the position was reached and whether the move gave check.
+        plies = self._position_plies[self._hash]
+        plies.pop()
+        if len(plies) == 0:
+            del self._position_plies[self._hash]
+        self._checks.pop()
+
+        # Every move on the stack switched players and was made while the game was unfinished.
+        self._switch_player()
+        self._undo_move()
+        self._current_game_state = self._game_states[0]
+        self._end_reason = None
+
+        for listener in tuple(self._move_listeners):
+            listener.move_taken_back(self)
+
+        return self._board.get_pos_from_square(sq1), self._board.get_pos_from_square(sq2)
+
+    def add_move_listener(self, listener):
+        """ Registers an object to be told about moves. After every move made with make_move (or push), its
+        move_made(game, sq1, sq2) method is called with the move's squares, once the player has switched and the game
+        state has been updated. After every move taken back with pop, its move_taken_back(game) method is called. """
+
+        self._move_listeners.append(listener)
+
+    def remove_move_listener(self, listener):
+        """ Stops telling a registered object about moves. """
+
+        self._move_listeners.remove(listener)
+
+    def get_fen(self):
+        """ Returns the current position in Xiangqi FEN, including the player to move and the move counters. """
+
+        ranks = []
+
+        for row in range(BOARD_HEIGHT - 1, -1, -1):
+            rank = ''
+            empty = 0
+
+            for label in self._board.get_squares()[row * BOARD_WIDTH:(row + 1) * BOARD_WIDTH]:
+                if label == self._board.empty():
+                    empty += 1
+                    continue
+
+                if empty > 0:
+                    rank += str(empty)
+                    empty = 0
+
+                letter = _FEN_LETTERS[label[0]]
+                rank += letter.upper() if label[1] == self._players[0] else letter
+
+            ranks.append(rank + (str(empty) if empty > 0 else ''))
+
+        # The halfmove clock counts the plies since the last capture.
+        halfmove_clock = 0
+        for record in reversed(self._move_stack):
+            if record[3] is not None:
+                break
+            halfmove_clock += 1
+        else:
+            halfmove_clock += self._start_halfmove_clock
+
+        side = 'w' if self._current_player == self._players[0] else 'b'
+        fullmove_number = (self._start_ply + len(self._move_stack)) // 2 + 1
+
+        return f"{'/'.join(ranks)} {side} - - {halfmove_clock} {fullmove_number}"
+
+    def get_hash(self):
+        """ Returns a 64-bit Zobrist hash of the current position, including the player to move. Equal positions
+        always have equal hashes, so the hash can be used as a key to cache anything about a position. """
+
+        return self._hash
+
+    def get_book_moves(self, book):
+        """ Returns a list of the moves an opening book (see XiangqiBook.OpeningBook) holds for the current position,
+        most played first, as the book's move objects. Moves that are not legal here, which can only come from a hash
+        collision, are left out. """
+
+        if self._current_game_state != self._game_states[0]:
+            return []
+
+        return [move for move in book.lookup(self._hash)
+                if self._make_move(*divmod(move.get_code(), BOARD_SQUARES), test=True) is True]
 
     def make_move(self, pos1, pos2, test=False):
         """ Attempts the move inputted by the user. Returns true or false depending on whether or not the move is valid.
         If test is set to True, the method will set the board back to the previous move after completing this move. """
 
+        # Translate both cardinal positions to board squares. If either is not a valid position, the move is invalid.
+        sq1 = self._board.get_square_from_pos(pos1)
+        sq2 = self._board.get_square_from_pos(pos2)
+
+        if sq1 is None or sq2 is None:
+            # print("ERROR: Invalid position entered.")
+            return False
+
+        return self._make_move(sq1, sq2, test)
+
+    def _make_move(self, sq1, sq2, test=False):
+        """ Helper method that attempts a move between two board squares. Returns True or False like make_move. """
+
         # If the game is over, then the user cannot make a move.
         if self._current_game_state != self._game_states[0]:
             # print("ERROR: The game has ended.")
             return False
 
-        # If the user makes a valid move, make the move, update the board layout, and remap all attacked squares.
-        if self._pieces.is_valid_move(pos1, pos2, self._board, self._pieces, self._current_player) is True:
-            self._pieces._remove_captured_piece(pos2, self._current_player)
-            self._pieces.get_piece_by_pos(pos1).update_pos(pos2)
-            self._board.update_layout(self._pieces)
-            self._pieces.map_all_attack_ranges(self._board, self._pieces)
-
-            # If this move caused the General to be in check, undo it and return False.
-            if self.is_in_check(self._current_player) is True:
-                # print("ERROR: Move cannot leave General in check.")
-                self._undo_move(pos1, pos2)
-                return False
+        # If the move is valid and does not leave the General in check, it has now been made.
+        if self._apply_move(sq1, sq2) is True:
 
             # If this was a test move, return the board to its original position and mark move as valid.
             # Otherwise, switch the player and check if the game has ended.
+            # print(f"Valid Move Made: {sq1} - {sq2}.")
+            if test is True:
+                self._undo_move()
             else:
-                # print(f"Valid Move Made: {pos1} - {pos2}.")
-                if test is True:
-                    self._undo_move(pos1, pos2)
-                else:
-                    self._switch_player()
-                    self._update_game_state()
+                self._switch_player()
+                self._checks.append(self.is_in_check(self._current_player))
+                self._position_plies.setdefault(self._hash, []).append(len(self._move_stack))
+                self._update_game_state()
+                for listener in tuple(self._move_listeners):
+                    listener.move_made(self, sq1, sq2)
             return True
 
-        # print(f"Invalid Move Made: {pos1} - {pos2}.")
+        # print(f"Invalid Move Made: {sq1} - {sq2}.")
         return False
 
-    def _undo_move(self, pos1, pos2):
-        """ Helper method that resets the board to its state before the most recent attempted move. """
+    def _apply_move(self, sq1, sq2):
+        """ Helper method that makes a move for the current player without switching players or checking for the end
+        of the game. Returns True if the move was made. Returns False, leaving the board as it was, if the move is not
+        valid or would leave the current player's General in check. Moves made here are pushed onto the move stack and
+        undone with _undo_move. """
 
-        # Set move to previous move, restore any captured pieces, and update layout/attack ranges.
-        self._pieces.get_piece_by_pos(pos2).update_pos(pos1)
-        self._pieces._restore_captured_piece()
-        self._board.update_layout(self._pieces)
-        self._pieces.map_all_attack_ranges(self._board, self._pieces)
+        # If the move is not valid, or would leave the General in check, the board is left untouched.
+        if self._pieces.is_valid_move(sq1, sq2, self._board, self._pieces, self._current_player) is not True:
+            return False
+
+        if self._pieces.is_legal_move(sq1, sq2, self._board, self._pieces, self._current_player) is not True:
+            # print("ERROR: Move cannot leave General in check.")
+            return False
+
+        moved_piece = self._pieces.get_piece_by_square(sq1)
+        previous_hash = self._hash
+
+        # Make the move, update the hash and board layout, and remap the attack ranges the move affects.
+        captured_piece, changed_ranges = self._pieces._remove_captured_piece(sq2, self._current_player)
+        self._pieces.update_square(sq1, sq2)
+        self._update_hash(moved_piece, sq1, sq2, captured_piece)
+        self._board.update_layout(self._pieces, (sq1, sq2))
+        changed_ranges += self._pieces.update_attack_ranges(self._board, self._pieces, (sq1, sq2))
+
+        # Record everything needed to take the move back.
+        self._move_stack.append((moved_piece, sq1, sq2, captured_piece, previous_hash, changed_ranges))
+
+        if self._debug is True:
+            self._verify_hash()
+
+        return True
+
+    def _undo_move(self):
+        """ Helper method that pops the most recent move off the move stack and resets the board to its state before
+        that move, without switching players. Only the squares and attack ranges the move changed are restored. """
+
+        moved_piece, sq1, sq2, captured_piece, previous_hash, changed_ranges = self._move_stack.pop()
+
+        # Move the piece back, restore any captured piece and the previous hash, layout, and attack ranges.
+        self._pieces.update_square(sq2, sq1)
+        self._pieces._restore_captured_piece(captured_piece)
+        self._hash = previous_hash
+        self._board.update_layout(self._pieces, (sq1, sq2))
+        self._pieces.restore_attack_ranges(self._board, self._pieces, changed_ranges)
+
+        if self._debug is True:
+            self._verify_hash()
 
     def _switch_player(self):
         """ Helper method that toggles the current player. """
@@ -89,8 +672,38 @@ class XiangqiGame:
         else:
             self._current_player = self._players[0]
 
+        self._hash ^= _ZOBRIST_BLACK_TO_MOVE
+
+    def _update_hash(self, moved_piece, sq1, sq2, captured_piece):
+        """ Helper method that toggles the piece that moved from sq1 to sq2, and the piece it captured if not None, in
+        the hash. """
+
+        moved_keys = _ZOBRIST_PIECES[moved_piece.get_type() + moved_piece.get_color()]
+        self._hash ^= moved_keys[sq1] ^ moved_keys[sq2]
+
+        if captured_piece is not None:
+            self._hash ^= _ZOBRIST_PIECES[captured_piece.get_type() + captured_piece.get_color()][sq2]
+
+    def _verify_hash(self):
+        """ Debug helper that raises a RuntimeError if the incrementally updated hash differs from the hash of the
+        current position computed from scratch. """
+
+        if self._hash != self._compute_hash():
+            raise RuntimeError("Incrementally updated hash does not match a hash computed from scratch.")
+
+    def _compute_hash(self):
+        """ Helper method that computes the Zobrist hash of the current position from scratch. """
+
+        position_hash = 0 if self._current_player == self._players[0] else _ZOBRIST_BLACK_TO_MOVE
+
+        for piece in self._pieces.get_all_pieces().values():
+            position_hash ^= _ZOBRIST_PIECES[piece.get_type() + piece.get_color()][piece.get_square()]
+
+        return position_hash
+
     def _update_game_state(self):
-        """ Checks the current game state for a checkmate or stalemate situation for either color and updates state. """
+        """ Checks the current game state for a checkmate or stalemate situation for either color and updates state.
+        Otherwise, if the position has now been reached repetition_limit times, the game is adjudicated. """
 
         # Check if the game is over, and if so, update the game state to reflect the winner.
         if self._is_game_over():
@@ -98,77 +711,268 @@ class XiangqiGame:
                 self._current_game_state = self._game_states[2]
             else:
                 self._current_game_state = self._game_states[1]
+            self._end_reason = 'CHECKMATE' if self.is_in_check(self._current_player) else 'STALEMATE'
+            return
+
+        plies = self._position_plies.get(self._hash, ())
+        if self._repetition_limit is not None and len(plies) >= self._repetition_limit:
+            self._adjudicate_repetition(plies[-self._repetition_limit])
+
+    def _adjudicate_repetition(self, first_ply):
+        """ Helper method that ends a game whose position has repeated since first_ply, by the Asian rules: a player
+        who gave check with every move since then loses, unless both did. Otherwise, a player who chased with every
+        move since then loses, unless both did. Anything else is a draw. """
+
+        movers = (self._players[1], self._players[0]) if self._current_player == self._players[0] else self._players
+        moves = range(first_ply, len(self._move_stack))
+
+        # The moves since first_ply alternate between the players, the last one made by the player not to move.
+        def _every_move(player, flags):
+            """ Returns True if the flag of every move made by player since first_ply is set. """
+
+            return all(flags[ply] for ply in moves if movers[(len(self._move_stack) - 1 - ply) % 2] == player)
+
+        red, black = self._players
+        reason = 'PERPETUAL_CHECK'
+        red_loses = _every_move(red, self._checks)
+        black_loses = _every_move(black, self._checks)
+
+        if red_loses == black_loses and not red_loses:
+            chases = self._find_chases(first_ply)
+            reason = 'PERPETUAL_CHASE'
+            red_loses = _every_move(red, chases)
+            black_loses = _every_move(black, chases)
+
+        if red_loses != black_loses:
+            self._current_game_state = self._game_states[2] if red_loses else self._game_states[1]
+            self._end_reason = reason
+        else:
+            self._current_game_state = self._game_states[3]
+            self._end_reason = 'REPETITION'
+
+    def _find_chases(self, first_ply):
+        """ Helper method that takes back the moves made since first_ply and makes them again, noting which of them
+        chased. A move chases if any of the mover's pieces newly attacks a piece it counts as chasing, so an attack
+        discovered by moving a screen out of a line counts as well as one made by the piece that moved. Returns a
+        dictionary mapping the ply of each of those moves to True if it was a chase. Only called when a position
+        repeats, so its cost is not paid on every move. """
+
+        undone = []
+        while len(self._move_stack) > first_ply:
+            undone.append(self._move_stack[-1][1:3])
+            self._switch_player()
+            self._undo_move()
+
+        def _attacks(player):
+            """ Returns the set of (label, square) pairs of every square each of player's pieces attacks. """
+
+            return {(label, sq) for sq, labels in self._pieces.get_attack_map(player).items() for label in labels}
+
+        chases = {}
+        for sq1, sq2 in reversed(undone):
+            player = self._current_player
+            attacks = _attacks(player)
+            ply = len(self._move_stack)
+            self._apply_move(sq1, sq2)
+            self._switch_player()
+            chases[ply] = any(self._is_chased(self._pieces.get_piece_by_label(label), sq)
+                              for label, sq in _attacks(player) - attacks)
+
+        return chases
+
+    def _is_chased(self, piece, sq):
+        """ Helper method that returns True if piece, which belongs to the player who just moved, threatens the enemy
+        piece on sq in a way that counts as a chase: a Horse or Cannon attacking a Chariot, or any piece attacking a
+        piece that cannot recapture, other than the General or a Soldier that has not crossed the river. """
+
+        target = self._pieces.get_piece_by_square(sq)
+        if target is None or target.get_type() == 'G':
+            return False
+
+        if target.get_type() == 'S' and self._board.is_square_behind_river(sq, target.get_color()):
+            return False
+
+        if target.get_type() == 'C' and piece.get_type() in ('H', 'N'):
+            return True
+
+        # Make the capture, if it is legal, and look for a legal recapture.
+        self._switch_player()
+        is_chase = self._apply_move(piece.get_square(), sq)
+
+        if is_chase is True:
+            self._switch_player()
+            for label in self._pieces.get_attack_map(self._current_player).get(sq, ()):
+                defender_sq = self._pieces.get_piece_by_label(label).get_square()
+                if self._pieces.is_legal_move(defender_sq, sq, self._board, self._pieces, self._current_player):
+                    is_chase = False
+                    break
+            self._switch_player()
+            self._undo_move()
+
+        self._switch_player()
+
+        return is_chase
 
     def _is_game_over(self):
         """ Checks the board for a checkmate or stalemate position for current player. """
 
-        # Retrieve all possible moves for the current player from their attack map.
+        # Retrieve all possible moves for the current player from their attack map. Try the replies most likely to
+        # get out of check first: General moves, then moves to a point next to the General, then everything else.
         all_moves = self._pieces.get_all_possible_moves(self._current_player)
+        general_label = 'GR1' if self._current_player == self._players[0] else 'GB1'
+        general_sq = self._pieces.get_piece_by_label(general_label).get_square()
+        general_row, general_col = divmod(general_sq, BOARD_WIDTH)
 
-        # If there are any valid moves in the moves list, the game is still unfinished.
-        for move in all_moves:
-            if self.make_move(move[0], move[1], True) is True:
-                return False
+        def _reply_order(move):
+            """ Sort key that puts General moves first and moves next to the General second. """
+
+            if move[0] == general_sq:
+                return 0
+
+            row, col = divmod(move[1], BOARD_WIDTH)
+            return 1 if abs(row - general_row) <= 1 and abs(col - general_col) <= 1 else 2
+
+        all_moves.sort(key=_reply_order)
+
+        # If there are any legal moves in the moves list, the game is still unfinished.
+        for _ in self._legal_moves(all_moves):
+            return False
 
         # Otherwise, the game is over.
         return True
 
+    def _legal_moves(self, moves=None):
+        """ Helper generator that yields each legal move for the current player as a pair of squares. Candidates are
+        taken in order from moves if given, or from the current player's attack map. Each candidate is checked when it
+        is reached, so the game must be back in the same position whenever iteration resumes. """
+
+        for sq1, sq2 in self._pieces.get_all_possible_moves(self._current_player) if moves is None else moves:
+            if self._pieces.is_legal_move(sq1, sq2, self._board, self._pieces, self._current_player) is True:
+                yield sq1, sq2
+
+
+def game_from_moves(moves, fen=None):
+    """ Returns a new game with the given moves (strings such as 'h3e3') played from the position given in FEN, or
+    from the starting position if fen is None. Raises a ValueError if the FEN is invalid, or naming the first move that
+    is malformed or illegal. """
+
+    game = XiangqiGame(fen=fen)
+
+    for move in moves:
+        match = MOVE_PATTERN.match(move)
+        if match is None or game.make_move(match.group(1), match.group(2)) is not True:
+            raise ValueError(f"Invalid move: {move}")
+
+    return game
+
 
 class Pieces:
     """ A collection of Piece objects. Pieces performs iterative operations on the current collection of pieces,
     including retrieving a Piece by its current position, mapping/updating the attack ranges for each player, and
     performing basic validation that would be true or false for any type of piece. """
 
-    def __init__(self, board):
-        """ Initializes a set of pieces from the starting board layout. """
+    __slots__ = ('_pieces', '_pieces_by_square', '_red', '_black', '_red_attack_map', '_black_attack_map',
+                 '_incremental', '_debug', '_profiler')
+
+    def __init__(self, board, incremental=True, debug=False):
+        """ Initializes a set of pieces from the starting board layout. If incremental is True, attack maps are patched
+        in place after each move rather than rebuilt. If debug is True, each patch is verified against a rebuild. """
 
         # A collection of Piece objects, initialized from the board layout.
         self._pieces = {}
 
+        # An index of the same Piece objects by their current square, kept in sync as pieces move. None if empty.
+        self._pieces_by_square = [None] * BOARD_SQUARES
+
         # Quick definitions for the player colors.
         self._red = board.red()
         self._black = board.black()
 
         # Maps of points on the board that pieces are currently attacking, separated by color.
-        # Attack maps have positions as keys, and a list of the labels of attacking pieces for that position as a value.
+        # Attack maps have squares as keys, and a tuple of the labels of attacking pieces for that position as a value.
         self._red_attack_map = {}
         self._black_attack_map = {}
 
-        # Store the most recently captured piece for undo operation.
-        self._captured_piece = None
+        # Switches for incremental attack map updates and for cross-checking them against a full rebuild.
+        self._incremental = incremental
+        self._debug = debug
+
+        # The profiler the collection's hot paths report to, if any. See set_profiler.
+        self._profiler = None
 
         # Initialize all pieces from the starting board position and store to self._pieces.
         self._initialize_pieces(board)
 
+    def copy(self, copies, incremental, debug):
+        """ Returns a copy of the collection with the given incremental and debug switches, holding a copy of each of
+        its pieces, and records each piece's copy in the dictionary copies. The attack maps are copied, but the tuples
+        of labels in them are shared. """
+
+        pieces = object.__new__(Pieces)
+        pieces._pieces = {}
+        pieces._pieces_by_square = [None] * BOARD_SQUARES
+        pieces._red = self._red
+        pieces._black = self._black
+        pieces._red_attack_map = dict(self._red_attack_map)
+        pieces._black_attack_map = dict(self._black_attack_map)
+        pieces._incremental = incremental
+        pieces._debug = debug
+        pieces._profiler = None
+
+        for label, piece in self._pieces.items():
+            copy = copies[piece] = piece.copy()
+            pieces._pieces[label] = copy
+            pieces._pieces_by_square[copy.get_square()] = copy
+
+        return pieces
+
+    def set_profiler(self, profiler):
+        """ Reports the calls and the time taken by is_valid_move, update_attack_ranges, and map_all_attack_ranges to
+        profiler, or stops reporting if it is None, by switching the collection to or from the timed subclass. """
+
+        self._profiler = profiler
+        self.__class__ = Pieces if profiler is None else _ProfiledPieces
+
     def get_all_pieces(self):
         """ Gets a dictionary of all the pieces keyed by label. """
 
         return self._pieces
 
     def get_all_possible_moves(self, color):
-        """ Gets a list of tuples representing a move. List represents all possible moves for a given color. """
+        """ Gets a list of tuples representing a move. List represents all possible moves for a given color as pairs
+        of squares. """
 
         all_moves = []
         attack_map = self.get_attack_map(color)
 
         # Iterate through all pieces in all destinations in this color's attack map, pushing a tuple of the
-        # piece's current position and attack map destination.
-        for pos2, pieces in attack_map.items():
+        # piece's current square and attack map destination.
+        for sq2, pieces in attack_map.items():
             for label in pieces:
                 piece = self.get_piece_by_label(label)
-                all_moves.append((piece.get_current_pos(), pos2))
+                all_moves.append((piece.get_square(), sq2))
 
         return all_moves
 
+    def get_all_possible_moves_by_pos(self, color):
+        """ Gets a list of all possible moves for a given color as (pos1, pos2) tuples of cardinal positions. A view of
+        get_all_possible_moves for callers that work with positions. """
+
+        return [(_POSITIONS[sq1], _POSITIONS[sq2]) for sq1, sq2 in self.get_all_possible_moves(color)]
+
     def get_pieces_by_pos(self):
-        """ Returns the pieces collection with the current pos as key. """
+        """ Returns a dictionary of the pieces keyed by their current cardinal position. This is a compatibility view
+        for callers that work with positions: it is built from the square index on every call, at a cost of O(pieces),
+        and changing it does not affect the collection. Nothing on the move or check paths uses it; they use
+        get_piece_by_square and get_pieces_by_square. """
 
-        pieces_by_pos = {}
+        return {_POSITIONS[sq]: piece for sq, piece in enumerate(self._pieces_by_square) if piece is not None}
 
-        for piece in self._pieces.values():
-            pieces_by_pos[piece.get_current_pos()] = piece
+    def get_pieces_by_square(self):
+        """ Returns a list of the piece on each square, or None for an empty square. This is the live index and must
+        not be modified by the caller. """
 
-        return pieces_by_pos
+        return self._pieces_by_square
 
     def get_piece_by_label(self, label):
         """ Gets a piece by its label. If it doesn't exist, returns None. """
@@ -181,11 +985,14 @@ class Pieces:
     def get_piece_by_pos(self, pos):
         """ Returns the piece at a given position, or None if the position is unoccupied or invalid. """
 
-        for piece in self._pieces.values():
-            if piece.get_current_pos() == pos:
-                return piece
+        sq = _SQUARES.get(pos) if isinstance(pos, str) else None
 
-        return None
+        return None if sq is None else self._pieces_by_square[sq]
+
+    def get_piece_by_square(self, sq):
+        """ Returns the piece on a given square, or None if the square is unoccupied. """
+
+        return self._pieces_by_square[sq]
 
     def get_attack_map(self, color):
         """ Returns the attack map for a given color. """
@@ -195,43 +1002,57 @@ class Pieces:
 
         return self._black_attack_map
 
-    def is_in_check(self, color):
-        """ Determines whether or not a player is currently in check by checking if their General's position is
-        listed as a key in their opponent's attack map. """
+    def get_attack_map_by_pos(self, color):
+        """ Returns the attack map for a given color keyed by cardinal position rather than by square. The map is built
+        on every call, so changing it does not affect the collection. """
+
+        return {_POSITIONS[sq]: labels for sq, labels in self.get_attack_map(color).items()}
+
+    def update_pos(self, pos1, pos2):
+        """ Moves the piece at cardinal position pos1 to pos2 and updates the square index to match. """
+
+        self.update_square(_SQUARES[pos1], _SQUARES[pos2])
+
+    def update_square(self, sq1, sq2):
+        """ Moves the piece on sq1 to sq2 and updates the square index to match. """
 
-        # If checking black General, see if any piece on red's attack map is attacking the General's position.
+        piece = self._pieces_by_square[sq1]
+        piece.update_square(sq2)
+        self._pieces_by_square[sq1] = None
+        self._pieces_by_square[sq2] = piece
+
+    def is_in_check(self, color, board):
+        """ Determines whether or not a player is currently in check by looking outward from their General's square
+        for an enemy piece that attacks it, without using the attack maps. """
+
+        # If checking black General, look for red pieces attacking the General's position.
         if color.lower() == 'black' or color == self._black:
-            attack_map = self._red_attack_map
-            general_pos = self.get_piece_by_label('GB1').get_current_pos()
+            general_sq = self.get_piece_by_label('GB1').get_square()
+            enemy = self._red
 
-        # If checking red General, see if any piece on black's attack map is attacking the General's position.
+        # If checking red General, look for black pieces attacking the General's position.
         elif color.lower() == 'red' or color == self._red:
-            attack_map = self._black_attack_map
-            general_pos = self.get_piece_by_label('GR1').get_current_pos()
+            general_sq = self.get_piece_by_label('GR1').get_square()
+            enemy = self._black
 
         # If something other than 'black' or 'red' was entered, return None.
         else:
             # print("ERROR: Invalid color entered. Please enter 'red' or 'black'.")
             return None
 
-        # Otherwise, return whether or not this General is in the opponent's attack map.
-        return general_pos in attack_map
+        return self._is_attacked(general_sq, enemy, board)
 
-    def is_valid_move(self, pos1, pos2, board, pieces, current_player):
-        """ Runs a series of validations on all piece types as well as the piece's own validation. """
+    def is_valid_move(self, sq1, sq2, board, pieces, current_player):
+        """ Runs a series of validations on all piece types as well as the piece's own validation. Both squares must
+        be on the board; positions entered by the user are translated and checked by XiangqiGame.make_move. """
 
-        # If one of the moves is not a valid position, the move is invalid.
-        if board.is_valid_pos(pos1) is False or board.is_valid_pos(pos2) is False:
-            # print("ERROR: Invalid position entered.")
-            return False
-
-        # If the two positions entered are the same, the move is invalid.
-        if pos1 == pos2:
+        # If the two squares entered are the same, the move is invalid.
+        if sq1 == sq2:
             # print("ERROR: Must move to a position other than current.")
             return False
 
-        # Get the piece at pos1.
-        pos1_piece = self.get_piece_by_pos(pos1)
+        # Get the piece at sq1.
+        pos1_piece = self._pieces_by_square[sq1]
 
         # If there's no piece there, this move is invalid.
         if pos1_piece is None:
@@ -243,16 +1064,42 @@ class Pieces:
             # print("ERROR: Wrong color.")
             return False
 
-        # Get the piece at pos2.
-        pos2_piece = self.get_piece_by_pos(pos2)
+        # Get the piece at sq2.
+        pos2_piece = self._pieces_by_square[sq2]
 
-        # If the piece at pos2 is the same color as the piece at pos1, the move is invalid.
+        # If the piece at sq2 is the same color as the piece at sq1, the move is invalid.
         if pos2_piece is not None and pos2_piece.get_color() == current_player:
             # print("ERROR: Same color piece at destination.")
             return False
 
         # Return True if this is a valid move for this specific piece type. Otherwise, False.
-        return pos1_piece.is_valid_move(pos1, pos2, board, pieces, current_player)
+        return pos1_piece.is_valid_move(sq1, sq2, board, pieces, current_player)
+
+    def is_legal_move(self, sq1, sq2, board, pieces, current_player):
+        """ Determines whether a move that is already known to be valid keeps the current player's General out of
+        check, without making the move. The move is applied to the square index and board layout just long enough to
+        look outward from the General. Attack maps, attack ranges, and the hash are left untouched. """
+
+        moved_piece = self._pieces_by_square[sq1]
+        captured_piece = self._pieces_by_square[sq2]
+
+        # Temporarily make the move on the square index and the board.
+        moved_piece.update_square(sq2)
+        self._pieces_by_square[sq1] = None
+        self._pieces_by_square[sq2] = moved_piece
+        board.update_layout(pieces, (sq1, sq2))
+
+        general_sq = self.get_piece_by_label('GR1' if current_player == self._red else 'GB1').get_square()
+        enemy = self._black if current_player == self._red else self._red
+        is_legal = not self._is_attacked(general_sq, enemy, board)
+
+        # Take the move back.
+        moved_piece.update_square(sq1)
+        self._pieces_by_square[sq1] = moved_piece
+        self._pieces_by_square[sq2] = captured_piece
+        board.update_layout(pieces, (sq1, sq2))
+
+        return is_legal
 
     def map_all_attack_ranges(self, board, pieces):
         """ Maps all possible attack squares (valid moves) for each piece to its attack_range data member. """
@@ -262,90 +1109,217 @@ class Pieces:
 
         self._update_attack_ranges()
 
-    def _remove_captured_piece(self, pos, current_player):
-        """ Removes a captured piece from the Pieces collection.  """
+    def update_attack_ranges(self, board, pieces, squares):
+        """ Remaps the attack ranges of only those pieces affected by a change of occupancy on the given squares and
+        patches both attack maps in place. Performs a full remap instead if incremental mode is off. Returns a flat
+        list of each piece remapped followed by its old attack range, which restore_attack_ranges uses to undo it. """
+
+        changed_ranges = []
+
+        if self._incremental is not True:
+            self.map_all_attack_ranges(board, pieces)
+            return changed_ranges
+
+        # Remap each affected piece. If its attack range changed, unregister the stale range and register the new one.
+        # Ranges that come out the same are left as they were and not recorded, so the move stack holds only the ranges
+        # a move really changed.
+        for piece in self._pieces.values():
+            if any(piece.is_affected_by(sq) for sq in squares):
+                attack_range = piece.get_attack_range()
+                piece.map_attack_range(board, pieces, self.is_valid_move)
+                if piece.get_attack_range() != attack_range:
+                    changed_ranges.append(piece)
+                    changed_ranges.append(attack_range)
+                    self._unregister_attack_range(piece, attack_range)
+                    self._register_attack_range(piece)
+
+        if self._debug is True:
+            self._verify_attack_maps(board, pieces)
+
+        return changed_ranges
+
+    def restore_attack_ranges(self, board, pieces, changed_ranges):
+        """ Puts back the old attack ranges from a flat list of pieces each followed by its old attack range, most
+        recent change last, and patches both attack maps to match. Performs a full remap instead if incremental mode is
+        off. """
+
+        if self._incremental is not True:
+            self.map_all_attack_ranges(board, pieces)
+            return
+
+        for index in range(len(changed_ranges) - 2, -1, -2):
+            piece = changed_ranges[index]
+            self._unregister_attack_range(piece)
+            piece.set_attack_range(changed_ranges[index + 1])
+            self._register_attack_range(piece)
+
+        if self._debug is True:
+            self._verify_attack_maps(board, pieces)
+
+    def _remove_captured_piece(self, sq, current_player):
+        """ Removes a captured piece from the Pieces collection. Returns the removed piece, or None if there was no
+        enemy piece on sq, along with a list holding it and its old attack range if one was removed. """
 
         # If an enemy piece was on the destination square, delete it from the collection.
-        # Store the removed piece for one move length in case the move needs to be undone.
-        piece_at_dest = self.get_piece_by_pos(pos)
+        piece_at_dest = self._pieces_by_square[sq]
         if piece_at_dest is not None and piece_at_dest.get_color() != current_player:
-            self._captured_piece = self._pieces[piece_at_dest.get_label()]
             del self._pieces[piece_at_dest.get_label()]
-            return
+            self._pieces_by_square[sq] = None
+
+            # A captured piece no longer attacks anything. Its old range is put back if the capture is undone.
+            changed_ranges = [piece_at_dest, piece_at_dest.get_attack_range()]
+            self._unregister_attack_range(piece_at_dest)
+            piece_at_dest.clear_attack_range()
+            return piece_at_dest, changed_ranges
+
+        return None, []
+
+    def _restore_captured_piece(self, captured_piece):
+        """ Puts a piece removed by _remove_captured_piece back on its square, if it is not None. Its attack range is
+        restored separately. Used only for undoing moves, which must be undone in the reverse order they were made. """
+
+        if captured_piece is not None:
+            self._pieces[captured_piece.get_label()] = captured_piece
+            self._pieces_by_square[captured_piece.get_square()] = captured_piece
+
+    def _is_attacked(self, general_sq, enemy, board):
+        """ Returns True if a piece of the enemy color attacks the General on general_sq. Only the pieces that can
+        ever reach an enemy General are looked for: Chariots and Cannons along the General's row and column, the enemy
+        General facing it along an open column, and Horses and Soldiers on the few points they could attack it from. """
+
+        # The first piece along each line from the General, or the piece past the first screen for a Cannon.
+        if board.get_chariot_attacks(general_sq) & board.get_bitboard('C' + enemy):
+            return True
+
+        if board.get_cannon_attacks(general_sq) & board.get_bitboard('N' + enemy):
+            return True
+
+        if board.get_column_attacks(general_sq) & board.get_bitboard('G' + enemy):
+            return True
 
-        self._captured_piece = None
+        # A Horse gives check only if its leg, the point next to the Horse on the way to the General, is empty.
+        horses = board.get_bitboard('H' + enemy)
+        if horses:
+            for horse_sq, leg in Horse._CHECKS[general_sq].items():
+                if horses & _BITS[horse_sq] and self._pieces_by_square[leg] is None:
+                    return True
 
-    def _restore_captured_piece(self):
-        """ Restores a piece that was captured last move, if any. Used only for undoing the last move. """
+        soldiers = board.get_bitboard('S' + enemy)
+        if soldiers:
+            for soldier_sq in Soldier._CHECKS[enemy][general_sq]:
+                if soldiers & _BITS[soldier_sq]:
+                    return True
 
-        if self._captured_piece is not None:
-            self._pieces[self._captured_piece.get_label()] = self._captured_piece
-            self._captured_piece = None
+        return False
 
     def _update_attack_ranges(self):
         """ Updates the attack ranges for each player by iterating over each Piece in the collection and
          mapping its valid moves to the appropriate dictionary. """
 
-        red_attack_map = {}
-        black_attack_map = {}
+        self._red_attack_map = {}
+        self._black_attack_map = {}
 
         for piece in self._pieces.values():
-            attack_range = piece.get_attack_range()
-
-            if len(attack_range) > 0:
-                for attacked_sq in attack_range:
-                    if piece.get_color() == 'R' and attacked_sq not in red_attack_map:
-                        red_attack_map[attacked_sq] = [piece.get_label()]
-                    elif piece.get_color() == 'R' and attacked_sq in red_attack_map:
-                        red_attack_map[attacked_sq].append(piece.get_label())
-                    elif piece.get_color() == 'B' and attacked_sq not in black_attack_map:
-                        black_attack_map[attacked_sq] = [piece.get_label()]
-                    elif piece.get_color() == 'B' and attacked_sq in black_attack_map:
-                        black_attack_map[attacked_sq].append(piece.get_label())
-
-        self._red_attack_map = red_attack_map
-        self._black_attack_map = black_attack_map
+            self._register_attack_range(piece)
+
+    def _register_attack_range(self, piece):
+        """ Adds a piece's label to its color's attack map for every position in its attack range. The labels for each
+        position are kept in a tuple, which is replaced rather than grown, so no list space is left over-allocated. """
+
+        attack_map = self.get_attack_map(piece.get_color())
+        label = (piece.get_label(),)
+
+        for attacked_sq in piece.get_attack_range():
+            attack_map[attacked_sq] = attack_map.get(attacked_sq, ()) + label
+
+    def _unregister_attack_range(self, piece, attack_range=None):
+        """ Removes a piece's label from its color's attack map for every position in its attack range, or in the
+        given attack range if it is not None. """
+
+        attack_map = self.get_attack_map(piece.get_color())
+        label = piece.get_label()
+
+        for attacked_sq in piece.get_attack_range() if attack_range is None else attack_range:
+            labels = attack_map[attacked_sq]
+            if len(labels) == 1:
+                del attack_map[attacked_sq]
+            else:
+                index = labels.index(label)
+                attack_map[attacked_sq] = labels[:index] + labels[index + 1:]
+
+    def _verify_attack_maps(self, board, pieces):
+        """ Debug helper that rebuilds both attack maps from scratch and raises a RuntimeError if the incrementally
+        patched maps differ from the rebuilt ones. """
+
+        def _normalize(attack_map):
+            """ Returns an attack map with sorted labels so maps built in a different order compare equal. """
+
+            return {sq: sorted(labels) for sq, labels in attack_map.items()}
+
+        patched = (_normalize(self._red_attack_map), _normalize(self._black_attack_map))
+        self.map_all_attack_ranges(board, pieces)
+        rebuilt = (_normalize(self._red_attack_map), _normalize(self._black_attack_map))
+
+        if patched != rebuilt:
+            raise RuntimeError("Incrementally updated attack maps do not match a full rebuild.")
 
     def _initialize_pieces(self, board):
         """ Static helper method that initializes a set of Piece objects using the starting board layout. """
 
         pieces = {}
-        layout = board.get_layout()
 
         # Determine which piece to create from its board label, initialize it, and store it to the Pieces collection.
-        for i, row in enumerate(layout):
-            for j, square in enumerate(row):
-                if square[0] == 'C':
-                    pieces[square] = Chariot(square, board.get_pos_from_coordinates(i, j), board)
-                elif square[0] == 'N':
-                    pieces[square] = Cannon(square, board.get_pos_from_coordinates(i, j), board)
-                elif square[0] == 'H':
-                    pieces[square] = Horse(square, board.get_pos_from_coordinates(i, j))
-                elif square[0] == 'E':
-                    pieces[square] = Elephant(square, board.get_pos_from_coordinates(i, j))
-                elif square[0] == 'A':
-                    pieces[square] = Advisor(square, board.get_pos_from_coordinates(i, j))
-                elif square[0] == 'G':
-                    pieces[square] = General(square, board.get_pos_from_coordinates(i, j))
-                elif square[0] == 'S':
-                    pieces[square] = Soldier(square, board.get_pos_from_coordinates(i, j))
+        for sq, label in enumerate(board.get_squares()):
+            if label[0] == 'C':
+                pieces[label] = Chariot(label, sq)
+            elif label[0] == 'N':
+                pieces[label] = Cannon(label, sq)
+            elif label[0] == 'H':
+                pieces[label] = Horse(label, sq)
+            elif label[0] == 'E':
+                pieces[label] = Elephant(label, sq)
+            elif label[0] == 'A':
+                pieces[label] = Advisor(label, sq)
+            elif label[0] == 'G':
+                pieces[label] = General(label, sq)
+            elif label[0] == 'S':
+                pieces[label] = Soldier(label, sq)
 
         self._pieces = pieces
+        for piece in pieces.values():
+            self._pieces_by_square[piece.get_square()] = piece
 
 
 class Piece:
     """ A class that defines a Piece in a Xiangqi Game. All piece types are subclassed from Piece. """
 
-    def __init__(self, label, pos):
-        """ Initializes a Piece with a label, type, color, count, current position, and attack range. """
+    # Pieces are created by the thousand when many games are kept in memory, so they have no instance dictionary, and
+    # everything that is the same for all pieces of a type (such as the move tables) lives on the class.
+    __slots__ = ('_label', '_type', '_color', '_square', '_moves', '_attack_range')
+
+    def __init__(self, label, sq):
+        """ Initializes a Piece with a label, type, color, current square, and attack range. """
 
         self._label = label
         self._type = label[0]
         self._color = label[1]
-        self._count = label[2]
-        self._current_pos = pos
-        self._range = []
-        self._attack_range = []
+        self._square = sq
+        self._moves = None
+        self._attack_range = ()
+
+    def copy(self):
+        """ Returns a copy of this piece on the same square. Its move table and attack range are shared, since neither
+        is ever changed in place. """
+
+        piece = object.__new__(type(self))
+        piece._label = self._label
+        piece._type = self._type
+        piece._color = self._color
+        piece._square = self._square
+        piece._moves = self._moves
+        piece._attack_range = self._attack_range
+
+        return piece
 
     def get_type(self):
         """ Gets the type of piece this is as a single upper-case character. """
@@ -365,73 +1339,132 @@ class Piece:
     def get_current_pos(self):
         """ Returns the current cardinal position for this piece. """
 
-        return self._current_pos
+        return _POSITIONS[self._square]
+
+    def get_square(self):
+        """ Returns the current square (0 - 89) for this piece. """
+
+        return self._square
 
     def get_attack_range(self):
-        """ Returns a list of positions that this piece can legally move to. """
+        """ Returns a tuple of squares that this piece can legally move to. """
 
         return self._attack_range
 
+    def update_square(self, sq):
+        """ Updates the current square of the piece. """
+
+        self._square = sq
+
     def update_pos(self, pos):
-        """ Updates the current position of the piece. """
+        """ Updates the current position of the piece from a cardinal position. """
 
-        self._current_pos = pos
+        self._square = _SQUARES[pos]
 
-    def map_attack_range(self, board, pieces, is_valid_move):
-        """ Determines all attacking points (valid moves) for a piece.  """
+    def set_attack_range(self, attack_range):
+        """ Replaces the attack range of this piece, e.g. with one it had before a move that is being undone. """
 
-        self._map_attack_range_from_offsets(board, pieces, is_valid_move)
+        self._attack_range = attack_range
 
-    def _map_attack_range_from_offsets(self, board, pieces, is_valid_move, offsets=None):
-        """ Determines all attacking points (valid moves) for this piece by mapping from a list of offsets. """
+    def clear_attack_range(self):
+        """ Empties the attack range of this piece, e.g. when it has been captured. """
 
-        # Container for all possible attack ranges.
-        attack_range = []
+        self._attack_range = ()
 
-        # Attack range is derived either from the piece's self._range or a passed 'offsets' list.
-        offsets = self._range if offsets is None else offsets
+    def is_affected_by(self, sq):
+        """ Returns True if a change of occupancy at sq could change this piece's attack range. Fixed-pattern pieces
+        only look as far as two points away for their destinations, horse legs, and elephant eyes. """
 
-        # Get the current position for this piece to use in testing its offsets.
-        current_pos = self.get_current_pos()
+        row, col = divmod(self._square, BOARD_WIDTH)
+        sq_row, sq_col = divmod(sq, BOARD_WIDTH)
 
-        # Test each point in this piece's range. If this piece can legally move there, add point to its attack range.
-        for offset in offsets:
-            offset_col = chr(ord(current_pos[0]) + offset[0])
-            offset_row = str(int(current_pos[1:]) + offset[1])
-            dest_pos = offset_col + offset_row
+        return abs(row - sq_row) <= 2 and abs(col - sq_col) <= 2
 
-            if is_valid_move(current_pos, dest_pos, board, pieces, self.get_color()):
-                attack_range.append(dest_pos)
+    def is_valid_move(self, sq1, sq2, board, pieces, current_player):
+        """ Determines whether or not the current move is legal for a fixed-pattern piece by looking it up in the
+        piece's move table, which already accounts for the board edges, the palace, and the river. """
 
-        # Set resulting attack range for this piece.
-        self._attack_range = attack_range
+        # If sq2 cannot be reached from sq1 by this type of piece, the move is invalid.
+        moves = self._moves[sq1]
+        if sq2 not in moves:
+            # print("ERROR: Piece cannot move that way.")
+            return False
+
+        # If there is a piece on the horse leg or elephant eye between sq1 and sq2, the move cannot be made.
+        if moves[sq2] is not None and pieces.get_piece_by_square(moves[sq2]) is not None:
+            # print("ERROR: Cannot leap over a blocking piece.")
+            return False
+
+        return True
+
+    def map_attack_range(self, board, pieces, is_valid_move):
+        """ Determines all attacking points (valid moves) for a piece and stores them as its attack range. The range is
+        stored as a tuple, which takes less memory than the list it was built in, and is shared by every move that
+        records it for undoing. """
+
+        self._attack_range = tuple(self.find_attack_range(board, pieces, is_valid_move))
+
+    def find_attack_range(self, board, pieces, is_valid_move):
+        """ Returns all attacking points (valid moves) for a fixed-pattern piece without storing them, by walking its
+        move table. Each destination only needs its blocking point and its own occupant checked. """
+
+        pieces_by_square = pieces.get_pieces_by_square()
+        attack_range = []
+
+        for dest, block in self._moves[self._square].items():
+            if block is not None and pieces_by_square[block] is not None:
+                continue
+
+            piece_at_dest = pieces_by_square[dest]
+            if piece_at_dest is None or piece_at_dest.get_color() != self._color:
+                attack_range.append(dest)
+
+        return attack_range
 
 
 class General(Piece):
     """ A subclass that defines a General Piece. """
 
-    def __init__(self, label, pos):
+    __slots__ = ()
+
+    # Moves exactly one point orthogonally without leaving its own palace.
+    _MOVES = {
+        'R': _build_move_table(
+            [((-1, 0), None), ((0, -1), None), ((0, 1), None), ((1, 0), None)],
+            lambda sq, dest: dest in _PALACE_SQUARES['R']
+        ),
+        'B': _build_move_table(
+            [((-1, 0), None), ((0, -1), None), ((0, 1), None), ((1, 0), None)],
+            lambda sq, dest: dest in _PALACE_SQUARES['B']
+        )
+    }
+
+    def __init__(self, label, sq):
         """ Initializes a General piece with its own movement, capture, and validation style. """
 
-        super().__init__(label, pos)
+        super().__init__(label, sq)
 
-        # Establish a collection of offsets as a range of motion for the General for validating moves.
-        self._range = [(-1, 0), (0, -1), (0, 1), (1, 0)]
+        # The General's range of motion is looked up in the shared move table for its color.
+        self._moves = self._MOVES[self._color]
 
-    def is_valid_move(self, pos1, pos2, board, pieces, current_player):
-        """ Determines whether or not the current move is legal for a General. """
+    def is_affected_by(self, sq):
+        """ Overrides Piece's is_affected_by. A General's moves depend on whether it can see the enemy General along
+        a whole column, so it is always remapped. """
 
-        # If the move is not inside this player's palace, then return False.
-        if board.is_in_palace(pos2, current_player) is not True:
-            # print("ERROR: Move is outside of the palace.")
-            return False
+        return True
+
+    def find_attack_range(self, board, pieces, is_valid_move):
+        """ Overrides Piece's find_attack_range, since each destination must also be checked against the enemy
+        General. The General never has more than four destinations to validate. """
+
+        return [sq for sq in self._moves[self._square] if is_valid_move(self._square, sq, board, pieces, self._color)]
 
-        # If the move is farther than one point orthogonally, return False.
-        if not (
-                abs(ord(pos1[0]) - ord(pos2[0])) == 0 and abs(int(pos1[1:]) - int(pos2[1:])) == 1 or
-                abs(ord(pos1[0]) - ord(pos2[0])) == 1 and abs(int(pos1[1:]) - int(pos2[1:])) == 0
-        ):
-            # print("ERROR: Generals can only move 1 point orthogonally.")
+    def is_valid_move(self, sq1, sq2, board, pieces, current_player):
+        """ Determines whether or not the current move is legal for a General. """
+
+        # If the move is not one point orthogonally inside this player's palace, then return False.
+        if sq2 not in self._moves[sq1]:
+            # print("ERROR: Generals can only move 1 point orthogonally inside the palace.")
             return False
 
         # Locate the enemy general if it exists. If 'None', then the move is valid.
@@ -441,20 +1474,13 @@ class General(Piece):
             return True
 
         # If the generals will be in the same column by this move, we need to check if they "see" each other.
-        enemy_pos = enemy_general.get_current_pos()
-        if enemy_pos[0] == pos2[0]:
-
-            # Get the column where the two generals are located and fill in the move this general will make with a 'G'.
-            column = board.get_column(pos2[0])
-            column[int(pos2[1:]) - 1] = self.get_type()
-
-            # Slice the column to focus on the position of these two generals and what is between them.
-            column_lo = min(int(pos2[1:]) - 1, int(enemy_pos[1:]) - 1)
-            column_hi = max(int(pos2[1:]), int(enemy_pos[1:]))
-            column = [point for point in column[column_lo:column_hi] if point != '---']
+        # They do if the enemy general is the closest piece up the column once this general has moved from sq1 to sq2.
+        enemy_sq = enemy_general.get_square()
+        if enemy_sq % BOARD_WIDTH == sq2 % BOARD_WIDTH:
+            occupied_columns = board.get_occupied_columns() & ~_COLUMN_BITS[sq1] | _COLUMN_BITS[sq2]
 
             # If it's only empty space, then this move is invalid.
-            if all(point[0] == self.get_type() for point in column):
+            if board.get_column_attacks(sq2, occupied_columns) & _BITS[enemy_sq]:
                 # print("ERROR: Generals cannot see each other.")
                 return False
 
@@ -464,313 +1490,242 @@ class General(Piece):
 class Advisor(Piece):
     """ A subclass that defines a Advisor Piece. """
 
-    def __init__(self, label, pos):
+    __slots__ = ()
+
+    # Moves exactly one point diagonally without leaving its own palace.
+    _MOVES = {
+        'R': _build_move_table(
+            [((-1, -1), None), ((-1, 1), None), ((1, -1), None), ((1, 1), None)],
+            lambda sq, dest: dest in _PALACE_SQUARES['R']
+        ),
+        'B': _build_move_table(
+            [((-1, -1), None), ((-1, 1), None), ((1, -1), None), ((1, 1), None)],
+            lambda sq, dest: dest in _PALACE_SQUARES['B']
+        )
+    }
+
+    def __init__(self, label, sq):
         """ Initializes an Advisor piece with its own movement, capture, and validation style. """
 
-        super().__init__(label, pos)
+        super().__init__(label, sq)
 
-        # Establish a collection of offsets as a range of motion for the Advisor for validating moves.
-        self._range = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-
-    @staticmethod
-    def is_valid_move(pos1, pos2, board, pieces, current_player):
-        """ Determines whether or not the current move is legal for the Advisor. """
-
-        # If the move is not inside this player's palace, then it is invalid.
-        if board.is_in_palace(pos2, current_player) is not True:
-            # print("ERROR: Move is outside of the palace.")
-            return False
-
-        # If the move is not exactly one point away diagonally, return False.
-        if abs(ord(pos1[0]) - ord(pos2[0])) is not 1 or abs(int(pos1[1:]) - int(pos2[1:])) is not 1:
-            # print("ERROR: Advisors can only move 1 point diagonally.")
-            return False
-
-        return True
+        # The Advisor's range of motion is looked up in the shared move table for its color.
+        self._moves = self._MOVES[self._color]
 
 
 class Elephant(Piece):
     """ A subclass that defines a Elephant Piece. """
 
-    def __init__(self, label, pos):
+    __slots__ = ()
+
+    # Moves exactly two points diagonally without crossing the river, and is blocked by a piece on its "eye", the
+    # point halfway along the diagonal.
+    _MOVES = {
+        'R': _build_move_table(
+            [((-2, -2), (-1, -1)), ((-2, 2), (-1, 1)), ((2, -2), (1, -1)), ((2, 2), (1, 1))],
+            lambda sq, dest: dest < _RIVER
+        ),
+        'B': _build_move_table(
+            [((-2, -2), (-1, -1)), ((-2, 2), (-1, 1)), ((2, -2), (1, -1)), ((2, 2), (1, 1))],
+            lambda sq, dest: dest >= _RIVER
+        )
+    }
+
+    def __init__(self, label, sq):
         """ Initializes an Elephant piece with its own movement, capture, and validation style. """
 
-        super().__init__(label, pos)
-
-        # Establish a collection of offsets as a range of motion for the Elephant for validating moves.
-        self._range = [(-2, -2), (-2, 2), (2, -2), (2, 2)]
-
-    @staticmethod
-    def is_valid_move(pos1, pos2, board, pieces, current_player):
-        """ Determines whether or not the current move is legal for the Elephant. """
-
-        # If the move is not inside this player's river, then return False.
-        if board.is_behind_river(pos2, current_player) is not True:
-            # print("ERROR: Move is outside of the palace.")
-            return False
+        super().__init__(label, sq)
 
-        # If pos2 is not exactly two diagonal points away from pos1, then the move is not valid.
-        if abs(ord(pos1[0]) - ord(pos2[0])) is not 2 or abs(int(pos1[1:]) - int(pos2[1:])) is not 2:
-            # print("ERROR: Piece must move exactly two diagonal points.")
-            return False
-
-        # If there is a piece blocking the diagonal between pos1 and pos2, then this move cannot be made.
-        middle_pos = chr(ord(max(pos1[0], pos2[0])) - 1) + str(max(int(pos1[1:]), int(pos2[1:])) - 1)
-        if pieces.get_piece_by_pos(middle_pos) is not None:
-            # print("ERROR: Cannot jump over a piece.")
-            return False
-
-        return True
+        # The Elephant's range of motion is looked up in the shared move table for its color.
+        self._moves = self._MOVES[self._color]
 
 
 class Horse(Piece):
     """ A subclass that defines a Horse Piece. """
 
-    def __init__(self, label, pos):
-        """ Initializes a Horse piece with its own movement, capture, and validation style. """
+    __slots__ = ()
 
-        super().__init__(label, pos)
+    # Moves one point orthogonally and then one point diagonally outward, and is blocked by a piece on its "leg", the
+    # point one step orthogonally in the direction it is moving.
+    _MOVES = _build_move_table(
+        [
+            ((2, 1), (1, 0)), ((2, -1), (1, 0)), ((1, 2), (0, 1)), ((1, -2), (0, -1)),
+            ((-1, 2), (0, 1)), ((-1, -2), (0, -1)), ((-2, 1), (-1, 0)), ((-2, -1), (-1, 0))
+        ],
+        lambda sq, dest: True
+    )
 
-        # Establish a collection of offsets as a range of motion for the Horse for validating moves.
-        self._range = [(2, 1), (2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2), (-2, 1), (-2, -1)]
+    # The squares a Horse could give check to each square from, with the leg that blocks each one.
+    _CHECKS = _invert_move_table(_MOVES)
 
-    def is_valid_move(self, pos1, pos2, board, pieces, current_player):
-        """ Determines whether or not the current move is legal for the Horse. """
+    def __init__(self, label, sq):
+        """ Initializes a Horse piece with its own movement, capture, and validation style. """
 
-        # If pos2 is not one orthogonal + one diagonal point away from pos1, then this move is invalid.
-        if (ord(pos1[0]) - ord(pos2[0]), int(pos1[1:]) - int(pos2[1:])) not in self._range:
-            # print("ERROR: Piece must move one orthogonal + one diagonal point away.")
-            return False
+        super().__init__(label, sq)
 
-        # If there's a piece one space orthogonally in the direction this piece is moving, then the move is invalid.
-        # First check if a piece is blocking on the immediate left or right.
-        if (
-                abs(ord(pos1[0]) - ord(pos2[0])) == 2 and
-                pieces.get_piece_by_pos(chr(max(ord(pos1[0]) - 1, ord(pos2[0]) - 1)) + pos1[1:]) is not None
-        ):
-            # print("ERROR: Cannot leap over a blocking piece (row).")
-            return False
-
-        # Then check if a piece is blocking above or below.
-        if (
-                abs(int(pos1[1:]) - int(pos2[1:])) == 2 and
-                pieces.get_piece_by_pos(pos1[0] + str(min(int(pos1[1:]) + 1, int(pos2[1:]) + 1))) is not None
-        ):
-            # print("ERROR: Cannot leap over a blocking piece (col).")
-            return False
-
-        return True
+        # The Horse's range of motion is looked up in the shared move table, which is the same for both colors.
+        self._moves = self._MOVES
 
 
 class Chariot(Piece):
     """ A subclass that defines a Chariot Piece. """
 
-    def __init__(self, label, pos, board):
-        """ Initializes a Chariot piece with its own movement, capture, and validation style. Positional ranges
-        for the Chariot are also calculated upon initialization. """
+    __slots__ = ()
 
-        super().__init__(label, pos)
+    def __init__(self, label, sq):
+        """ Initializes a Chariot piece with its own movement, capture, and validation style. """
 
-        self._horizontal_range = []
-        self._vertical_range = []
-        self._pos_range = []
+        super().__init__(label, sq)
 
-        # Determine all valid moves for the Chariot by analyzing its entire rank and file for the next closest piece
-        # in any orthogonal direction.
-        self._update_ranges(pos, board)
+    def find_attack_range(self, board, pieces, is_valid_move):
+        """ Overrides Piece's find_attack_range. All valid moves along the Chariot's rank and file are looked up from
+        the board's occupancy at once, less any squares held by its own color. """
 
-    def map_attack_range(self, board, pieces, is_valid_move):
-        """ Overrides Piece's map_attack_range to update all ranges before calling the mapping method. """
+        return _squares_of(self._get_attacks(self._square, board) & ~board.get_occupied(self._color))
 
-        self._update_ranges(self.get_current_pos(), board)
-        self._map_attack_range_from_offsets(board, pieces, is_valid_move)
+    def is_affected_by(self, sq):
+        """ Overrides Piece's is_affected_by. The Chariot (and Cannon) is affected by any change on its rank or
+        file. """
 
-    def is_valid_move(self, pos1, pos2, board, pieces, current_player):
+        return self._square // BOARD_WIDTH == sq // BOARD_WIDTH or self._square % BOARD_WIDTH == sq % BOARD_WIDTH
+
+    def is_valid_move(self, sq1, sq2, board, pieces, current_player):
         """ Determines whether or not the current move is legal for the Chariot. """
 
         # If the move is not within the Chariot's movement range, then the move is invalid.
-        # Validation for Chariot is already done by update_range, so simply check if pos2 is in pos_range.
-        if pos2 not in self._pos_range:
+        if not self._get_attacks(sq1, board) & _BITS[sq2]:
             # print("ERROR: That position is outside the Chariot's range.")
             return False
 
         return True
 
-    def _update_ranges(self, pos, board):
-        """ Updates the horizontal range, vertical range, and total range of the Chariot. """
-
-        def _get_offsets_from_positions(target_pos, pos_list):
-            """ Returns a list of numeric offsets from a target position from a list of positions. """
-
-            # Returns a new list of (i, j) tuple offsets from the given position.
-            return [(ord(move[0]) - ord(target_pos[0]), int(move[1:]) - int(target_pos[1:])) for move in pos_list]
-
-        # Solve & store range of Chariot to closest pieces on its rank and file.
-        row = self._filter_range_by_closest_pieces(pos, board.get_row_positions(pos[1:]), board)
-        col = self._filter_range_by_closest_pieces(pos, board.get_column_positions(pos[0]), board)
-        self._pos_range = row + col
-
-        # The chariot's valid range will be determined by all points of its current row and column.
-        self._horizontal_range = _get_offsets_from_positions(pos, row)
-        self._vertical_range = _get_offsets_from_positions(pos, col)
-
-        # Convert between set & list to clear the duplicate cross-section point.
-        self._range = list(set(self._horizontal_range + self._vertical_range))
-
-    def _filter_range_by_closest_pieces(self, pos, pos_arr, board):
-        """ Takes a row/column and returns the list reduced to the closest pieces from pos on either side, if any.  """
-
-        # Filter left and right sides of current position to the next closest piece.
-        # Make sure to flip the left side to keep the origin point the same.
-        left_of_pos = self._filter_side_of_piece(pos_arr[:pos_arr.index(pos)][::-1], board)
-        right_of_pos = self._filter_side_of_piece(pos_arr[pos_arr.index(pos) + 1:], board)
-
-        # Return concatenated list with newly filtered left and right sides.
-        return left_of_pos[::-1] + [pos] + right_of_pos
-
-    def _filter_side_of_piece(self, side_arr, board):
-        """ A helper method that returns a list of valid moves in a given orthogonal direction from the Chariot. """
-
-        # The valid filtered positions to be returned to the calling method.
-        filtered = []
-
-        # Moves are valid in this direction until a non-empty square is reached.
-        for point in side_arr:
-            label = board.get_value_at_pos(point)
-            if label is not board.empty():
-                filtered.append(point)
-                break
-            else:
-                filtered.append(point)
+    @staticmethod
+    def _get_attacks(sq, board):
+        """ Returns a bitboard of every point the Chariot could move to from sq, up to and including the closest
+        piece in each orthogonal direction. """
 
-        return filtered
+        return board.get_chariot_attacks(sq)
 
 
 class Cannon(Chariot):
     """ A subclass of a Chariot that defines a Cannon Piece. """
 
-    def __init__(self, label, pos, board):
+    __slots__ = ()
+
+    def __init__(self, label, sq):
         """ Initializes a Cannon piece with same set of properties as a Chariot, since the only difference is which
         points are considered valid movement for a Cannon vs. a Chariot. """
 
-        super().__init__(label, pos, board)
-
-    def _filter_side_of_piece(self, side_arr, board):
-        """ A helper method that returns a list of valid moves in a given orthogonal direction from the Cannon. """
+        super().__init__(label, sq)
 
-        # The valid filtered positions to be returned to the calling method.
-        filtered = []
-
-        # A boolean that returns whether or not a piece has been leaped over in the given orthogonal direction.
-        piece_leaped = False
-
-        # Examine all positions in this direction until last valid position is reached.
-        for point in side_arr:
-            label = board.get_value_at_pos(point)
-
-            # If there is a piece at this point:
-            if label is not board.empty():
-                # If the piece is the same color, add it to the 'valid' moves since the main validator will catch it.
-                # Flip the piece_leaped to True.
-                if not piece_leaped:
-                    if label[1] == self.get_color():
-                        filtered.append(point)
-                    piece_leaped = True
-
-                # If we've already leaped over a piece and this piece is an opponent piece, add it. Either way, break.
-                else:
-                    if label[1] != self.get_color():
-                        filtered.append(point)
-                        break
-                    break
-
-            # If the square is empty and we haven't leaped over a piece, add it in.
-            else:
-                if not piece_leaped:
-                    filtered.append(point)
+    @staticmethod
+    def _get_attacks(sq, board):
+        """ Overrides Chariot's _get_attacks. Returns a bitboard of every empty point before the closest piece (the
+        screen) in each orthogonal direction, and the first piece beyond each screen. """
 
-        return filtered
+        return board.get_cannon_attacks(sq)
 
 
 class Soldier(Piece):
     """ A subclass that defines a Soldier Piece. """
 
-    def __init__(self, label, pos):
-        super().__init__(label, pos)
+    __slots__ = ()
 
-        # Range offsets for behind and ahead of the river, for red and black respectively.
-        self._range_lo = {
-            'R': [(0, 1)],
-            'B': [(0, -1)]
-        }
-        self._range_hi = {
-            'R': [(0, 1), (-1, 1), (1, 1)],
-            'B': [(0, -1), (-1, -1), (1, -1)]
-        }
+    # Moves one point forward. Once it has crossed the river, it may also move one point left or right.
+    _MOVES = {
+        'R': _build_move_table(
+            [((0, 1), None), ((-1, 0), None), ((1, 0), None)],
+            lambda sq, dest: dest == sq + BOARD_WIDTH or sq >= _RIVER
+        ),
+        'B': _build_move_table(
+            [((0, -1), None), ((-1, 0), None), ((1, 0), None)],
+            lambda sq, dest: dest == sq - BOARD_WIDTH or sq < _RIVER
+        )
+    }
 
-    def map_attack_range(self, board, pieces, is_valid_move):
-        """ Overrides Piece's map_attack_range method to send the correct offsets depending on what color piece
-        it is and whether or not the Solider is past the river. """
+    # The squares a Soldier of each color could give check to each square from.
+    _CHECKS = {'R': _invert_move_table(_MOVES['R']), 'B': _invert_move_table(_MOVES['B'])}
 
-        if board.is_behind_river(self.get_current_pos(), self.get_color()) is not True:
-            return self._map_attack_range_from_offsets(board, pieces, is_valid_move, self._range_hi[self.get_color()])
+    def __init__(self, label, sq):
+        """ Initializes a Soldier piece with its own movement, capture, and validation style. """
 
-        self._map_attack_range_from_offsets(board, pieces, is_valid_move, self._range_lo[self.get_color()])
+        super().__init__(label, sq)
 
-    def is_valid_move(self, pos1, pos2, board, pieces, current_player):
-        """ Determines whether or not the current move is legal for the Soldier. """
-
-        is_behind_river = board.is_behind_river(pos2, current_player)
-
-        # If the soldier is behind the river and did not move exactly one point forward, the move is invalid.
-        if is_behind_river is True:
-            range_lo = self._range_lo[self.get_color()]
-            if pos1[0] != pos2[0] or int(pos2[1:]) - int(pos1[1:]) != range_lo[0][1]:
-                return False
-
-        # If the soldier is beyond the river and did not move one point forward, left, or right, the move is invalid.
-        if is_behind_river is False:
-            range_hi = self._range_hi[self.get_color()]
-
-            if not (
-                    abs(ord(pos1[0]) - ord(pos2[0])) == 1 and int(pos2[1:]) - int(pos1[1:]) == 0 or
-                    abs(ord(pos1[0]) - ord(pos2[0])) == 0 and int(pos2[1:]) - int(pos1[1:]) == range_hi[0][1]
-            ):
-                return False
-
-        return True
+        # The Soldier's range of motion is looked up in the shared move table for its color.
+        self._moves = self._MOVES[self._color]
 
 
 class Board:
     """ A class that initializes, updates, and displays a Xiangqi board. """
 
-    def __init__(self):
-
-        # The starting position for the board. Used to initialize Pieces in the "Pieces" class.
-        self._layout = [
-            ["CR1", "HR1", "ER1", "AR1", "GR1", "AR2", "ER2", "HR2", "CR2"],
-            ["---", "---", "---", "---", "---", "---", "---", "---", "---"],
-            ["---", "NR1", "---", "---", "---", "---", "---", "NR2", "---"],
-            ["SR1", "---", "SR2", "---", "SR3", "---", "SR4", "---", "SR5"],
-            ["---", "---", "---", "---", "---", "---", "---", "---", "---"],
-            ["---", "---", "---", "---", "---", "---", "---", "---", "---"],
-            ["SB1", "---", "SB2", "---", "SB3", "---", "SB4", "---", "SB5"],
-            ["---", "NB1", "---", "---", "---", "---", "---", "NB2", "---"],
-            ["---", "---", "---", "---", "---", "---", "---", "---", "---"],
-            ["CB1", "HB1", "EB1", "AB1", "GB1", "AB2", "EB2", "HB2", "CB2"]
-        ]
-
-        # A list of helpful attributes defining a board.
-        self._red = 'R'
-        self._black = 'B'
-        self._empty = '---'
-        self._width = 9
-        self._height = 10
-        self._columns = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i']
-        self._rows = ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10']
-        self._red_palace = ['d1', 'e1', 'f1', 'd2', 'e2', 'f2', 'd3', 'e3', 'f3']
-        self._black_palace = ['d8', 'e8', 'f8', 'd9', 'e9', 'f9', 'd10', 'e10', 'f10']
-        self._palaces = self._red_palace + self._black_palace
+    # The starting position for the board. Used to initialize Pieces in the "Pieces" class.
+    _START_LAYOUT = (
+        ("CR1", "HR1", "ER1", "AR1", "GR1", "AR2", "ER2", "HR2", "CR2"),
+        ("---", "---", "---", "---", "---", "---", "---", "---", "---"),
+        ("---", "NR1", "---", "---", "---", "---", "---", "NR2", "---"),
+        ("SR1", "---", "SR2", "---", "SR3", "---", "SR4", "---", "SR5"),
+        ("---", "---", "---", "---", "---", "---", "---", "---", "---"),
+        ("---", "---", "---", "---", "---", "---", "---", "---", "---"),
+        ("SB1", "---", "SB2", "---", "SB3", "---", "SB4", "---", "SB5"),
+        ("---", "NB1", "---", "---", "---", "---", "---", "NB2", "---"),
+        ("---", "---", "---", "---", "---", "---", "---", "---", "---"),
+        ("CB1", "HB1", "EB1", "AB1", "GB1", "AB2", "EB2", "HB2", "CB2")
+    )
+
+    # A list of helpful attributes defining a board. These are the same for every board, so they are kept once on the
+    # class, and only the layout and its bitboards are kept for each board.
+    _red = 'R'
+    _black = 'B'
+    _empty = '---'
+    _width = BOARD_WIDTH
+    _height = BOARD_HEIGHT
+    _columns = ('a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i')
+    _rows = ('1', '2', '3', '4', '5', '6', '7', '8', '9', '10')
+    _red_palace = ('d1', 'e1', 'f1', 'd2', 'e2', 'f2', 'd3', 'e3', 'f3')
+    _black_palace = ('d8', 'e8', 'f8', 'd9', 'e9', 'f9', 'd10', 'e10', 'f10')
+    _palaces = frozenset(_red_palace + _black_palace)
+
+    __slots__ = ('_squares', '_bitboards', '_occupied_by_color', '_occupied', '_occupied_columns', '_profiler')
+
+    def __init__(self, squares=None):
+        """ Initializes a board with the starting layout, or with the labels of a list indexed by square if given. """
+
+        # The layout is stored as one flat list indexed by square, so square = row * 9 + column.
+        self._squares = [label for row in self._START_LAYOUT for label in row] if squares is None else list(squares)
+
+        # Bitboards of the squares held by each kind of piece (keyed by type and color, e.g. 'CR'), by each color, and
+        # by any piece, plus a column-major copy of the last. These are kept in sync with the layout.
+        self._bitboards = {piece_type + color: 0 for piece_type in 'GAEHCNS' for color in 'RB'}
+        self._occupied_by_color = {'R': 0, 'B': 0}
+        self._occupied = 0
+        self._occupied_columns = 0
+
+        # The profiler update_layout reports to, if any. See set_profiler.
+        self._profiler = None
+
+        for sq, label in enumerate(self._squares):
+            if label != '---':
+                self._toggle_bits(sq, label)
+
+    def copy(self):
+        """ Returns a copy of this board with the same layout. """
+
+        board = object.__new__(Board)
+        board._squares = list(self._squares)
+        board._bitboards = dict(self._bitboards)
+        board._occupied_by_color = dict(self._occupied_by_color)
+        board._occupied = self._occupied
+        board._occupied_columns = self._occupied_columns
+        board._profiler = None
+
+        return board
+
+    def set_profiler(self, profiler):
+        """ Reports the calls and the time taken by update_layout to profiler, or stops reporting if it is None, by
+        switching the board to or from the timed subclass. """
+
+        self._profiler = profiler
+        self.__class__ = Board if profiler is None else _ProfiledBoard
 
     def empty(self):
         """ Returns the string value of an empty point on the board. """
@@ -788,9 +1743,14 @@ class Board:
         return self._black
 
     def get_layout(self):
-        """ Returns the current board layout as a list of lists. """
+        """ Returns a copy of the current board layout as a list of lists, one list per row. """
+
+        return [self._squares[i:i + self._width] for i in range(0, len(self._squares), self._width)]
+
+    def get_squares(self):
+        """ Returns the current board layout as a flat list of labels indexed by square. """
 
-        return self._layout
+        return self._squares
 
     def get_row(self, row, pos1='a', pos2='i'):
         """ Returns all contents of this row with optional start & end points. None if invalid. """
@@ -798,7 +1758,8 @@ class Board:
         if row not in self._rows or pos1 not in self._columns or pos2 not in self._columns:
             return None
 
-        return self._layout[int(row) - 1][ord(pos1) - ord('a'): ord(pos2) - ord('a') + 1]
+        start = (int(row) - 1) * self._width
+        return self._squares[start + ord(pos1) - ord('a'): start + ord(pos2) - ord('a') + 1]
 
     def get_row_positions(self, row, pos1='a', pos2='i'):
         """ Returns all cardinal positions for this row with optional start & end points. None if invalid. """
@@ -814,17 +1775,14 @@ class Board:
         if col not in self._columns or pos1 not in self._rows or pos2 not in self._rows:
             return None
 
-        column = []
+        # Slice the column directly out of the flat layout, stepping one row at a time.
+        row_lo = min(int(pos1), int(pos2)) - 1
+        row_hi = max(int(pos1), int(pos2)) - 1
+        column = self._squares[row_lo * self._width + self._columns.index(col):
+                               row_hi * self._width + self._columns.index(col) + 1:
+                               self._width]
 
-        pos_lo = self.get_coordinates_from_pos(col + str(min(int(pos1), int(pos2))))
-        pos_hi = self.get_coordinates_from_pos(col + str(max(int(pos1), int(pos2))))
-
-        for i in range(self._height):
-            for j in range(self._width):
-                if j == pos_lo[1] and pos_lo[0] <= i <= pos_hi[0]:
-                    column.append(self._layout[i][j])
-
-        return column.reverse() if int(pos1) > int(pos2) else column
+        return column[::-1] if int(pos1) > int(pos2) else column
 
     def get_column_positions(self, col, pos1='1', pos2='10'):
         """ Returns all cardinal positions for this row with optional start & end points. None if invalid. """
@@ -834,6 +1792,30 @@ class Board:
 
         return [col + row for row in self._rows[int(pos1) - 1: int(pos2)]]
 
+    @staticmethod
+    def get_row_squares(sq):
+        """ Returns all squares in the row of the given square, from low to high. """
+
+        return _ROW_SQUARES[sq // BOARD_WIDTH]
+
+    @staticmethod
+    def get_column_squares(sq):
+        """ Returns all squares in the column of the given square, from low to high. """
+
+        return _COLUMN_SQUARES[sq % BOARD_WIDTH]
+
+    @staticmethod
+    def get_square_from_pos(pos):
+        """ Converts a cardinal position to a square (0 - 89). Returns None if invalid. """
+
+        return _SQUARES.get(pos) if isinstance(pos, str) else None
+
+    @staticmethod
+    def get_pos_from_square(sq):
+        """ Converts a square (0 - 89) to a cardinal position. """
+
+        return _POSITIONS[sq]
+
     def get_pos_from_coordinates(self, row, col):
         """ Converts a row, col coordinates (i, j) to a position. Returns None if invalid.  """
 
@@ -845,67 +1827,139 @@ class Board:
     def get_value_at_coordinate(self, row, col):
         """ Returns the value on the board at coordinates (i, j). Returns None if invalid. """
 
-        try:
-            return self._layout[row][col] if int(row) >= 0 and int(col) >= 0 else None
-        except IndexError:
-            return None
+        if 0 <= row < self._height and 0 <= col < self._width:
+            return self._squares[row * self._width + col]
+
+        return None
 
     def get_value_at_pos(self, pos):
         """ Returns the value at a given position. None if invalid. """
 
-        coords = self.get_coordinates_from_pos(pos)
-        if coords is None:
-            return None
+        sq = self.get_square_from_pos(pos)
 
-        try:
-            return self._layout[coords[0]][coords[1]] if int(coords[0]) >= 0 and int(coords[1]) >= 0 else None
-        except IndexError:
-            return None
+        return None if sq is None else self._squares[sq]
+
+    def get_value_at_square(self, sq):
+        """ Returns the value on a given square. """
+
+        return self._squares[sq]
 
     def get_coordinates_from_pos(self, pos):
         """ Converts a position to row, col coordinates (i, j). Returns None if invalid. """
 
-        try:
-            return self._rows.index(pos[1:]), self._columns.index(pos[0])
-        except:
-            return None
+        sq = self.get_square_from_pos(pos)
+
+        return None if sq is None else divmod(sq, self._width)
 
     def is_valid_pos(self, pos):
         """ Returns True/False depending on whether or not the position is valid. """
 
-        return self.get_coordinates_from_pos(pos) is not None
+        return self.get_square_from_pos(pos) is not None
 
     def is_in_palace(self, pos, color):
         """ Returns True/False depending on whether or not the position is in its color's palace. """
 
-        if color == self._red:
-            return pos in self._red_palace
+        sq = self.get_square_from_pos(pos)
 
-        return pos in self._black_palace
+        return sq is not None and self.is_square_in_palace(sq, color)
 
     def is_behind_river(self, pos, color):
         """ Returns True/False depending on whether or not the position is behind the river on its own side. """
 
-        if color == self._red and int(pos[1:]) <= 5:
-            return True
+        sq = self.get_square_from_pos(pos)
 
-        if color == self._black and int(pos[1:]) >= 6:
-            return True
+        return sq is not None and self.is_square_behind_river(sq, color)
+
+    def is_square_in_palace(self, sq, color):
+        """ Returns True/False depending on whether or not the square is in its color's palace. """
+
+        if color == self._red:
+            return sq in _PALACE_SQUARES[self._red]
+
+        return sq in _PALACE_SQUARES[self._black]
+
+    def is_square_behind_river(self, sq, color):
+        """ Returns True/False depending on whether or not the square is behind the river on its own side. """
+
+        if color == self._red:
+            return sq < _RIVER
+
+        if color == self._black:
+            return sq >= _RIVER
 
         return False
 
-    def update_layout(self, pieces):
-        """ Updates the layout of the board from a set of Pieces. """
+    def update_layout(self, pieces, squares=None):
+        """ Updates the layout of the board from a set of Pieces. If squares is given, only those squares are updated;
+        otherwise the entire board is. """
 
-        pieces_by_pos = pieces.get_pieces_by_pos()
+        pieces_by_square = pieces.get_pieces_by_square()
 
-        for i, row in enumerate(self._layout):
-            for j, point in enumerate(row):
-                pos = self.get_pos_from_coordinates(i, j)
-                if pos in pieces_by_pos:
-                    self._layout[i][j] = pieces_by_pos[pos].get_label()
-                else:
-                    self._layout[i][j] = self._empty
+        for sq in range(len(self._squares)) if squares is None else squares:
+            piece = pieces_by_square[sq]
+            label = self._empty if piece is None else piece.get_label()
+
+            # Clear the bits of the label being replaced and set those of the new one.
+            if self._squares[sq] != label:
+                if self._squares[sq] != self._empty:
+                    self._toggle_bits(sq, self._squares[sq])
+                if label != self._empty:
+                    self._toggle_bits(sq, label)
+                self._squares[sq] = label
+
+    def get_bitboard(self, kind):
+        """ Returns the bitboard of the squares held by a kind of piece, given as its type and color (e.g. 'CR'). """
+
+        return self._bitboards[kind]
+
+    def get_occupied(self, color=None):
+        """ Returns the bitboard of the squares held by the given color, or by any piece if no color is given. """
+
+        return self._occupied if color is None else self._occupied_by_color[color]
+
+    def get_occupied_columns(self):
+        """ Returns the column-major bitboard of the squares held by any piece. """
+
+        return self._occupied_columns
+
+    def get_row_attacks(self, sq, occupied=None, table=_ROW_CHARIOT_ATTACKS):
+        """ Returns a bitboard of the points a Chariot on sq reaches along its row, or a Cannon if table is
+        _ROW_CANNON_ATTACKS. The current occupancy is used unless another is given. """
+
+        row, col = divmod(sq, BOARD_WIDTH)
+        occupied = self._occupied if occupied is None else occupied
+
+        return table[col][occupied >> (row * BOARD_WIDTH) & _ROW_MASK] << (row * BOARD_WIDTH)
+
+    def get_column_attacks(self, sq, occupied_columns=None, table=_COLUMN_CHARIOT_ATTACKS):
+        """ Returns a bitboard of the points a Chariot on sq reaches along its column, or a Cannon if table is
+        _COLUMN_CANNON_ATTACKS. The current column-major occupancy is used unless another is given. """
+
+        row, col = divmod(sq, BOARD_WIDTH)
+        occupied_columns = self._occupied_columns if occupied_columns is None else occupied_columns
+
+        return _COLUMN_SPREADS[col][table[row][occupied_columns >> (col * BOARD_HEIGHT) & _COLUMN_MASK]]
+
+    def get_chariot_attacks(self, sq):
+        """ Returns a bitboard of the points a Chariot on sq reaches along its row and column. """
+
+        return self.get_row_attacks(sq) | self.get_column_attacks(sq)
+
+    def get_cannon_attacks(self, sq):
+        """ Returns a bitboard of the points a Cannon on sq reaches along its row and column. """
+
+        return (
+            self.get_row_attacks(sq, table=_ROW_CANNON_ATTACKS) |
+            self.get_column_attacks(sq, table=_COLUMN_CANNON_ATTACKS)
+        )
+
+    def _toggle_bits(self, sq, label):
+        """ Flips the bits for a square in every bitboard that a piece with the given label belongs to. """
+
+        self._bitboards[label[:2]] ^= _BITS[sq]
+        self._occupied_by_color[label[1]] ^= _BITS[sq]
+        self._occupied ^= _BITS[sq]
+        self._occupied_columns ^= _COLUMN_BITS[sq]
 
     def print_board(self):
         """ Prints the current board layout to console. """
@@ -934,7 +1988,7 @@ class Board:
         _print_row_label()
 
         # Loop through board layout, printing pieces with appropriate color and position.
-        for i, row in enumerate(self._layout):
+        for i, row in enumerate(self.get_layout()):
             _print_col_label(i)
             for j, point in enumerate(row):
                 bracket_l = '['
@@ -957,3 +2011,47 @@ class Board:
         print()
 
 
+class _ProfiledPieces(Pieces):
+    """ A Pieces collection that times its hot paths and reports them to its profiler. Collections are switched to
+    this class by set_profiler, so that collections without a profiler run no timing code. """
+
+    __slots__ = ()
+
+    def is_valid_move(self, sq1, sq2, board, pieces, current_player):
+        """ Overrides Pieces' is_valid_move, timing it. """
+
+        start = time.perf_counter()
+        is_valid = Pieces.is_valid_move(self, sq1, sq2, board, pieces, current_player)
+        self._profiler.record('is_valid_move', time.perf_counter() - start)
+
+        return is_valid
+
+    def update_attack_ranges(self, board, pieces, squares):
+        """ Overrides Pieces' update_attack_ranges, timing it. """
+
+        start = time.perf_counter()
+        changed_ranges = Pieces.update_attack_ranges(self, board, pieces, squares)
+        self._profiler.record('update_attack_ranges', time.perf_counter() - start)
+
+        return changed_ranges
+
+    def map_all_attack_ranges(self, board, pieces):
+        """ Overrides Pieces' map_all_attack_ranges, timing it. """
+
+        start = time.perf_counter()
+        Pieces.map_all_attack_ranges(self, board, pieces)
+        self._profiler.record('map_all_attack_ranges', time.perf_counter() - start)
+
+
+class _ProfiledBoard(Board):
+    """ A Board that times update_layout and reports it to its profiler. Boards are switched to this class by
+    set_profiler, so that boards without a profiler run no timing code. """
+
+    __slots__ = ()
+
+    def update_layout(self, pieces, squares=None):
+        """ Overrides Board's update_layout, timing it. """
+
+        start = time.perf_counter()
+        Board.update_layout(self, pieces, squares)
+        self._profiler.record('update_layout', time.perf_counter() - start)
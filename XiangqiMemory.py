@@ -0,0 +1,86 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Measures how much memory a game of Xiangqi takes. Many games are created and played for a number of
+#              random plies while tracemalloc traces every allocation, and the memory still held once they are built is
+#              divided among them. The move history grows with every ply, so games are measured at several lengths.
+#              The biggest allocation sites can be listed to see where the memory goes.
+
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+
+from XiangqiGame import XiangqiGame
+
+
+# The number of games measured, and the plies played in each, when no others are given.
+DEFAULT_GAMES = 1000
+DEFAULT_PLIES = (0, 40, 100)
+
+
+def play_random_game(plies, rng, game=None):
+    """ Plays up to the given number of random legal moves in game, or in a new game if it is None, stopping early if
+    the game ends. Returns the game. """
+
+    game = XiangqiGame() if game is None else game
+
+    for _ in range(plies):
+        moves = list(game._legal_moves())
+        if len(moves) == 0 or game._make_move(*rng.choice(moves)) is not True:
+            break
+
+    return game
+
+
+def measure_game_memory(games=DEFAULT_GAMES, plies=0, seed=0, top=0):
+    """ Builds the given number of games, each played for up to plies random plies, and returns a tuple of the bytes
+    held per game and a list of the top biggest allocation sites as tracemalloc Statistic objects. The games are kept
+    alive until they are measured, and freed before returning. """
+
+    rng = random.Random(seed)
+    gc.collect()
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [play_random_game(plies, rng) for _ in range(games)]
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0] - before
+        sites = tracemalloc.take_snapshot().statistics('lineno')[:top] if top > 0 else []
+    finally:
+        tracemalloc.stop()
+
+    del kept
+
+    return held / games, sites
+
+
+def main(argv=None):
+    """ Command line entry point. Reports the memory taken per game at each number of plies. Run with -h for usage. """
+
+    parser = argparse.ArgumentParser(description="Measure the memory taken by each Xiangqi game.")
+    parser.add_argument('--games', type=int, default=DEFAULT_GAMES,
+                        help=f"games to build for each measurement (default {DEFAULT_GAMES})")
+    parser.add_argument('--plies', type=int, nargs='+', default=list(DEFAULT_PLIES),
+                        help=f"random plies to play in each game (default {' '.join(map(str, DEFAULT_PLIES))})")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random moves (default 0)")
+    parser.add_argument('--top', type=int, default=0, help="also list this many of the biggest allocation sites")
+    args = parser.parse_args(argv)
+
+    if args.games < 1 or min(args.plies) < 0 or args.top < 0:
+        parser.error("--games must be at least 1, and --plies and --top cannot be negative")
+
+    for plies in args.plies:
+        per_game, sites = measure_game_memory(args.games, plies, args.seed, args.top)
+        print(f"{plies} plies: {per_game / 1024:.1f} KiB per game ({per_game * 10000 / 2 ** 20:,.0f} MiB per 10,000 "
+              f"games)")
+
+        for site in sites:
+            print(f"    {site}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
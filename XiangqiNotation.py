@@ -0,0 +1,346 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: A streaming parser for Xiangqi game collections written in ICCS (e.g. 'h2e2') or WXF (e.g. 'C2.5')
+#              move notation. Files are read one line at a time, in a PGN-like layout of optional [Tag "value"] lines
+#              followed by move text, with games separated by blank lines. Each game is translated to the cardinal
+#              positions used by XiangqiGame.make_move, replayed to validate it, and yielded with its result or the
+#              location of its first error before the next game is read, so memory use does not grow with the file.
+
+import argparse
+import re
+import sys
+
+from XiangqiGame import BOARD_WIDTH, Board, XiangqiGame
+from XiangqiRecords import GameRecordWriter, encode_move
+
+
+# An ICCS move: the file (a-i) and rank (0-9, from Red's side) of the origin and destination, e.g. 'h2e2' or 'H2-E2'.
+_ICCS_PATTERN = re.compile(r'^([a-i])([0-9])-?([a-i])([0-9])$', re.IGNORECASE)
+
+# A WXF move: the piece, the file it stands on (1-9, from the mover's right) or '+'/'-' for the front or rear of two
+# pieces on one file, the direction ('+' forward, '-' backward, '.' or '=' sideways), and the destination rank count
+# or file. The front/rear sign may also come before the piece, e.g. '+C.5'.
+_WXF_PATTERN = re.compile(r'^(?:([+-])([A-Z])|([A-Z])([1-9+-]))([+\-.=])([1-9])$')
+
+# Move numbers ('12.', '12...'), and the result markers that end a game's move text.
+_MOVE_NUMBER_PATTERN = re.compile(r'^\d+\.+')
+_TAG_PATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]$')
+_RESULTS = {'1-0': 'RED_WON', '0-1': 'BLACK_WON', '1/2-1/2': 'DRAW', '*': 'UNFINISHED'}
+
+# The piece type for each WXF letter. Both the western and the Chinese-derived letters are read.
+_WXF_TYPES = {'K': 'G', 'G': 'G', 'A': 'A', 'B': 'E', 'E': 'E', 'N': 'H', 'H': 'H', 'R': 'C', 'C': 'N', 'P': 'S'}
+
+# How far each piece that moves diagonally goes forward or backward, by how many files it moves sideways.
+_DIAGONAL_ROWS = {'A': {1: 1}, 'E': {2: 2}, 'H': {1: 2, 2: 1}}
+
+
+class ParsedGame:
+    """ One game read from a notation file: its tags, the moves that were replayed, the result it declares, and the
+    game state reached, or the location of the first error if the game could not be replayed. """
+
+    def __init__(self, number, line, tags):
+        """ Initializes an empty parsed game, the given number in its file, starting at the given line. """
+
+        self._number = number
+        self._line = line
+        self._tags = tags
+        self._moves = []
+        self._declared_result = None
+        self._game_state = None
+        self._error = None
+
+    def get_number(self):
+        """ Returns the position of the game in its file, counting from 1. """
+
+        return self._number
+
+    def get_line(self):
+        """ Returns the line number the game starts on. """
+
+        return self._line
+
+    def get_tags(self):
+        """ Returns a dictionary of the game's tags. """
+
+        return self._tags
+
+    def get_moves(self):
+        """ Returns the moves replayed, as (pos1, pos2) tuples ready for XiangqiGame.make_move. If the game has an
+        error, these are the moves before it. """
+
+        return self._moves
+
+    def get_declared_result(self):
+        """ Returns the result written at the end of the game ('RED_WON', 'BLACK_WON', 'DRAW', or 'UNFINISHED'), or
+        None if none was written. """
+
+        return self._declared_result
+
+    def get_game_state(self):
+        """ Returns the game state of XiangqiGame reached by replaying the moves. """
+
+        return self._game_state
+
+    def get_error(self):
+        """ Returns None if the game replayed without error. Otherwise, returns a tuple of the line number, the ply
+        (counting from 1), the move as written, and a message describing the error. """
+
+        return self._error
+
+    def is_valid(self):
+        """ Returns True if every move in the game could be read and played. """
+
+        return self._error is None
+
+
+def iccs_to_move(token):
+    """ Translates an ICCS move, such as 'h2e2', to a (pos1, pos2) tuple such as ('h3', 'e3'). Raises a ValueError if
+    the move is not ICCS. """
+
+    match = _ICCS_PATTERN.match(token)
+    if match is None:
+        raise ValueError(f"Not an ICCS move: {token}")
+
+    file1, rank1, file2, rank2 = match.groups()
+
+    return file1.lower() + str(int(rank1) + 1), file2.lower() + str(int(rank2) + 1)
+
+
+def wxf_to_move(game, token):
+    """ Translates a WXF move, such as 'C2.5', to a (pos1, pos2) tuple for the player to move in game, which is not
+    changed. Raises a ValueError if the move is not WXF or does not describe exactly one legal move. """
+
+    match = _WXF_PATTERN.match(token.upper())
+    if match is None:
+        raise ValueError(f"Not a WXF move: {token}")
+
+    tandem_sign, tandem_letter, letter, file_or_sign, direction, number = match.groups()
+    letter = letter or tandem_letter
+    if letter not in _WXF_TYPES:
+        raise ValueError(f"Unknown piece in WXF move: {token}")
+
+    piece_type = _WXF_TYPES[letter]
+    color = game._current_player
+    forward = 1 if color == game._players[0] else -1
+    number = int(number)
+
+    # Files are counted from the right of the player making the move.
+    def _column(file_number):
+        """ Returns the column of a WXF file number for the player to move. """
+
+        return BOARD_WIDTH - file_number if color == game._players[0] else file_number - 1
+
+    pieces = [piece for piece in game._pieces.get_all_pieces().values()
+              if piece.get_type() == piece_type and piece.get_color() == color]
+
+    # Find the pieces the move could be for: those on the given file, or the front or rear piece of two on one file.
+    sign = tandem_sign or (file_or_sign if file_or_sign in '+-' else None)
+    if sign is None:
+        candidates = [piece for piece in pieces if piece.get_square() % BOARD_WIDTH == _column(int(file_or_sign))]
+    else:
+        columns = {}
+        for piece in pieces:
+            columns.setdefault(piece.get_square() % BOARD_WIDTH, []).append(piece)
+        stacked = [column for column in columns.values() if len(column) >= 2]
+        if len(stacked) != 1:
+            raise ValueError(f"WXF move does not name one file with two pieces: {token}")
+        ordered = sorted(stacked[0], key=lambda piece: piece.get_square() // BOARD_WIDTH * forward, reverse=True)
+        candidates = [ordered[0] if sign == '+' else ordered[-1]]
+
+    moves = []
+
+    for piece in candidates:
+        row, col = divmod(piece.get_square(), BOARD_WIDTH)
+
+        if direction in '.=':
+            dest_row, dest_col = row, _column(number)
+        elif piece_type in _DIAGONAL_ROWS:
+            dest_col = _column(number)
+            steps = _DIAGONAL_ROWS[piece_type].get(abs(dest_col - col))
+            if steps is None:
+                continue
+            dest_row = row + steps * forward * (1 if direction == '+' else -1)
+        else:
+            dest_row, dest_col = row + number * forward * (1 if direction == '+' else -1), col
+
+        if not (0 <= dest_row < 10 and 0 <= dest_col < BOARD_WIDTH):
+            continue
+
+        pos1 = game._board.get_pos_from_square(piece.get_square())
+        pos2 = game._board.get_pos_from_square(dest_row * BOARD_WIDTH + dest_col)
+        if game.make_move(pos1, pos2, True) is True:
+            moves.append((pos1, pos2))
+
+    if len(moves) != 1:
+        raise ValueError(f"WXF move is {'ambiguous' if len(moves) > 1 else 'not legal'}: {token}")
+
+    return moves[0]
+
+
+def parse_move(game, token):
+    """ Translates a move in either ICCS or WXF notation to a (pos1, pos2) tuple for the player to move in game.
+    Raises a ValueError if it is neither. """
+
+    if _ICCS_PATTERN.match(token) is not None:
+        return iccs_to_move(token)
+
+    return wxf_to_move(game, token)
+
+
+def _tokens(line):
+    """ Helper generator that yields the move and result tokens of a line of move text, leaving out move numbers,
+    annotations such as '!' or '?!', and comments in braces or after a semicolon. """
+
+    line = re.sub(r'\{[^}]*\}', ' ', line.split(';', 1)[0])
+
+    for token in line.split():
+        token = _MOVE_NUMBER_PATTERN.sub('', token)
+        if token not in _RESULTS:
+            token = token.rstrip('!?')
+        if token != '':
+            yield token
+
+
+def _replay(parsed, game, token, line_number):
+    """ Helper function that plays one token of move text in game, recording it in parsed. Returns False if the token
+    was an error, which is recorded in parsed. """
+
+    if token in _RESULTS:
+        parsed._declared_result = _RESULTS[token]
+        return True
+
+    ply = len(parsed._moves) + 1
+
+    try:
+        pos1, pos2 = parse_move(game, token)
+    except ValueError as error:
+        parsed._error = (line_number, ply, token, str(error))
+        return False
+
+    if game.make_move(pos1, pos2) is not True:
+        parsed._error = (line_number, ply, token, f"Illegal move: {token}")
+        return False
+
+    parsed._moves.append((pos1, pos2))
+    return True
+
+
+def parse_games(lines):
+    """ Generates a ParsedGame for each game in an iterable of lines, such as an open file, reading only as far as the
+    end of each game before yielding it. A game is any [Tag "value"] lines followed by move text, and ends at a blank
+    line or at a tag line after its move text. A [FEN "..."] tag sets the starting position. """
+
+    number = 0
+    parsed = None
+    game = None
+    in_moves = False
+    failed = False
+
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+
+        # A blank line ends a game that has move text; a tag line after move text starts a new game.
+        tag = _TAG_PATTERN.match(line)
+        if parsed is not None and in_moves and (line == '' or tag is not None):
+            yield _finish(parsed, game)
+            parsed = None
+
+        if line == '':
+            continue
+
+        if parsed is None:
+            number += 1
+            parsed = ParsedGame(number, line_number, {})
+            game = None
+            in_moves = False
+            failed = False
+
+        if tag is not None and not in_moves:
+            parsed._tags[tag.group(1)] = tag.group(2)
+            continue
+
+        if game is None:
+            in_moves = True
+            try:
+                game = XiangqiGame(fen=parsed._tags.get('FEN'))
+            except ValueError as error:
+                parsed._error = (parsed._line, 0, parsed._tags.get('FEN'), str(error))
+                failed = True
+
+        # Once a game has an error, the rest of its move text is skipped.
+        for token in _tokens(line):
+            if failed is True:
+                break
+            failed = not _replay(parsed, game, token, line_number)
+
+    if parsed is not None:
+        yield _finish(parsed, game)
+
+
+def _finish(parsed, game):
+    """ Helper function that records the game state reached in a parsed game and returns it. """
+
+    parsed._game_state = None if game is None else game.get_game_state()
+
+    return parsed
+
+
+def parse_file(path, encoding='utf-8'):
+    """ Generates a ParsedGame for each game in a notation file, reading it one line at a time. See parse_games. """
+
+    with open(path, encoding=encoding) as file:
+        yield from parse_games(file)
+
+
+def main(argv=None):
+    """ Command line entry point. Validates a notation file and reports each game with an error. Run with -h for
+    usage. """
+
+    parser = argparse.ArgumentParser(description="Validate a file of Xiangqi games in ICCS or WXF notation.")
+    parser.add_argument('path', help="file of games")
+    parser.add_argument('--binary', default=None, metavar='OUTPUT',
+                        help="also write the valid games to a binary game record file")
+    args = parser.parse_args(argv)
+
+    games = 0
+    errors = 0
+    moves = 0
+    writer = None
+
+    if args.binary is not None:
+        writer = GameRecordWriter(args.binary)
+
+    try:
+        for parsed in parse_file(args.path):
+            games += 1
+            moves += len(parsed.get_moves())
+
+            if parsed.is_valid() is not True:
+                errors += 1
+                line, ply, token, message = parsed.get_error()
+                print(f"game {parsed.get_number()} (line {parsed.get_line()}): line {line}, ply {ply}: {message}")
+                continue
+
+            if writer is not None:
+                game_state = parsed.get_game_state()
+                result = parsed.get_declared_result() if game_state == 'UNFINISHED' else game_state
+                codes = [encode_move(Board.get_square_from_pos(pos1), Board.get_square_from_pos(pos2))
+                         for pos1, pos2 in parsed.get_moves()]
+                try:
+                    writer.write_game(codes, result or 'UNFINISHED', parsed.get_tags().get('FEN'),
+                                      parsed.get_tags() or None)
+                except ValueError as error:
+                    errors += 1
+                    print(f"game {parsed.get_number()} (line {parsed.get_line()}): not written: {error}")
+    except OSError as error:
+        parser.error(str(error))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print(f"{games} games, {moves} moves, {errors} with errors")
+    return 0 if errors == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
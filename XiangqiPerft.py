@@ -0,0 +1,134 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Perft (performance test) for the Xiangqi move generator. Counts the leaf nodes of the tree of legal
+#              moves to a given depth, optionally divided by first move, and reports nodes per second. Published node
+#              counts for the starting position are used to catch move generation bugs.
+
+import argparse
+import sys
+import time
+
+from XiangqiGame import XiangqiGame, game_from_moves
+
+
+# Published perft node counts from the starting position, by depth.
+REFERENCE_COUNTS = {
+    1: 44,
+    2: 1920,
+    3: 79666,
+    4: 3290240,
+    5: 133312995,
+}
+
+
+def perft(game, depth):
+    """ Returns the number of leaf nodes in the tree of legal moves from the current position of game to the given
+    depth. The game is left in the position it started in. """
+
+    if depth == 0:
+        return 1
+
+    # At the last level, the legal moves only need to be counted, not made.
+    if depth == 1:
+        return sum(1 for _ in game._legal_moves())
+
+    nodes = 0
+
+    for sq1, sq2 in list(game._legal_moves()):
+        game._apply_move(sq1, sq2)
+        game._switch_player()
+        nodes += perft(game, depth - 1)
+        game._switch_player()
+        game._undo_move()
+
+    return nodes
+
+
+def divide(game, depth):
+    """ Returns a dictionary mapping each legal first move, as a (pos1, pos2) tuple, to the number of leaf nodes
+    below it at the given depth. The values add up to perft(game, depth). """
+
+    counts = {}
+
+    for sq1, sq2 in list(game._legal_moves()):
+        game._apply_move(sq1, sq2)
+        game._switch_player()
+        counts[(game._board.get_pos_from_square(sq1), game._board.get_pos_from_square(sq2))] = perft(game, depth - 1)
+        game._switch_player()
+        game._undo_move()
+
+    return counts
+
+
+def run_perft(game, depth, show_divide=False):
+    """ Runs perft on game to the given depth, printing the divide counts if requested, followed by the total number
+    of nodes, the time taken, and nodes per second. Returns the total number of nodes. """
+
+    start = time.perf_counter()
+
+    if show_divide is True:
+        counts = divide(game, depth)
+        for (pos1, pos2), count in sorted(counts.items()):
+            print(f"{pos1}{pos2}: {count}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(game, depth)
+
+    elapsed = time.perf_counter() - start
+    nps = nodes / elapsed if elapsed > 0 else 0.0
+    print(f"depth {depth}: {nodes} nodes in {elapsed:.3f}s ({nps:,.0f} nodes/s)")
+
+    return nodes
+
+
+def verify(max_depth=3):
+    """ Checks perft from the starting position against the published counts up to max_depth. Prints the result for
+    each depth and returns True if every count matched. """
+
+    passed = True
+
+    for depth in range(1, max_depth + 1):
+        nodes = run_perft(XiangqiGame(), depth)
+        if nodes != REFERENCE_COUNTS[depth]:
+            print(f"FAILED at depth {depth}: expected {REFERENCE_COUNTS[depth]}")
+            passed = False
+
+    return passed
+
+
+def main(argv=None):
+    """ Command line entry point. Run with -h for usage. """
+
+    parser = argparse.ArgumentParser(description="Count the legal move tree of a Xiangqi position to a given depth.")
+    parser.add_argument('depth', type=int, nargs='?', default=3, help="depth to search (default 3)")
+    parser.add_argument('--fen', default=None, help="position to start from, in FEN (default: the starting position)")
+    parser.add_argument('--moves', nargs='+', default=[], metavar='MOVE',
+                        help="moves played from the starting position (or --fen) first, e.g. h3e3 h10g8")
+    parser.add_argument('--divide', action='store_true', help="print the node count below each first move")
+    parser.add_argument('--verify', action='store_true',
+                        help="check the starting position against the published counts up to depth")
+    args = parser.parse_args(argv)
+
+    if args.depth < 1:
+        parser.error("depth must be at least 1")
+
+    if args.verify is True and args.depth not in REFERENCE_COUNTS:
+        parser.error(f"--verify only supports depths up to {max(REFERENCE_COUNTS)}")
+
+    if args.verify is True and (args.fen is not None or len(args.moves) > 0):
+        parser.error("--verify always starts from the starting position")
+
+    if args.verify is True:
+        return 0 if verify(args.depth) else 1
+
+    try:
+        game = game_from_moves(args.moves, args.fen)
+    except ValueError as error:
+        parser.error(str(error))
+
+    run_perft(game, args.depth, args.divide)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,338 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: A compact binary format for storing Xiangqi games. Each move takes 2 bytes, and each game a short
+#              header with its result, the FEN it started from (if not the starting position), and optional metadata.
+#              Games are written by a GameRecordWriter, either directly or by a GameRecorder listening to the moves of
+#              a XiangqiGame, and read back lazily from a memory-mapped file by a GameRecordReader.
+#
+#              File layout: the 4 byte magic number b'XQR1', followed by the games one after another. Each game is
+#              a little-endian header of its size in bytes (4 bytes, header included), its number of moves (2 bytes),
+#              its result (1 byte), and the lengths of its FEN and its metadata (2 bytes each), then the FEN and the
+#              metadata as UTF-8, then the moves. A move is stored as from_square * 90 + to_square in 2 bytes, with
+#              squares numbered 0 to 89 row by row from Red's side ('a1' is 0 and 'i10' is 89).
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from XiangqiGame import BOARD_SQUARES, START_FEN, Board, XiangqiGame
+
+
+# Marks the start of a game record file, and names its version.
+MAGIC = b'XQR1'
+
+# The header of each game: size, number of moves, result, FEN length, and metadata length.
+_GAME_HEADER = struct.Struct('<IHBHH')
+
+# The largest move count, FEN length, or metadata length a game header can hold.
+_MAX_FIELD = 0xFFFF
+
+# The result codes stored for each game result. 'DRAW' covers games stopped without a winner.
+RESULT_CODES = {'UNFINISHED': 0, 'RED_WON': 1, 'BLACK_WON': 2, 'DRAW': 3}
+_RESULTS = {code: result for result, code in RESULT_CODES.items()}
+
+
+def encode_move(sq1, sq2):
+    """ Returns the 2 byte code of a move between two squares. """
+
+    return sq1 * BOARD_SQUARES + sq2
+
+
+def decode_move(code):
+    """ Returns the (pos1, pos2) tuple of cardinal positions of a move code. """
+
+    sq1, sq2 = divmod(code, BOARD_SQUARES)
+
+    return Board.get_pos_from_square(sq1), Board.get_pos_from_square(sq2)
+
+
+class GameRecordWriter:
+    """ Writes games to a binary game record file. Can be used as a context manager, which closes the file. """
+
+    def __init__(self, path, append=False):
+        """ Opens a game record file for writing, replacing any existing file, or adding to it if append is True. """
+
+        self._file = open(path, 'ab' if append else 'wb')
+        self._games = 0
+
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+    def __enter__(self):
+        """ Returns the writer for use in a with statement. """
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """ Closes the writer at the end of a with statement. """
+
+        self.close()
+
+    def get_game_count(self):
+        """ Returns the number of games written by this writer. """
+
+        return self._games
+
+    def write_game(self, moves, result, fen=None, metadata=None):
+        """ Writes one game. moves is a list of move codes from encode_move, result is a key of RESULT_CODES, fen is
+        the position the game started from (None for the starting position), and metadata is None or a dictionary
+        that can be stored as JSON. Raises a ValueError, without writing anything, if the game has more moves, or a
+        longer FEN or metadata, than its header can hold. """
+
+        fen_bytes = b'' if fen is None or fen == START_FEN else fen.encode('utf-8')
+        metadata_bytes = b'' if metadata is None else json.dumps(metadata, separators=(',', ':')).encode('utf-8')
+
+        # The move count and the FEN and metadata lengths are stored in 2 bytes each. The game size, in 4 bytes, can
+        # then never overflow.
+        if len(moves) > _MAX_FIELD:
+            raise ValueError(f"Game record cannot hold more than {_MAX_FIELD} moves, got {len(moves)}")
+
+        if len(fen_bytes) > _MAX_FIELD:
+            raise ValueError(f"Game record cannot hold a FEN longer than {_MAX_FIELD} bytes, got {len(fen_bytes)}")
+
+        if len(metadata_bytes) > _MAX_FIELD:
+            raise ValueError(f"Game record cannot hold metadata longer than {_MAX_FIELD} bytes as JSON, got "
+                             f"{len(metadata_bytes)}")
+        move_bytes = array('H', moves)
+        if sys.byteorder != 'little':
+            move_bytes.byteswap()
+
+        size = _GAME_HEADER.size + len(fen_bytes) + len(metadata_bytes) + 2 * len(moves)
+        self._file.write(_GAME_HEADER.pack(size, len(moves), RESULT_CODES[result], len(fen_bytes),
+                                           len(metadata_bytes)))
+        self._file.write(fen_bytes)
+        self._file.write(metadata_bytes)
+        self._file.write(move_bytes.tobytes())
+        self._games += 1
+
+    def record(self, game, metadata=None):
+        """ Starts recording the moves of game from its current position with a new GameRecorder, which writes the
+        game to this file when it ends. Returns the recorder. """
+
+        return GameRecorder(self, game, metadata)
+
+    def flush(self):
+        """ Flushes the games written so far to disk. """
+
+        self._file.flush()
+
+    def close(self):
+        """ Closes the file. """
+
+        self._file.close()
+
+
+class GameRecorder:
+    """ Listens to the moves of a XiangqiGame and writes them as one game to a GameRecordWriter once the game is won.
+    A game that is abandoned or drawn can be written at any time with finish. """
+
+    def __init__(self, writer, game, metadata=None):
+        """ Starts recording the moves of game from its current position. """
+
+        self._writer = writer
+        self._game = game
+        self._metadata = metadata
+        self._fen = game.get_fen()
+        self._moves = []
+        self._finished = False
+
+        game.add_move_listener(self)
+
+    def get_moves(self):
+        """ Returns the move codes recorded so far. """
+
+        return self._moves
+
+    def move_made(self, game, sq1, sq2):
+        """ Records a move made in the game, and writes the game once it has been won. """
+
+        self._moves.append(encode_move(sq1, sq2))
+
+        if game.get_game_state() != 'UNFINISHED':
+            self.finish()
+
+    def move_taken_back(self, game):
+        """ Forgets the last move recorded, if it was taken back. """
+
+        if len(self._moves) > 0:
+            self._moves.pop()
+
+    def finish(self, result=None):
+        """ Writes the game, with its current game state as the result unless another is given (e.g. 'DRAW'), and
+        stops recording. Does nothing if the game has already been written. """
+
+        if self._finished is True:
+            return
+
+        self._finished = True
+        self._game.remove_move_listener(self)
+        self._writer.write_game(self._moves, self._game.get_game_state() if result is None else result, self._fen,
+                                self._metadata)
+
+
+class GameRecord:
+    """ One game read from a game record file. The moves are only decoded when they are asked for. """
+
+    def __init__(self, result, fen, metadata, move_bytes):
+        """ Initializes a game record from its decoded header fields and the raw bytes of its moves. """
+
+        self._result = result
+        self._fen = fen
+        self._metadata = metadata
+        self._move_bytes = move_bytes
+
+    def get_result(self):
+        """ Returns the result of the game: 'UNFINISHED', 'RED_WON', 'BLACK_WON', or 'DRAW'. """
+
+        return self._result
+
+    def get_fen(self):
+        """ Returns the FEN of the position the game started from. """
+
+        return START_FEN if self._fen is None else self._fen
+
+    def get_metadata(self):
+        """ Returns the metadata dictionary stored with the game, or None. """
+
+        return None if self._metadata is None else json.loads(self._metadata)
+
+    def get_move_count(self):
+        """ Returns the number of moves in the game. """
+
+        return len(self._move_bytes) // 2
+
+    def get_move_codes(self):
+        """ Returns the moves of the game as a list of move codes. """
+
+        codes = array('H')
+        codes.frombytes(self._move_bytes)
+        if sys.byteorder != 'little':
+            codes.byteswap()
+
+        return codes.tolist()
+
+    def get_moves(self):
+        """ Returns the moves of the game as a list of (pos1, pos2) tuples. """
+
+        return [decode_move(code) for code in self.get_move_codes()]
+
+    def replay(self, **kwargs):
+        """ Returns a new XiangqiGame, created with any keyword arguments given, with the moves of the game played
+        from its starting position. Raises a ValueError if a move is illegal. """
+
+        game = XiangqiGame(fen=self._fen, **kwargs)
+
+        for code in self.get_move_codes():
+            sq1, sq2 = divmod(code, BOARD_SQUARES)
+            if game._make_move(sq1, sq2) is not True:
+                raise ValueError(f"Illegal move in game record: {''.join(decode_move(code))}")
+
+        return game
+
+
+class GameRecordReader:
+    """ Reads the games of a game record file one at a time from a memory map, without loading the file. Can be used
+    as a context manager, which closes the file. """
+
+    def __init__(self, path):
+        """ Opens and memory-maps a game record file. Raises a ValueError if it is not a game record file. """
+
+        self._file = open(path, 'rb')
+
+        # An empty file cannot be memory-mapped, and one too short for the magic number cannot be a game record file.
+        if os.fstat(self._file.fileno()).st_size < len(MAGIC):
+            self._file.close()
+            raise ValueError(f"Not a game record file: {path}")
+
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a game record file: {path}")
+
+    def __enter__(self):
+        """ Returns the reader for use in a with statement. """
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """ Closes the reader at the end of a with statement. """
+
+        self.close()
+
+    def __iter__(self):
+        """ Generates a GameRecord for each game in the file, in the order they were written. Only the bytes of one
+        game are read at a time, and its moves are decoded only when asked for. Raises a ValueError naming the byte
+        offset of the game if the file ends partway through it, or if its header is corrupt: a size too small to hold
+        its FEN, metadata, and moves, or an unknown result code. """
+
+        offset = len(MAGIC)
+        end = len(self._map)
+
+        while offset < end:
+            if offset + _GAME_HEADER.size > end:
+                raise ValueError(f"Game record file ends partway through a game at byte {offset}")
+
+            size, move_count, result, fen_length, metadata_length = _GAME_HEADER.unpack_from(self._map, offset)
+            if offset + size > end:
+                raise ValueError(f"Game record file ends partway through a game at byte {offset}")
+
+            # A size too small for the game's contents (such as 0, which would never move on to the next game) or an
+            # unknown result means the header is corrupt.
+            if size < _GAME_HEADER.size + fen_length + metadata_length + 2 * move_count:
+                raise ValueError(f"Game record file has a corrupt game size at byte {offset}")
+
+            if result not in _RESULTS:
+                raise ValueError(f"Game record file has an unknown result code {result} at byte {offset}")
+
+            start = offset + _GAME_HEADER.size
+            fen = self._map[start:start + fen_length].decode('utf-8') if fen_length > 0 else None
+            start += fen_length
+            metadata = self._map[start:start + metadata_length].decode('utf-8') if metadata_length > 0 else None
+            start += metadata_length
+
+            yield GameRecord(_RESULTS[result], fen, metadata, self._map[start:start + 2 * move_count])
+            offset += size
+
+    def close(self):
+        """ Closes the memory map and the file. """
+
+        self._map.close()
+        self._file.close()
+
+
+def main(argv=None):
+    """ Command line entry point. Summarizes a game record file. Run with -h for usage. """
+
+    parser = argparse.ArgumentParser(description="Summarize a binary Xiangqi game record file.")
+    parser.add_argument('path', help="game record file")
+    parser.add_argument('--verify', action='store_true', help="replay every game to check that its moves are legal")
+    args = parser.parse_args(argv)
+
+    games = 0
+    moves = 0
+    results = {result: 0 for result in RESULT_CODES}
+
+    try:
+        with GameRecordReader(args.path) as reader:
+            for record in reader:
+                games += 1
+                moves += record.get_move_count()
+                results[record.get_result()] += 1
+                if args.verify is True:
+                    record.replay()
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    size = os.path.getsize(args.path)
+    print(f"{games} games, {moves} moves, {size} bytes ({size / moves if moves > 0 else 0.0:.2f} bytes/move)")
+    print(', '.join(f"{result.lower()} {count}" for result, count in results.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
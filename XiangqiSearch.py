@@ -0,0 +1,828 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: A search engine that chooses a move for the player to move in a XiangqiGame. Uses negamax alpha-beta
+#              search with iterative deepening, a quiescence search over captures, and killer and history move
+#              ordering, within a depth, wall-clock, or node budget. Reports the best move, its score, the principal
+#              variation, and the nodes searched per second. Positions already searched are remembered in a
+#              transposition table of fixed size. A position can also be searched by a pool of worker processes,
+#              which split the moves at the root between them.
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from XiangqiGame import BOARD_SQUARES, XiangqiGame, game_from_moves
+
+
+# Material values of each piece type, in hundredths of a Soldier. A Soldier that has crossed the river is worth more,
+# since it can then move sideways. The General is never captured, so it is not counted.
+PIECE_VALUES = {
+    'G': 0,
+    'A': 200,
+    'E': 200,
+    'H': 400,
+    'C': 900,
+    'N': 450,
+    'S': 100,
+}
+CROSSED_SOLDIER_VALUE = 200
+
+# Bonus for each point a player's pieces attack.
+MOBILITY_VALUE = 2
+
+# Scores at or beyond MATE_SCORE - MAX_PLY mean a forced checkmate (or stalemate, which also loses in Xiangqi). The
+# distance to mate is taken off, so that nearer mates score higher.
+MATE_SCORE = 100000
+MAX_PLY = 64
+_INFINITY = MATE_SCORE + 1
+
+# Search depth used when no depth, time, or node budget is given.
+DEFAULT_DEPTH = 4
+
+# How many nodes are searched between checks of the clock.
+_CLOCK_INTERVAL = 1024
+
+# Memory given to the transposition table when no other size is given, in megabytes.
+DEFAULT_TABLE_MB = 16
+
+# The kinds of score stored in the transposition table: an exact score, a lower bound from a cutoff, or an upper
+# bound from a node where no move reached alpha.
+EXACT = 1
+LOWER_BOUND = 2
+UPPER_BOUND = 3
+
+# Each transposition table entry packs its best move, score, depth, bound, and age into one 64-bit integer, next to
+# the 64-bit hash of its position. The best move is stored as from * 90 + to + 1, or 0 for none, and the score is
+# stored offset to be non-negative. The depth is stored plus one, so that an empty slot always has data of 0.
+_MOVE_BITS = 13
+_SCORE_BITS = 18
+_DEPTH_BITS = 7
+_BOUND_BITS = 2
+_AGE_BITS = 8
+_SCORE_SHIFT = _MOVE_BITS
+_DEPTH_SHIFT = _SCORE_SHIFT + _SCORE_BITS
+_BOUND_SHIFT = _DEPTH_SHIFT + _DEPTH_BITS
+_AGE_SHIFT = _BOUND_SHIFT + _BOUND_BITS
+_SCORE_OFFSET = 1 << (_SCORE_BITS - 1)
+_ENTRY_BYTES = 16
+
+
+class TranspositionTable:
+    """ A fixed-size table of search results keyed by position hash. Each slot holds one entry: the depth searched,
+    the kind of bound, the score, and the best move. The table's memory is allocated up front and never grows. When two
+    positions share a slot, the new entry replaces the old one if the old one is from an earlier search or was searched
+    no deeper. Counts hits, misses, and collisions (probes that find a different position in the slot). """
+
+    def __init__(self, size_mb=DEFAULT_TABLE_MB):
+        """ Initializes an empty table using at most size_mb megabytes for its entries. """
+
+        self._size = max(1, int(size_mb * 1024 * 1024) // _ENTRY_BYTES)
+        self._keys = array('Q', bytes(8 * self._size))
+        self._data = array('Q', bytes(8 * self._size))
+
+        # The age of the current search, stored with every entry so that entries left from earlier searches give way.
+        self._age = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._collisions = 0
+        self._stores = 0
+
+    def get_size(self):
+        """ Returns the number of entries the table can hold. """
+
+        return self._size
+
+    def get_memory_usage(self):
+        """ Returns the number of bytes used by the table's entries. """
+
+        return self._keys.itemsize * len(self._keys) + self._data.itemsize * len(self._data)
+
+    def get_stats(self):
+        """ Returns a dictionary of the table's probe and store counters. """
+
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'collisions': self._collisions,
+            'stores': self._stores,
+        }
+
+    def new_search(self):
+        """ Starts a new search, so that entries stored by earlier searches are replaced before those of this one. """
+
+        self._age = (self._age + 1) % (1 << _AGE_BITS)
+
+    def clear(self):
+        """ Empties the table and resets its counters. """
+
+        self._keys = array('Q', bytes(8 * self._size))
+        self._data = array('Q', bytes(8 * self._size))
+        self._hits = 0
+        self._misses = 0
+        self._collisions = 0
+        self._stores = 0
+
+    def probe(self, position_hash):
+        """ Looks up a position by its hash. Returns a (depth, bound, score, best_move) tuple, where best_move is a
+        pair of squares or None, or None if the position is not in the table. """
+
+        slot = position_hash % self._size
+        data = self._data[slot]
+
+        if data == 0:
+            self._misses += 1
+            return None
+
+        if self._keys[slot] != position_hash:
+            self._misses += 1
+            self._collisions += 1
+            return None
+
+        self._hits += 1
+
+        move = data & ((1 << _MOVE_BITS) - 1)
+        score = (data >> _SCORE_SHIFT & ((1 << _SCORE_BITS) - 1)) - _SCORE_OFFSET
+        depth = (data >> _DEPTH_SHIFT & ((1 << _DEPTH_BITS) - 1)) - 1
+        bound = data >> _BOUND_SHIFT & ((1 << _BOUND_BITS) - 1)
+
+        return depth, bound, score, None if move == 0 else divmod(move - 1, BOARD_SQUARES)
+
+    def store(self, position_hash, depth, bound, score, best_move):
+        """ Stores the result of searching a position to depth, unless its slot holds a deeper entry for another
+        position from the current search. best_move is a pair of squares or None. """
+
+        slot = position_hash % self._size
+        data = self._data[slot]
+
+        if data != 0 and self._keys[slot] != position_hash:
+            old_depth = (data >> _DEPTH_SHIFT & ((1 << _DEPTH_BITS) - 1)) - 1
+            old_age = data >> _AGE_SHIFT
+            if old_age == self._age and old_depth > depth:
+                return
+
+        move = 0 if best_move is None else best_move[0] * BOARD_SQUARES + best_move[1] + 1
+
+        self._keys[slot] = position_hash
+        self._data[slot] = (
+            move |
+            (score + _SCORE_OFFSET) << _SCORE_SHIFT |
+            (depth + 1) << _DEPTH_SHIFT |
+            bound << _BOUND_SHIFT |
+            self._age << _AGE_SHIFT
+        )
+        self._stores += 1
+
+
+class SearchResult:
+    """ The outcome of a search: the best move found, its score from the point of view of the player to move, the
+    principal variation, the depth completed, and the nodes searched and time taken. Moves are (pos1, pos2) tuples. """
+
+    def __init__(self, best_move, score, pv, depth, nodes, elapsed):
+        """ Initializes a search result. """
+
+        self._best_move = best_move
+        self._score = score
+        self._pv = pv
+        self._depth = depth
+        self._nodes = nodes
+        self._elapsed = elapsed
+
+    def get_best_move(self):
+        """ Returns the best move found, or None if the player to move has no legal moves. """
+
+        return self._best_move
+
+    def get_score(self):
+        """ Returns the score of the best move for the player to move. """
+
+        return self._score
+
+    def get_pv(self):
+        """ Returns the principal variation, the line of best play expected from the best move on, as a list. """
+
+        return self._pv
+
+    def get_depth(self):
+        """ Returns the deepest iteration the search completed. """
+
+        return self._depth
+
+    def get_nodes(self):
+        """ Returns the number of nodes searched, including quiescence nodes. """
+
+        return self._nodes
+
+    def get_elapsed(self):
+        """ Returns the time taken by the search in seconds. """
+
+        return self._elapsed
+
+    def get_nps(self):
+        """ Returns the number of nodes searched per second. """
+
+        return self._nodes / self._elapsed if self._elapsed > 0 else 0.0
+
+    def is_mate_score(self):
+        """ Returns True if the score means a forced win or loss. """
+
+        return abs(self._score) >= MATE_SCORE - MAX_PLY
+
+
+class Searcher:
+    """ An alpha-beta searcher. A Searcher can be used for any number of searches; its history table carries over from
+    one search to the next, which helps when searching the positions of the same game in turn. """
+
+    def __init__(self, max_depth=None, time_limit=None, node_limit=None, table=None):
+        """ Initializes a searcher that stops after completing max_depth plies, after time_limit seconds, or after
+        searching node_limit nodes, whichever comes first. If none of them is given, it searches to DEFAULT_DEPTH.
+        Positions are remembered in the given TranspositionTable, or in a new one of DEFAULT_TABLE_MB if None. """
+
+        self.set_limits(max_depth, time_limit, node_limit)
+        self._table = TranspositionTable() if table is None else table
+
+        # Two quiet moves per ply that most recently caused a cutoff, and a score for every (from, to) pair of
+        # squares that grows each time a quiet move causes a cutoff.
+        self._killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self._history = [0] * (BOARD_SQUARES * BOARD_SQUARES)
+
+        # The principal variation found below each ply, and the one from the last completed iteration.
+        self._pv = [[] for _ in range(MAX_PLY + 2)]
+        self._previous_pv = []
+
+        # Search statistics and the stopping state of the current search.
+        self._nodes = 0
+        self._deadline = None
+        self._stopped = False
+
+    def set_limits(self, max_depth=None, time_limit=None, node_limit=None):
+        """ Changes the limits of the searches to come, as given to __init__. The transposition table and history table
+        are kept, so a searcher can be reused for searches with different limits. """
+
+        if max_depth is None:
+            max_depth = DEFAULT_DEPTH if time_limit is None and node_limit is None else MAX_PLY
+
+        self._max_depth = min(max_depth, MAX_PLY)
+        self._time_limit = time_limit
+        self._node_limit = node_limit
+
+    def get_table(self):
+        """ Returns the searcher's transposition table. """
+
+        return self._table
+
+    def search(self, game, on_iteration=None, alpha=-_INFINITY, beta=_INFINITY):
+        """ Searches the current position of game by iterative deepening and returns a SearchResult for the deepest
+        iteration completed. If on_iteration is given, it is called with the SearchResult of every completed
+        iteration. A score at or below alpha, or at or above beta, is only a bound on the true score. The game is left
+        in the position it started in. """
+
+        start = time.perf_counter()
+        self._nodes = 0
+        self._deadline = None if self._time_limit is None else start + self._time_limit
+        self._stopped = False
+        self._previous_pv = []
+        self._killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self._table.new_search()
+
+        if game.get_game_state() != 'UNFINISHED':
+            return SearchResult(None, 0, [], 0, 0, 0.0)
+
+        # A depth of zero searches captures only.
+        if self._max_depth == 0:
+            score = self._quiescence(game, alpha, beta, 0)
+            return self._make_result(game, [], 0 if self._stopped else score, 0, start)
+
+        result = None
+
+        for depth in range(1, self._max_depth + 1):
+            score = self._negamax(game, depth, alpha, beta, 0)
+
+            # A partly searched iteration is thrown away.
+            if self._stopped is True:
+                break
+
+            self._previous_pv = list(self._pv[0])
+            result = self._make_result(game, self._previous_pv, score, depth, start)
+
+            if on_iteration is not None:
+                on_iteration(result)
+
+            # Once a forced mate has been found, searching deeper cannot find anything better.
+            if result.is_mate_score():
+                break
+
+        # If the search was stopped before the first iteration completed, fall back on the best move found so far at
+        # the root, or else the first legal move.
+        if result is None:
+            pv = self._pv[0][:1]
+            if len(pv) == 0:
+                pv = list(game._legal_moves())[:1]
+            result = self._make_result(game, pv, 0, 0, start)
+
+        return result
+
+    def _make_result(self, game, pv, score, depth, start):
+        """ Helper method that builds a SearchResult from a principal variation given as pairs of squares. """
+
+        pv = [(game._board.get_pos_from_square(sq1), game._board.get_pos_from_square(sq2)) for sq1, sq2 in pv]
+
+        return SearchResult(pv[0] if len(pv) > 0 else None, score, pv, depth, self._nodes,
+                            time.perf_counter() - start)
+
+    def _negamax(self, game, depth, alpha, beta, ply):
+        """ Helper method that returns the score of the current position for the player to move, searching depth
+        more plies and then captures only. Scores outside the window (alpha, beta) are bounds rather than exact. """
+
+        self._pv[ply] = []
+
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiescence(game, alpha, beta, ply)
+
+        if self._count_node() is False:
+            return 0
+
+        # If this position has been searched deeply enough before, its stored score may settle it. Otherwise, its
+        # stored best move is still the best guess at the move to search first. The root is always searched.
+        position_hash = game.get_hash()
+        entry = self._table.probe(position_hash)
+        table_move = None
+
+        if entry is not None:
+            entry_depth, bound, score, table_move = entry
+            score = self._score_from_table(score, ply)
+
+            if entry_depth >= depth and ply > 0 and (
+                bound == EXACT or
+                (bound == LOWER_BOUND and score >= beta) or
+                (bound == UPPER_BOUND and score <= alpha)
+            ):
+                self._pv[ply] = [] if table_move is None else [table_move]
+                return score
+
+        pieces_by_square = game._pieces.get_pieces_by_square()
+        moves = self._order_moves(game, game._pieces.get_all_possible_moves(game._current_player), ply, table_move)
+        original_alpha = alpha
+        best_score = -_INFINITY
+        best_move = None
+        legal_moves = 0
+
+        for move in moves:
+            sq1, sq2 = move
+            captured_piece = pieces_by_square[sq2]
+
+            # The attack maps only give pseudo-legal moves; _apply_move turns down the ones that leave a check.
+            if game._apply_move(sq1, sq2) is not True:
+                continue
+
+            legal_moves += 1
+            game._switch_player()
+            score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            game._switch_player()
+            game._undo_move()
+
+            if self._stopped is True:
+                return 0
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+
+            if score > alpha:
+                alpha = score
+                self._pv[ply] = [move] + self._pv[ply + 1]
+
+                # A quiet move that refutes the opponent's last move is likely to refute its siblings as well.
+                if score >= beta:
+                    if captured_piece is None:
+                        self._store_killer(move, ply)
+                        self._history[sq1 * BOARD_SQUARES + sq2] += depth * depth
+                    break
+
+        # With no legal moves, the player to move has been checkmated or stalemated, and loses either way.
+        if legal_moves == 0:
+            return -MATE_SCORE + ply
+
+        if best_score <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+
+        self._table.store(position_hash, depth, bound, self._score_to_table(best_score, ply), best_move)
+
+        return best_score
+
+    @staticmethod
+    def _score_to_table(score, ply):
+        """ Helper method that converts a mate score from distance to the root to distance from the current node, so
+        that it stays correct when the position is reached again at another ply. """
+
+        if score >= MATE_SCORE - MAX_PLY:
+            return score + ply
+
+        if score <= -MATE_SCORE + MAX_PLY:
+            return score - ply
+
+        return score
+
+    @staticmethod
+    def _score_from_table(score, ply):
+        """ Helper method that converts a mate score stored by _score_to_table back to distance from the root. """
+
+        if score >= MATE_SCORE - MAX_PLY:
+            return score - ply
+
+        if score <= -MATE_SCORE + MAX_PLY:
+            return score + ply
+
+        return score
+
+    def _quiescence(self, game, alpha, beta, ply):
+        """ Helper method that returns the score of the current position for the player to move, searching captures
+        only until the position is quiet. The player to move may also stand pat on the static evaluation. """
+
+        self._pv[ply] = []
+
+        if self._count_node() is False:
+            return 0
+
+        stand_pat = self._evaluate(game)
+
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        pieces_by_square = game._pieces.get_pieces_by_square()
+        captures = [move for move in game._pieces.get_all_possible_moves(game._current_player)
+                    if pieces_by_square[move[1]] is not None]
+        captures.sort(key=lambda move: self._capture_order(pieces_by_square, move), reverse=True)
+
+        for sq1, sq2 in captures:
+            if game._apply_move(sq1, sq2) is not True:
+                continue
+
+            game._switch_player()
+            score = -self._quiescence(game, -beta, -alpha, ply + 1)
+            game._switch_player()
+            game._undo_move()
+
+            if self._stopped is True:
+                return 0
+
+            if score >= beta:
+                return score
+
+            if score > alpha:
+                alpha = score
+
+        return alpha
+
+    def _evaluate(self, game):
+        """ Helper method that returns the static evaluation of the current position for the player to move: the
+        difference in material, plus a small bonus for each point attacked. """
+
+        player = game._current_player
+        board = game._board
+        score = 0
+
+        for piece in game._pieces.get_all_pieces().values():
+            piece_type = piece.get_type()
+            color = piece.get_color()
+
+            if piece_type == 'S' and not board.is_square_behind_river(piece.get_square(), color):
+                value = CROSSED_SOLDIER_VALUE
+            else:
+                value = PIECE_VALUES[piece_type]
+
+            score += value if color == player else -value
+
+        opponent = game._players[1] if player == game._players[0] else game._players[0]
+        mobility = len(game._pieces.get_attack_map(player)) - len(game._pieces.get_attack_map(opponent))
+
+        return score + mobility * MOBILITY_VALUE
+
+    def _order_moves(self, game, moves, ply, table_move=None):
+        """ Helper method that sorts moves in the order they should be searched: the best move stored in the
+        transposition table first, then the move from the last principal variation, then captures by the most
+        valuable victim and least valuable attacker, then killer moves, then the remaining quiet moves by their history
+        score. """
+
+        pieces_by_square = game._pieces.get_pieces_by_square()
+        pv_move = self._previous_pv[ply] if ply < len(self._previous_pv) else None
+        killers = self._killers[ply]
+        history = self._history
+
+        def _move_order(move):
+            """ Sort key that ranks a move by its kind, then by its score within that kind. """
+
+            if move == table_move:
+                return 5, 0
+
+            if move == pv_move:
+                return 4, 0
+
+            if pieces_by_square[move[1]] is not None:
+                return 3, self._capture_order(pieces_by_square, move)
+
+            if move == killers[0]:
+                return 2, 1
+
+            if move == killers[1]:
+                return 2, 0
+
+            return 1, history[move[0] * BOARD_SQUARES + move[1]]
+
+        moves.sort(key=_move_order, reverse=True)
+
+        return moves
+
+    @staticmethod
+    def _capture_order(pieces_by_square, move):
+        """ Helper method that scores a capture for ordering: the victim's value first, then the attacker's. """
+
+        victim = PIECE_VALUES[pieces_by_square[move[1]].get_type()]
+        attacker = PIECE_VALUES[pieces_by_square[move[0]].get_type()]
+
+        return victim * 10 - attacker
+
+    def _store_killer(self, move, ply):
+        """ Helper method that records a quiet move that caused a cutoff at ply, keeping the two most recent. """
+
+        killers = self._killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+    def _count_node(self):
+        """ Helper method that counts a node and checks the node and time budgets. Returns False if the search has
+        run out of either and must stop. """
+
+        self._nodes += 1
+
+        if self._node_limit is not None and self._nodes > self._node_limit:
+            self._stopped = True
+
+        elif self._deadline is not None and self._nodes % _CLOCK_INTERVAL == 0:
+            if time.perf_counter() >= self._deadline:
+                self._stopped = True
+
+        return not self._stopped
+
+
+def search(game, max_depth=None, time_limit=None, node_limit=None, on_iteration=None, table=None):
+    """ Searches the current position of game with a new Searcher and returns a SearchResult. See Searcher. """
+
+    return Searcher(max_depth, time_limit, node_limit, table).search(game, on_iteration)
+
+
+# The state a worker process of parallel_search keeps from one task to the next: a Searcher, whose transposition and
+# history tables stay warm across root moves and iterations, the game last set up from FEN, and the best exact score
+# found so far at the root in this iteration, shared by every worker.
+_worker_searcher = None
+_worker_game = None
+_worker_bound = None
+
+
+def _initialize_worker(table_mb, bound):
+    """ Initializes a worker process of parallel_search with its own Searcher and the shared root bound. """
+
+    global _worker_searcher, _worker_bound
+    _worker_searcher = Searcher(table=TranspositionTable(table_mb))
+    _worker_bound = bound
+
+
+def _search_root_move(fen, root_move, depth, deadline):
+    """ Task run by a worker process of parallel_search. Makes root_move in the position given in FEN and searches the
+    position after it to depth - 1 plies. If another root move already has an exact score, root_move is first searched
+    with a null window to show whether it does any better, and only searched again for its exact score if it does.
+    Returns a tuple of the score of root_move for the player making it, the principal variation starting with
+    root_move, the nodes searched, whether the search completed before deadline (a time.time() value or None), and
+    whether the score is exact. A score that is not exact is only an upper bound, no better than the bound it was
+    searched against. """
+
+    global _worker_game
+
+    time_limit = None if deadline is None else deadline - time.time()
+    if time_limit is not None and time_limit <= 0:
+        return -_INFINITY, [root_move], 0, False, False
+
+    # Set up the position only when it changes, which is once per call of parallel_search.
+    if _worker_game is None or _worker_game.get_fen() != fen:
+        _worker_game = XiangqiGame(fen=fen)
+
+    game = _worker_game
+    game.make_move(*root_move)
+
+    try:
+        # If root_move ended the game, the player who made it has won.
+        if game.get_game_state() != 'UNFINISHED':
+            _raise_bound(MATE_SCORE - 1)
+            return MATE_SCORE - 1, [root_move], 1, True, True
+
+        alpha = _worker_bound.value
+        searcher = _worker_searcher
+        searcher.set_limits(depth - 1, time_limit)
+        nodes = 0
+
+        # A mate score for alpha is left out of the window, since mate scores change by a ply between the two positions.
+        if abs(alpha) >= MATE_SCORE - MAX_PLY:
+            alpha = -_INFINITY
+
+        if alpha > -_INFINITY:
+            result = searcher.search(game, alpha=-alpha - 1, beta=-alpha)
+            nodes += result.get_nodes()
+            if searcher._stopped is True or -result.get_score() <= alpha:
+                return alpha, [root_move], nodes, searcher._stopped is not True, False
+
+        # The opponent's score only has to be found exactly while it is below -alpha.
+        result = searcher.search(game, alpha=-_INFINITY, beta=_INFINITY if alpha == -_INFINITY else -alpha)
+        nodes += result.get_nodes()
+        score = -result.get_score()
+    finally:
+        game.pop()
+
+    # Mate scores count one more ply from the root, which is a ply above the position searched.
+    if score >= MATE_SCORE - MAX_PLY:
+        score -= 1
+    elif score <= -MATE_SCORE + MAX_PLY:
+        score += 1
+
+    if searcher._stopped is True:
+        return score, [root_move] + result.get_pv(), nodes, False, False
+
+    _raise_bound(score)
+
+    return score, [root_move] + result.get_pv(), nodes, True, True
+
+
+def _raise_bound(score):
+    """ Helper function for worker processes that raises the shared root bound to score if it is higher. """
+
+    with _worker_bound.get_lock():
+        if score > _worker_bound.value:
+            _worker_bound.value = score
+
+
+def parallel_search(game, workers=None, max_depth=None, time_limit=None, table_mb=DEFAULT_TABLE_MB,
+                    on_iteration=None):
+    """ Searches the current position of game by iterative deepening across a pool of worker processes, and returns
+    a SearchResult for the deepest iteration completed. Each iteration first searches the best root move from the
+    last iteration, then hands every other legal root move to the pool as a separate task. Workers share the best
+    score found so far at the root, and search each root move with a null window against it, so a move only has to
+    show it is no better; those that are better are searched again for their exact scores, raising the shared score.
+    Each worker keeps its transposition and history tables from one task and iteration to the next. Uses
+    os.cpu_count() workers if workers is None, each with a transposition table of table_mb megabytes. The search stops
+    after max_depth plies or time_limit seconds, and if neither is given, searches to DEFAULT_DEPTH. """
+
+    start = time.perf_counter()
+    deadline = None if time_limit is None else time.time() + time_limit
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if max_depth is None:
+        max_depth = DEFAULT_DEPTH if time_limit is None else MAX_PLY
+
+    if game.get_game_state() != 'UNFINISHED':
+        return SearchResult(None, 0, [], 0, 0, 0.0)
+
+    fen = game.get_fen()
+    root_moves = list(game.legal_moves())
+    best_score, best_pv, completed_depth = 0, root_moves[:1], 0
+    nodes = 0
+    bound = multiprocessing.Value('q', -_INFINITY)
+
+    with ProcessPoolExecutor(workers, initializer=_initialize_worker, initargs=(table_mb, bound)) as pool:
+        for depth in range(1, min(max_depth, MAX_PLY) + 1):
+            bound.value = -_INFINITY
+
+            # The first move is searched alone, so that every other move has a bound to be searched against.
+            outcomes = [pool.submit(_search_root_move, fen, root_moves[0], depth, deadline).result()]
+            futures = [pool.submit(_search_root_move, fen, move, depth, deadline) for move in root_moves[1:]]
+            outcomes += [future.result() for future in futures]
+            nodes += sum(outcome[2] for outcome in outcomes)
+
+            # A partly searched iteration is thrown away.
+            if not all(outcome[3] for outcome in outcomes):
+                break
+
+            # Sort the root moves from best to worst, exact scores first, so that the next iteration hands out the
+            # best moves first. The first move keeps its place among moves of the same score.
+            order = sorted(range(len(root_moves)), key=lambda index: (outcomes[index][4], outcomes[index][0]),
+                           reverse=True)
+            root_moves = [root_moves[index] for index in order]
+            best_score, best_pv = outcomes[order[0]][0], outcomes[order[0]][1]
+            completed_depth = depth
+
+            result = SearchResult(root_moves[0], best_score, best_pv, depth, nodes, time.perf_counter() - start)
+
+            if on_iteration is not None:
+                on_iteration(result)
+
+            # Once a forced mate has been found, searching deeper cannot find anything better.
+            if result.is_mate_score():
+                break
+
+    return SearchResult(best_pv[0] if len(best_pv) > 0 else None, best_score, best_pv, completed_depth, nodes,
+                        time.perf_counter() - start)
+
+
+def measure_speedup(game, depth, workers=None, table_mb=DEFAULT_TABLE_MB):
+    """ Searches the current position of game to depth, first with a single Searcher in this process and then with
+    parallel_search. Returns a tuple of both SearchResults and the speedup, the single-process time divided by the
+    parallel time. """
+
+    serial = Searcher(depth, table=TranspositionTable(table_mb)).search(game)
+    parallel = parallel_search(game, workers, depth, table_mb=table_mb)
+
+    return serial, parallel, serial.get_elapsed() / parallel.get_elapsed() if parallel.get_elapsed() > 0 else 0.0
+
+
+def print_iteration(result):
+    """ Prints a one-line summary of a completed search iteration. """
+
+    pv = ' '.join(pos1 + pos2 for pos1, pos2 in result.get_pv())
+    print(f"depth {result.get_depth()} score {result.get_score()} nodes {result.get_nodes()} "
+          f"time {result.get_elapsed():.3f}s ({result.get_nps():,.0f} nodes/s) pv {pv}")
+
+
+def main(argv=None):
+    """ Command line entry point. Run with -h for usage. """
+
+    parser = argparse.ArgumentParser(description="Search a Xiangqi position for the best move.")
+    parser.add_argument('--depth', type=int, default=None,
+                        help=f"maximum depth in plies (default {DEFAULT_DEPTH} if no other limit is given)")
+    parser.add_argument('--time', type=float, default=None, help="time limit in seconds")
+    limits = parser.add_mutually_exclusive_group()
+    limits.add_argument('--nodes', type=int, default=None, help="node limit (not with --workers)")
+    parser.add_argument('--hash', type=float, default=DEFAULT_TABLE_MB, metavar='MB',
+                        help=f"transposition table size in megabytes (default {DEFAULT_TABLE_MB})")
+    parser.add_argument('--fen', default=None, help="position to search, in FEN (default: the starting position)")
+    parser.add_argument('--moves', nargs='+', default=[], metavar='MOVE',
+                        help="moves played from the starting position (or --fen) first, e.g. h3e3 h10g8")
+    limits.add_argument('--workers', type=int, default=None,
+                        help="search with this many worker processes, splitting the moves at the root")
+    parser.add_argument('--speedup', action='store_true',
+                        help="search to --depth in one process and then with --workers, and report the speedup")
+    args = parser.parse_args(argv)
+
+    if args.depth is not None and args.depth < 1:
+        parser.error("depth must be at least 1")
+
+    if args.workers is not None and args.workers < 1:
+        parser.error("workers must be at least 1")
+
+    if args.speedup is True and args.nodes is not None:
+        parser.error("argument --nodes: not allowed with argument --speedup")
+
+    try:
+        game = game_from_moves(args.moves, args.fen)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.hash <= 0:
+        parser.error("hash size must be positive")
+
+    if args.speedup is True:
+        depth = DEFAULT_DEPTH if args.depth is None else args.depth
+        serial, parallel, speedup = measure_speedup(game, depth, args.workers, args.hash)
+        for name, result in (('1 process', serial), (f"{args.workers or os.cpu_count()} workers", parallel)):
+            print(f"{name}: best move {''.join(result.get_best_move())} score {result.get_score()} "
+                  f"({result.get_nodes()} nodes in {result.get_elapsed():.3f}s, {result.get_nps():,.0f} nodes/s)")
+        print(f"speedup {speedup:.2f}x")
+        return 0
+
+    if args.workers is not None:
+        result = parallel_search(game, args.workers, args.depth, args.time, args.hash, print_iteration)
+        if result.get_best_move() is None:
+            print("no legal moves")
+            return 0
+        print(f"best move {''.join(result.get_best_move())} score {result.get_score()} "
+              f"({result.get_nodes()} nodes in {result.get_elapsed():.3f}s, {result.get_nps():,.0f} nodes/s)")
+        return 0
+
+    table = TranspositionTable(args.hash)
+    result = search(game, args.depth, args.time, args.nodes, print_iteration, table)
+    stats = table.get_stats()
+    print(f"hash {table.get_memory_usage() / (1024 * 1024):.1f} MB: {stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['collisions']} collisions, {stats['stores']} stores")
+
+    if result.get_best_move() is None:
+        print("no legal moves")
+        return 0
+
+    print(f"best move {''.join(result.get_best_move())} score {result.get_score()} "
+          f"({result.get_nodes()} nodes in {result.get_elapsed():.3f}s, {result.get_nps():,.0f} nodes/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: A batch runner that plays many games of Xiangqi between move policies across a pool of worker
+#              processes. Finished game records are written to disk as JSON lines as soon as each game completes, and
+#              the number of games and moves played per second is reported. Records can also be written in the compact
+#              binary format of XiangqiRecords. Every game is seeded from the run's seed and its own number, so a run
+#              with the same settings plays the same games.
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from XiangqiGame import Board, XiangqiGame
+from XiangqiRecords import GameRecordWriter, encode_move
+from XiangqiSearch import PIECE_VALUES, Searcher, TranspositionTable
+
+
+# Games still unfinished after this many plies are stopped and recorded as draws.
+DEFAULT_MAX_PLIES = 300
+
+# A cardinal position within a move string such as 'h3e3'.
+_POSITION_PATTERN = re.compile(r'[a-i](?:10|[1-9])')
+
+# Games submitted to the pool at once for each worker. Enough to keep every worker busy, while the games waiting in
+# the pool, and their records, stay few however many games the run plays.
+_JOBS_PER_WORKER = 4
+
+# Depth and transposition table size used by search_policy.
+SEARCH_POLICY_DEPTH = 2
+SEARCH_POLICY_TABLE_MB = 1
+
+
+def random_policy(game, rng):
+    """ A move policy that picks one of the legal moves at random. """
+
+    return rng.choice(list(game.legal_moves()))
+
+
+def greedy_policy(game, rng):
+    """ A move policy that captures the most valuable piece it can, picking at random between equal choices, and
+    otherwise plays a random legal move. """
+
+    best_value = 0
+    best_moves = []
+
+    for pos1, pos2 in game.legal_moves():
+        piece = game._pieces.get_piece_by_pos(pos2)
+        value = 0 if piece is None else PIECE_VALUES[piece.get_type()]
+
+        if value > best_value:
+            best_value = value
+            best_moves = [(pos1, pos2)]
+        elif value == best_value:
+            best_moves.append((pos1, pos2))
+
+    return rng.choice(best_moves)
+
+
+def search_policy(game, rng):
+    """ A move policy that plays the best move found by a shallow alpha-beta search. """
+
+    return Searcher(SEARCH_POLICY_DEPTH, table=TranspositionTable(SEARCH_POLICY_TABLE_MB)).search(game).get_best_move()
+
+
+# Move policies that can be chosen by name. A policy is called with a game and a random.Random, and returns a legal
+# move for the player to move as a (pos1, pos2) tuple. Policies given to run_batch directly must be module-level
+# functions, so that worker processes can unpickle them.
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+    'search': search_policy,
+}
+
+
+def game_seed(seed, number):
+    """ Returns the seed of game number in a run with the given seed. """
+
+    return seed * 1000003 + number
+
+
+def play_game(number, red_policy, black_policy, seed=0, max_plies=DEFAULT_MAX_PLIES):
+    """ Plays one game between two move policies, given as functions or names in POLICIES, and returns its record as
+    a dictionary: the game number, its seed, the policy names, the result ('RED_WON', 'BLACK_WON', or 'DRAW'), the
+    reason the game ended (see XiangqiGame.get_end_reason, or 'MAX_PLIES' if it reached max_plies), the number of
+    plies, the moves played as strings such as 'h3e3', and the time taken. """
+
+    start = time.perf_counter()
+    rng = random.Random(game_seed(seed, number))
+    policies = [POLICIES.get(red_policy, red_policy), POLICIES.get(black_policy, black_policy)]
+
+    game = XiangqiGame()
+    moves = []
+
+    while game.get_game_state() == 'UNFINISHED' and len(moves) < max_plies:
+        pos1, pos2 = policies[len(moves) % 2](game, rng)
+
+        if game.make_move(pos1, pos2) is not True:
+            raise ValueError(f"Policy played an illegal move: {pos1}{pos2}")
+
+        moves.append(pos1 + pos2)
+
+    state = game.get_game_state()
+
+    return {
+        'game': number,
+        'seed': game_seed(seed, number),
+        'red': _policy_name(red_policy),
+        'black': _policy_name(black_policy),
+        'result': 'DRAW' if state == 'UNFINISHED' else state,
+        'reason': 'MAX_PLIES' if state == 'UNFINISHED' else game.get_end_reason(),
+        'plies': len(moves),
+        'moves': moves,
+        'seconds': round(time.perf_counter() - start, 6),
+    }
+
+
+def _policy_name(policy):
+    """ Helper function that returns the name of a policy given as a name or a function. """
+
+    return policy if isinstance(policy, str) else policy.__name__
+
+
+def run_batch(games, red_policy='random', black_policy='random', output=None, workers=None, seed=0,
+              max_plies=DEFAULT_MAX_PLIES, on_game=None, binary=False):
+    """ Plays games numbered 0 to games - 1 between two move policies across a pool of worker processes, using
+    os.cpu_count() workers if workers is None. Each record is appended to the output file as a line of JSON as soon as
+    its game finishes, so records are in order of completion, and passed to on_game if given. Only a few games per
+    worker are submitted at a time, so memory use does not grow with the number of games. If binary is True, the
+    output file is a binary game record file instead, with the rest of each record stored as its metadata. Returns a
+    dictionary of totals: games, moves, results by kind, seconds, games per second, and moves per second. """
+
+    start = time.perf_counter()
+    totals = {'games': 0, 'moves': 0, 'results': {'RED_WON': 0, 'BLACK_WON': 0, 'DRAW': 0}}
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if output is None:
+        output_file = None
+    elif binary is True:
+        output_file = GameRecordWriter(output)
+    else:
+        output_file = open(output, 'w')
+
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            numbers = iter(range(games))
+            pending = set()
+
+            while True:
+                # Keep a bounded window of games in flight, refilling it as games finish.
+                for number in numbers:
+                    pending.add(pool.submit(play_game, number, red_policy, black_policy, seed, max_plies))
+                    if len(pending) >= workers * _JOBS_PER_WORKER:
+                        break
+
+                if len(pending) == 0:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _record_game(future.result(), totals, output_file, binary, on_game)
+    finally:
+        if output_file is not None:
+            output_file.close()
+
+    elapsed = time.perf_counter() - start
+    totals['seconds'] = elapsed
+    totals['games_per_second'] = totals['games'] / elapsed if elapsed > 0 else 0.0
+    totals['moves_per_second'] = totals['moves'] / elapsed if elapsed > 0 else 0.0
+
+    return totals
+
+
+def _record_game(record, totals, output_file, binary, on_game):
+    """ Helper function for run_batch that adds a finished game's record to the totals, writes it to the output file
+    if there is one, and passes it to on_game if given. """
+
+    totals['games'] += 1
+    totals['moves'] += record['plies']
+    totals['results'][record['result']] += 1
+
+    if binary is True and output_file is not None:
+        _write_binary_record(output_file, record)
+        output_file.flush()
+    elif output_file is not None:
+        output_file.write(json.dumps(record) + '\n')
+        output_file.flush()
+
+    if on_game is not None:
+        on_game(record)
+
+
+def _write_binary_record(writer, record):
+    """ Helper function that writes a game record dictionary from play_game to a GameRecordWriter. """
+
+    moves = []
+
+    for move in record['moves']:
+        pos1, pos2 = _POSITION_PATTERN.findall(move)
+        moves.append(encode_move(Board.get_square_from_pos(pos1), Board.get_square_from_pos(pos2)))
+
+    metadata = {key: value for key, value in record.items() if key not in ('result', 'moves', 'plies')}
+    writer.write_game(moves, record['result'], metadata=metadata)
+
+
+def main(argv=None):
+    """ Command line entry point. Run with -h for usage. """
+
+    parser = argparse.ArgumentParser(description="Play a batch of Xiangqi games between move policies.")
+    parser.add_argument('games', type=int, help="number of games to play")
+    parser.add_argument('--red', choices=sorted(POLICIES), default='random', help="Red's move policy")
+    parser.add_argument('--black', choices=sorted(POLICIES), default='random', help="Black's move policy")
+    parser.add_argument('--output', default=None, help="file to write game records to, one JSON object per line")
+    parser.add_argument('--binary', action='store_true', help="write the output file in the binary game record format")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes (default: one per CPU)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the run (default 0)")
+    parser.add_argument('--max-plies', type=int, default=DEFAULT_MAX_PLIES,
+                        help=f"plies after which a game is a draw (default {DEFAULT_MAX_PLIES})")
+    args = parser.parse_args(argv)
+
+    if args.games < 1:
+        parser.error("games must be at least 1")
+
+    if args.workers is not None and args.workers < 1:
+        parser.error("workers must be at least 1")
+
+    totals = run_batch(args.games, args.red, args.black, args.output, args.workers, args.seed, args.max_plies,
+                       binary=args.binary)
+    results = totals['results']
+
+    print(f"{totals['games']} games, {totals['moves']} moves in {totals['seconds']:.3f}s "
+          f"({totals['games_per_second']:,.2f} games/s, {totals['moves_per_second']:,.0f} moves/s)")
+    print(f"red won {results['RED_WON']}, black won {results['BLACK_WON']}, drawn {results['DRAW']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,620 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: An asyncio server that hosts many games of Xiangqi in one process over a line-based TCP protocol.
+#              Each request is one line of text and gets one line back, starting with 'OK' or 'ERR'. Games live on
+#              the server, not on a connection, so two players on different connections can share a game by its id.
+#
+#              The event loop itself never runs game code. Moves and other game operations run on a small thread
+#              pool, one at a time per game, so a slow move only holds up the requests of its own game, and the loop
+#              keeps reading and answering other connections while it runs. The threads share one interpreter, so
+#              this keeps the loop responsive rather than spreading moves over more cores. That is deliberate: a move
+#              takes well under a millisecond, and the games live in this process with their move history, so sending
+#              a game to another process for each move would cost more than the move itself. Engine moves, which take
+#              far longer, are searched in a pool of worker processes from the game's FEN. The latency of every move
+#              and engine request is recorded per game and for the whole server, and reported by the STATS request.
+#
+#              Requests:
+#                  NEW [FEN]             start a game, from a position in FEN if given -> OK <game id>
+#                  FORK <id>             start a copy of a game, with its moves so far -> OK <game id>
+#                  MOVE <id> <move>      make a move such as h3e3 -> OK <game state>
+#                  UNDO <id>             take back the last move -> OK <move>
+#                  STATE <id>            -> OK <game state> <FEN>
+#                  LEGAL <id>            -> OK <move> <move> ...
+#                  ENGINE <id> [depth]   search and make a move -> OK <move> <game state>
+#                  STATS [id]            move latency of a game or the server -> OK count=.. mean_ms=.. p50_ms=.. ...
+#                  PROFILE               calls and seconds of each game stage, if the server was started with a
+#                                        profiler -> OK is_valid_move.calls=.. is_valid_move.seconds=.. ...
+#                  CLOSE <id>            end a game and free it -> OK
+#                  QUIT                  close the connection -> OK
+
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from XiangqiGame import MOVE_PATTERN, XiangqiGame
+from XiangqiProfiler import Profiler
+from XiangqiSearch import Searcher, TranspositionTable
+
+
+# The port the server listens on when no other is given.
+DEFAULT_PORT = 9090
+
+# The most games the server hosts at once, the engine's default depth and time limit, and the memory given to the
+# transposition table of each engine worker.
+DEFAULT_MAX_GAMES = 10000
+DEFAULT_ENGINE_DEPTH = 3
+DEFAULT_ENGINE_TIME = 5.0
+ENGINE_TABLE_MB = 4
+
+# How many of the most recent latencies are kept for each game and for the whole server.
+LATENCY_SAMPLES = 1024
+
+# The longest request line accepted, in bytes.
+_MAX_LINE = 4096
+
+# Where requests that fail for a reason other than a bad request are logged.
+_logger = logging.getLogger(__name__)
+
+
+class LatencyStats:
+    """ A record of how long requests took. The count and total cover every request; the percentiles and maximum
+    cover only the most recent LATENCY_SAMPLES. """
+
+    def __init__(self, samples=LATENCY_SAMPLES):
+        """ Initializes an empty record that keeps the given number of recent latencies. """
+
+        self._samples = deque(maxlen=samples)
+        self._count = 0
+        self._total = 0.0
+
+    def record(self, seconds):
+        """ Adds the latency of one request, in seconds. """
+
+        self._samples.append(seconds)
+        self._count += 1
+        self._total += seconds
+
+    def get_count(self):
+        """ Returns the number of requests recorded. """
+
+        return self._count
+
+    def get_percentile(self, percent):
+        """ Returns the latency in seconds below which the given percent of the recent requests fell, or 0.0 if none
+        have been recorded. """
+
+        if len(self._samples) == 0:
+            return 0.0
+
+        ordered = sorted(self._samples)
+
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def get_summary(self):
+        """ Returns a dictionary of the count of requests and their mean, median, 99th percentile, and maximum
+        latency in milliseconds. """
+
+        return {
+            'count': self._count,
+            'mean_ms': 1000 * self._total / self._count if self._count > 0 else 0.0,
+            'p50_ms': 1000 * self.get_percentile(50),
+            'p99_ms': 1000 * self.get_percentile(99),
+            'max_ms': 1000 * max(self._samples, default=0.0),
+        }
+
+
+class GameSession:
+    """ A game hosted by the server, with a lock that lets only one request change it at a time, and a record of the
+    latency of its moves. """
+
+    def __init__(self, game_id, game):
+        """ Initializes a session for a game. """
+
+        self._id = game_id
+        self._game = game
+        self._lock = asyncio.Lock()
+        self._stats = LatencyStats()
+
+    def get_id(self):
+        """ Returns the id of the game. """
+
+        return self._id
+
+    def get_game(self):
+        """ Returns the XiangqiGame. """
+
+        return self._game
+
+    def get_lock(self):
+        """ Returns the lock held while a request uses the game. """
+
+        return self._lock
+
+    def get_stats(self):
+        """ Returns the LatencyStats of the game's moves. """
+
+        return self._stats
+
+
+# The transposition table of an engine worker process, kept from one request to the next.
+_engine_table = None
+
+
+def _initialize_engine(table_mb):
+    """ Initializes an engine worker process with its own transposition table. """
+
+    global _engine_table
+    _engine_table = TranspositionTable(table_mb)
+
+
+def _engine_move(fen, depth, time_limit):
+    """ Task run by an engine worker process. Returns the best move found for the position given in FEN, as a (pos1,
+    pos2) tuple, or None if there is no legal move. """
+
+    game = XiangqiGame(fen=fen)
+    if game.get_game_state() != 'UNFINISHED':
+        return None
+
+    return Searcher(depth, time_limit, table=_engine_table).search(game).get_best_move()
+
+
+class GameServer:
+    """ Hosts games and answers requests for them. Requests can be sent over TCP once start has been called, or
+    passed to execute directly. """
+
+    def __init__(self, max_games=DEFAULT_MAX_GAMES, engine_workers=None, engine_depth=DEFAULT_ENGINE_DEPTH,
+                 engine_time=DEFAULT_ENGINE_TIME, game_threads=4, profiler=None):
+        """ Initializes a server that hosts up to max_games games, runs game operations on game_threads threads, and
+        searches engine moves in engine_workers processes (os.cpu_count() if None) to engine_depth plies or for
+        engine_time seconds, whichever comes first. If a Profiler is given, every hosted game reports to it. """
+
+        self._max_games = max_games
+        self._profiler = profiler
+        self._engine_depth = engine_depth
+        self._engine_time = engine_time
+        self._sessions = {}
+        self._next_id = 1
+
+        # The number of games being set up by NEW and FORK, counted against max_games before they are hosted.
+        self._reserved = 0
+
+        self._stats = LatencyStats()
+        self._game_pool = ThreadPoolExecutor(game_threads)
+        self._engine_pool = ProcessPoolExecutor(engine_workers, initializer=_initialize_engine,
+                                                initargs=(ENGINE_TABLE_MB,))
+        self._server = None
+
+        # Each request is answered by the method of its name.
+        self._handlers = {
+            'NEW': self._new,
+            'FORK': self._fork,
+            'MOVE': self._move,
+            'UNDO': self._undo,
+            'STATE': self._state,
+            'LEGAL': self._legal,
+            'ENGINE': self._engine,
+            'STATS': self._get_stats,
+            'PROFILE': self._profile,
+            'CLOSE': self._close,
+        }
+
+    def get_game_count(self):
+        """ Returns the number of games the server is hosting. """
+
+        return len(self._sessions)
+
+    def get_stats(self):
+        """ Returns the LatencyStats of every move and engine request. """
+
+        return self._stats
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """ Starts listening for connections. Returns the asyncio server, whose sockets give the port if port was 0. """
+
+        self._server = await asyncio.start_server(self._handle_connection, host, port, limit=_MAX_LINE)
+
+        return self._server
+
+    async def close(self):
+        """ Stops listening and shuts down the thread and process pools. """
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+        self._game_pool.shutdown(wait=False)
+        self._engine_pool.shutdown(wait=False, cancel_futures=True)
+
+    async def execute(self, line):
+        """ Answers one request line and returns the response line, without the line ending. """
+
+        words = line.split()
+        if len(words) == 0:
+            return "ERR empty request"
+
+        handler = self._handlers.get(words[0].upper())
+        if handler is None:
+            return f"ERR unknown request: {words[0]}"
+
+        try:
+            return await handler(words[1:])
+        except ValueError as error:
+            return f"ERR {error}"
+        except Exception as error:
+            # Anything else, such as a broken engine pool, is a fault of the server rather than of the request. It is
+            # logged, and the client still gets an answer and keeps its connection.
+            _logger.exception("Request failed: %s", line)
+            return f"ERR internal error: {type(error).__name__}"
+
+    async def _handle_connection(self, reader, writer):
+        """ Answers the requests of one connection in order until it sends QUIT or closes. """
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(b"ERR request too long\n")
+                    break
+
+                if line == b'':
+                    break
+
+                request = line.decode('utf-8', 'replace').strip()
+                if request.upper() == 'QUIT':
+                    writer.write(b"OK\n")
+                    break
+
+                writer.write((await self.execute(request) + '\n').encode('utf-8'))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _run(self, function, *args):
+        """ Helper method that runs a game operation on the thread pool and returns its result. """
+
+        return await asyncio.get_running_loop().run_in_executor(self._game_pool, function, *args)
+
+    def _get_session(self, words, count=1):
+        """ Helper method that returns the session named by the first word of a request's arguments. Raises a
+        ValueError if there are not at least count arguments, or no such game. """
+
+        if len(words) < count:
+            raise ValueError("missing arguments")
+
+        session = self._sessions.get(words[0])
+        if session is None:
+            raise ValueError(f"no game {words[0]}")
+
+        return session
+
+    async def _new(self, words):
+        """ Starts a new game. """
+
+        fen = ' '.join(words) if len(words) > 0 else None
+        self._reserve_slot()
+
+        try:
+            game = await self._run(lambda: XiangqiGame(fen=fen))
+            if self._profiler is not None:
+                game.set_profiler(self._profiler)
+            return f"OK {self._add_session(game)}"
+        finally:
+            self._reserved -= 1
+
+    async def _fork(self, words):
+        """ Starts a new game that is a copy of another, made while no other request is using it. """
+
+        session = self._get_session(words)
+        self._reserve_slot()
+
+        try:
+            async with session.get_lock():
+                self._check_open(session)
+                game = await self._run(session.get_game().clone)
+            return f"OK {self._add_session(game)}"
+        finally:
+            self._reserved -= 1
+
+    def _reserve_slot(self):
+        """ Helper method that holds a place for a game about to be added, or raises a ValueError if the server cannot
+        host another game. The place is held from before the game is set up until it is added, so requests that set
+        up games at the same time cannot together go over the limit. The caller gives the place back afterwards by
+        taking one off _reserved. """
+
+        if len(self._sessions) + self._reserved >= self._max_games:
+            raise ValueError("too many games")
+
+        self._reserved += 1
+
+    def _check_open(self, session):
+        """ Helper method that raises a ValueError if a session, whose lock the caller holds, has been closed while
+        the caller waited for it. """
+
+        if self._sessions.get(session.get_id()) is not session:
+            raise ValueError(f"no game {session.get_id()}")
+
+    def _add_session(self, game):
+        """ Helper method that hosts a game under a new id, and returns the id. """
+
+        game_id = str(self._next_id)
+        self._next_id += 1
+        self._sessions[game_id] = GameSession(game_id, game)
+
+        return game_id
+
+    async def _move(self, words):
+        """ Makes a move in a game, and records how long it took. """
+
+        session = self._get_session(words, 2)
+        match = MOVE_PATTERN.match(words[1])
+        if match is None:
+            raise ValueError(f"invalid move: {words[1]}")
+
+        start = time.perf_counter()
+
+        async with session.get_lock():
+            self._check_open(session)
+            game = session.get_game()
+            if await self._run(game.make_move, match.group(1), match.group(2)) is not True:
+                raise ValueError(f"illegal move: {words[1]}")
+            state = game.get_game_state()
+
+        self._record(session, time.perf_counter() - start)
+
+        return f"OK {state}"
+
+    async def _undo(self, words):
+        """ Takes back the last move of a game. """
+
+        session = self._get_session(words)
+
+        async with session.get_lock():
+            self._check_open(session)
+            move = await self._run(session.get_game().pop)
+
+        if move is None:
+            raise ValueError("no move to take back")
+
+        return f"OK {move[0]}{move[1]}"
+
+    async def _state(self, words):
+        """ Returns the game state and FEN of a game. """
+
+        session = self._get_session(words)
+
+        async with session.get_lock():
+            self._check_open(session)
+            game = session.get_game()
+            fen = await self._run(game.get_fen)
+
+            return f"OK {game.get_game_state()} {fen}"
+
+    async def _legal(self, words):
+        """ Returns the legal moves of a game. """
+
+        session = self._get_session(words)
+
+        async with session.get_lock():
+            self._check_open(session)
+            moves = await self._run(lambda: list(session.get_game().legal_moves()))
+
+        return 'OK ' + ' '.join(pos1 + pos2 for pos1, pos2 in moves)
+
+    async def _engine(self, words):
+        """ Searches a move for the player to move in a game on the engine pool, makes it, and records how long it
+        took. """
+
+        session = self._get_session(words)
+        depth = self._engine_depth
+
+        if len(words) > 1:
+            if not words[1].isdigit() or int(words[1]) < 1:
+                raise ValueError(f"invalid depth: {words[1]}")
+            depth = min(int(words[1]), self._engine_depth)
+
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+
+        # The game is locked for the whole search, so the move found is still legal when it is made.
+        async with session.get_lock():
+            self._check_open(session)
+            game = session.get_game()
+            if game.get_game_state() != 'UNFINISHED':
+                raise ValueError("the game is over")
+
+            fen = await self._run(game.get_fen)
+            move = await loop.run_in_executor(self._engine_pool, _engine_move, fen, depth, self._engine_time)
+            if move is None or await self._run(game.make_move, *move) is not True:
+                raise ValueError("the engine found no move")
+            state = game.get_game_state()
+
+        self._record(session, time.perf_counter() - start)
+
+        return f"OK {move[0]}{move[1]} {state}"
+
+    async def _get_stats(self, words):
+        """ Returns the move latency of a game, or of the whole server if no game is named. """
+
+        if len(words) == 0:
+            summary = self._stats.get_summary()
+            prefix = f"games={len(self._sessions)} "
+        else:
+            summary = self._get_session(words).get_stats().get_summary()
+            prefix = ''
+
+        return 'OK ' + prefix + ' '.join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                                         for key, value in summary.items())
+
+    async def _profile(self, words):
+        """ Returns the calls and seconds of each game stage reported to the server's profiler. """
+
+        if self._profiler is None:
+            raise ValueError("profiling is off")
+
+        return 'OK ' + ' '.join(f"{stage}.calls={totals['calls']} {stage}.seconds={totals['seconds']:.6f}"
+                                for stage, totals in self._profiler.to_dict().items())
+
+    async def _close(self, words):
+        """ Ends a game and frees it. """
+
+        session = self._get_session(words)
+
+        # Wait for any request using the game to finish, so that nothing changes it once it is no longer hosted.
+        async with session.get_lock():
+            self._check_open(session)
+            del self._sessions[session.get_id()]
+
+        return "OK"
+
+    def _record(self, session, seconds):
+        """ Helper method that records the latency of a request for a game and for the server. """
+
+        session.get_stats().record(seconds)
+        self._stats.record(seconds)
+
+
+async def _request(reader, writer, line):
+    """ Helper coroutine for clients that sends one request line and returns the response line. """
+
+    writer.write((line + '\n').encode('utf-8'))
+    await writer.drain()
+
+    return (await reader.readline()).decode('utf-8').strip()
+
+
+async def _play_random_games(host, port, games, max_plies, rng, stats):
+    """ Helper coroutine for run_load_test: one client that connects to the server and plays games with random legal
+    moves one after another, recording the latency of each move request as the client sees it. """
+
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 16)
+
+    try:
+        for _ in range(games):
+            game_id = (await _request(reader, writer, 'NEW')).split()[1]
+
+            for _ in range(max_plies):
+                moves = (await _request(reader, writer, f"LEGAL {game_id}")).split()[1:]
+                if len(moves) == 0:
+                    break
+
+                start = time.perf_counter()
+                response = await _request(reader, writer, f"MOVE {game_id} {rng.choice(moves)}")
+                stats.record(time.perf_counter() - start)
+
+                if response != 'OK UNFINISHED':
+                    break
+
+            await _request(reader, writer, f"CLOSE {game_id}")
+
+        await _request(reader, writer, 'QUIT')
+    finally:
+        writer.close()
+
+
+async def run_load_test(host, port, clients, games, max_plies=100, seed=0):
+    """ Connects clients to a server at once, each playing games one after another with random legal moves for up to
+    max_plies plies. Returns a tuple of the LatencyStats of the move requests as the clients saw them and the seconds
+    taken. """
+
+    stats = LatencyStats(samples=clients * games * max_plies)
+    start = time.perf_counter()
+
+    await asyncio.gather(*(_play_random_games(host, port, games, max_plies, random.Random(seed * 100003 + client),
+                                              stats)
+                           for client in range(clients)))
+
+    return stats, time.perf_counter() - start
+
+
+async def _serve(args):
+    """ Helper coroutine that runs the server until it is interrupted. """
+
+    server = GameServer(args.max_games, args.engine_workers, args.engine_depth, args.engine_time, args.threads,
+                        Profiler() if args.profile is True else None)
+    listener = await server.start(args.host, args.port)
+    print(f"listening on {', '.join(str(sock.getsockname()) for sock in listener.sockets)}")
+
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+async def _bench(args):
+    """ Helper coroutine that runs a load test, against a server started in this process unless a port is given. """
+
+    server = None
+    port = args.port
+
+    if port is None:
+        server = GameServer(max(args.clients, DEFAULT_MAX_GAMES), engine_workers=1, game_threads=args.threads)
+        port = (await server.start(args.host, 0)).sockets[0].getsockname()[1]
+
+    try:
+        stats, elapsed = await run_load_test(args.host, port, args.clients, args.games, args.max_plies, args.seed)
+    finally:
+        if server is not None:
+            await server.close()
+
+    summary = stats.get_summary()
+    print(f"{args.clients} clients, {args.clients * args.games} games, {summary['count']} moves in {elapsed:.3f}s "
+          f"({summary['count'] / elapsed:,.0f} moves/s)")
+    print(f"move latency: mean {summary['mean_ms']:.2f} ms, p50 {summary['p50_ms']:.2f} ms, "
+          f"p99 {summary['p99_ms']:.2f} ms, max {summary['max_ms']:.2f} ms")
+
+    if server is not None:
+        summary = server.get_stats().get_summary()
+        print(f"server time per move: mean {summary['mean_ms']:.2f} ms, p99 {summary['p99_ms']:.2f} ms")
+
+
+def main(argv=None):
+    """ Command line entry point. Runs the server, or a load test. Run with -h for usage. """
+
+    parser = argparse.ArgumentParser(description="Host Xiangqi games over a line-based TCP protocol.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on or connect to (default 127.0.0.1)")
+    parser.add_argument('--threads', type=int, default=4, help="threads for game operations (default 4)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help="run the server")
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default {DEFAULT_PORT})")
+    serve.add_argument('--max-games', type=int, default=DEFAULT_MAX_GAMES,
+                       help=f"most games hosted at once (default {DEFAULT_MAX_GAMES})")
+    serve.add_argument('--engine-workers', type=int, default=None,
+                       help="engine worker processes (default: one per CPU)")
+    serve.add_argument('--engine-depth', type=int, default=DEFAULT_ENGINE_DEPTH,
+                       help=f"deepest engine search allowed (default {DEFAULT_ENGINE_DEPTH})")
+    serve.add_argument('--engine-time', type=float, default=DEFAULT_ENGINE_TIME,
+                       help=f"engine time limit in seconds (default {DEFAULT_ENGINE_TIME})")
+    serve.add_argument('--profile', action='store_true', help="count calls and time of each game stage (see PROFILE)")
+
+    bench = commands.add_parser('bench', help="play random games from many concurrent clients")
+    bench.add_argument('--port', type=int, default=None, help="port of a running server (default: start one here)")
+    bench.add_argument('--clients', type=int, default=100, help="concurrent clients (default 100)")
+    bench.add_argument('--games', type=int, default=1, help="games played by each client (default 1)")
+    bench.add_argument('--max-plies', type=int, default=100, help="plies after which a game is stopped (default 100)")
+    bench.add_argument('--seed', type=int, default=0, help="seed for the random moves (default 0)")
+    args = parser.parse_args(argv)
+
+    if args.threads < 1:
+        parser.error("threads must be at least 1")
+
+    try:
+        asyncio.run(_serve(args) if args.command == 'serve' else _bench(args))
+    except KeyboardInterrupt:
+        pass
+    except OSError as error:
+        parser.error(str(error))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
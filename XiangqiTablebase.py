@@ -0,0 +1,698 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Endgame tablebases for Xiangqi, generated by retrograde analysis. A table covers every position of a
+#              small set of material, such as a Chariot against a General and two Advisors ('KR-KAA'), and stores for
+#              each one whether the player to move wins, loses, or draws, and in how many plies the game is won. Moves
+#              are generated by XiangqiGame and its pieces, so the tables follow exactly the same rules. Captures lead
+#              into the tables of smaller material, which are generated first.
+#
+#              Generation has two steps. First the moves of every position are found, in chunks that can be spread
+#              across worker processes; each chunk is saved to disk as soon as it is done, so an interrupted run picks
+#              up where it left off. Then the results are worked backward from the positions with no legal moves (in
+#              Xiangqi, stalemate loses just like checkmate): a position is won if some move reaches a lost position,
+#              and lost if every move reaches a won one. Positions never resolved are draws.
+#
+#              File layout: the 4 byte magic number b'XQT1', the length of the material name (1 byte), the name, and
+#              then one little-endian 2 byte value for each position. A value of 0 is a draw, VALUE_INVALID is a
+#              position that cannot occur, and any other value is the distance to mate in plies plus 1. A win is always
+#              an odd number of plies away and a loss an even number, so the value is even for a win and odd for a
+#              loss of the player to move.
+
+import argparse
+import functools
+import mmap
+import os
+import shutil
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from XiangqiGame import BOARD_HEIGHT, BOARD_SQUARES, BOARD_WIDTH, Advisor, Board, Elephant, General, Horse, Soldier
+from XiangqiGame import XiangqiGame, _FEN_LETTERS, _FEN_TYPES, game_from_moves
+
+
+# Marks the start of a table file, and names its version.
+MAGIC = b'XQT1'
+
+# The value of a position that cannot occur, such as one where the player not to move is in check.
+VALUE_INVALID = 0xFFFF
+
+# How many positions each worker finds the moves of at a time. Each chunk is saved to disk when it is done.
+CHUNK_SIZE = 4096
+
+# The order of the pieces of each side in a material name, by FEN letter, after the General.
+_LETTER_ORDER = 'KABNRCP'
+
+# The move tables of the fixed-pattern pieces, used to find the squares each can ever stand on. Chariots and Cannons
+# can stand anywhere.
+_MOVE_TABLES = {
+    'G': General._MOVES,
+    'A': Advisor._MOVES,
+    'E': Elephant._MOVES,
+    'H': {'R': Horse._MOVES, 'B': Horse._MOVES},
+    'S': Soldier._MOVES,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _reachable_squares(kind):
+    """ Helper function that returns a sorted tuple of the squares a kind of piece (type and color, e.g. 'AR') can
+    stand on, found by following its move table from the squares it starts the game on. Each kind is only worked out
+    once. """
+
+    if kind[0] not in _MOVE_TABLES:
+        return tuple(range(BOARD_SQUARES))
+
+    table = _MOVE_TABLES[kind[0]][kind[1]]
+    found = {sq for sq, label in enumerate(Board().get_squares()) if label[:2] == kind}
+    frontier = list(found)
+
+    while len(frontier) > 0:
+        for dest in table[frontier.pop()]:
+            if dest not in found:
+                found.add(dest)
+                frontier.append(dest)
+
+    return tuple(sorted(found))
+
+
+class Material:
+    """ A set of material covered by one table, named by the FEN letters of each side's pieces with Red's first,
+    e.g. 'KR-KAA' for a Red General and Chariot against a Black General and two Advisors. Each position of the material
+    has an index in the table, built from the square of each piece and the player to move. """
+
+    def __init__(self, name):
+        """ Initializes a material from its name. Raises a ValueError if the name is not valid, or if a side does not
+        have exactly one General. """
+
+        sides = name.upper().split('-')
+        if len(sides) != 2 or any(letter not in _LETTER_ORDER for side in sides for letter in side):
+            raise ValueError(f"Invalid material: {name}")
+
+        if sides[0].count('K') != 1 or sides[1].count('K') != 1:
+            raise ValueError(f"Invalid material, each side needs one General: {name}")
+
+        # Each piece is a slot with its kind and the squares it can stand on. Identical pieces are next to each other,
+        # and their squares are kept in increasing order, so that each position has one index.
+        self._sides = tuple(''.join(sorted(side, key=_LETTER_ORDER.index)) for side in sides)
+        self._kinds = tuple(_FEN_TYPES[letter.lower()] + color
+                            for side, color in zip(self._sides, 'RB') for letter in side)
+        self._squares = tuple(_reachable_squares(kind) for kind in self._kinds)
+        self._square_indexes = tuple({sq: index for index, sq in enumerate(squares)} for squares in self._squares)
+
+        self._size = 2
+        for squares in self._squares:
+            self._size *= len(squares)
+
+        # The materials left after each capture, by slot, made as they are asked for. See without.
+        self._without = {}
+
+    def get_name(self):
+        """ Returns the name of the material, with each side's pieces in a fixed order. """
+
+        return '-'.join(self._sides)
+
+    def get_kinds(self):
+        """ Returns the kind of each piece (type and color, e.g. 'CR'), in the order of its slot. """
+
+        return self._kinds
+
+    def get_size(self):
+        """ Returns the number of positions in a table of this material, including those that cannot occur. """
+
+        return self._size
+
+    def is_canonical(self):
+        """ Returns True if tables are kept for this material. A material whose Black side is stronger is looked up in
+        the table of the material with the colors swapped, with the board turned around. """
+
+        return (len(self._sides[0]), self._sides[0]) >= (len(self._sides[1]), self._sides[1])
+
+    def get_flipped(self):
+        """ Returns the material with the colors swapped. """
+
+        return Material(self._sides[1] + '-' + self._sides[0])
+
+    def get_index(self, squares, red_to_move):
+        """ Returns the index of the position with the pieces on the given squares, in slot order, and the given player
+        to move. The squares of identical pieces may be given in any order. """
+
+        squares = self.canonical_squares(squares)
+        index = 0
+
+        for slot, sq in enumerate(squares):
+            index = index * len(self._squares[slot]) + self._square_indexes[slot][sq]
+
+        return index * 2 + (0 if red_to_move else 1)
+
+    def get_position(self, index):
+        """ Returns a tuple of the squares of the pieces, in slot order, and True if Red is to move, for an index. """
+
+        index, side = divmod(index, 2)
+        squares = []
+
+        for slot in range(len(self._squares) - 1, -1, -1):
+            index, square_index = divmod(index, len(self._squares[slot]))
+            squares.append(self._squares[slot][square_index])
+
+        return tuple(reversed(squares)), side == 0
+
+    def canonical_squares(self, squares):
+        """ Returns the squares of the pieces with those of identical pieces in increasing order. """
+
+        squares = list(squares)
+        start = 0
+
+        while start < len(squares):
+            end = start + 1
+            while end < len(squares) and self._kinds[end] == self._kinds[start]:
+                end += 1
+            squares[start:end] = sorted(squares[start:end])
+            start = end
+
+        return tuple(squares)
+
+    def is_placement(self, squares):
+        """ Returns True if the squares are all different, and those of identical pieces are in increasing order. """
+
+        return len(set(squares)) == len(squares) and self.canonical_squares(squares) == tuple(squares)
+
+    def get_fen(self, squares, red_to_move):
+        """ Returns the FEN of the position with the pieces on the given squares and the given player to move. """
+
+        letters = ['1'] * BOARD_SQUARES
+        for kind, sq in zip(self._kinds, squares):
+            letter = _FEN_LETTERS[kind[0]]
+            letters[sq] = letter.upper() if kind[1] == 'R' else letter
+
+        ranks = []
+        for row in range(BOARD_HEIGHT - 1, -1, -1):
+            rank = ''.join(letters[row * BOARD_WIDTH:(row + 1) * BOARD_WIDTH])
+            for run in range(BOARD_WIDTH, 1, -1):
+                rank = rank.replace('1' * run, str(run))
+            ranks.append(rank)
+
+        return f"{'/'.join(ranks)} {'w' if red_to_move else 'b'}"
+
+    def without(self, slot):
+        """ Returns the material left after the piece in the given slot is captured. Each is only made once. """
+
+        material = self._without.get(slot)
+
+        if material is None:
+            sides = list(self._sides)
+            color = 0 if self._kinds[slot][1] == 'R' else 1
+            letter = _FEN_LETTERS[self._kinds[slot][0]].upper()
+            sides[color] = sides[color].replace(letter, '', 1)
+            material = self._without[slot] = Material('-'.join(sides))
+
+        return material
+
+
+def material_of(game):
+    """ Returns the Material of the current position of a game, and a tuple of the squares of its pieces in slot
+    order. """
+
+    pieces = sorted(game._pieces.get_all_pieces().values(),
+                    key=lambda piece: (piece.get_color() != 'R', _LETTER_ORDER.index(_FEN_LETTERS[piece.get_type()]
+                                                                                     .upper())))
+    sides = ['', '']
+    for piece in pieces:
+        sides[0 if piece.get_color() == 'R' else 1] += _FEN_LETTERS[piece.get_type()].upper()
+
+    return Material('-'.join(sides)), tuple(piece.get_square() for piece in pieces)
+
+
+def _flip(material, squares, red_to_move):
+    """ Helper function that turns a position around: the colors are swapped and each piece moves to the same column
+    on the mirrored row. Returns the flipped material, squares in its slot order, and player to move. """
+
+    flipped = material.get_flipped()
+    red_count = len(material.get_name().split('-')[0])
+    turned = tuple((BOARD_HEIGHT - 1 - sq // BOARD_WIDTH) * BOARD_WIDTH + sq % BOARD_WIDTH for sq in squares)
+
+    return flipped, turned[red_count:] + turned[:red_count], not red_to_move
+
+
+def decode_value(value):
+    """ Returns the result for the player to move of a table value, as a tuple of 'WIN', 'LOSS', or 'DRAW' and the
+    distance to mate in plies (None for a draw). Returns None for VALUE_INVALID. """
+
+    if value == VALUE_INVALID:
+        return None
+
+    if value == 0:
+        return 'DRAW', None
+
+    return ('WIN' if value % 2 == 0 else 'LOSS'), value - 1
+
+
+class Tablebase:
+    """ The tables in a directory, opened as they are needed and read from memory maps. Can be used as a context
+    manager, which closes the files. """
+
+    def __init__(self, directory):
+        """ Initializes a tablebase reading the tables in the given directory. """
+
+        self._directory = directory
+        self._tables = {}
+
+    def __enter__(self):
+        """ Returns the tablebase for use in a with statement. """
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """ Closes the tablebase at the end of a with statement. """
+
+        self.close()
+
+    def has_table(self, material):
+        """ Returns True if the directory has the table a material is looked up in. """
+
+        name = (material if material.is_canonical() else material.get_flipped()).get_name()
+
+        return name in self._tables or os.path.exists(table_path(self._directory, name))
+
+    def probe(self, game):
+        """ Returns the result of the current position of game for the player to move, as a tuple of 'WIN', 'LOSS', or
+        'DRAW' and the distance to mate in plies (None for a draw), or None if there is no table for its material. """
+
+        material, squares = material_of(game)
+        if not self.has_table(material):
+            return None
+
+        return decode_value(self.probe_value(material, squares, game._current_player == 'R'))
+
+    def best_move(self, game):
+        """ Returns the move that keeps the best result for the player to move, as a (pos1, pos2) tuple: the quickest
+        win, else a draw, else the slowest loss. Returns None if there is no table for a position reached, or no legal
+        move. """
+
+        best = None
+        best_rank = None
+
+        for sq1, sq2 in list(game._legal_moves()):
+            game._apply_move(sq1, sq2)
+            game._switch_player()
+            result = self.probe(game)
+            game._switch_player()
+            game._undo_move()
+
+            if result is None:
+                return None
+
+            # Rank the reply by how good it is for the opponent, who is to move after it: lower is better for us.
+            outcome, distance = result
+            rank = (-1, distance) if outcome == 'LOSS' else (0, 0) if outcome == 'DRAW' else (1, -distance)
+            if best_rank is None or rank < best_rank:
+                best = (Board.get_pos_from_square(sq1), Board.get_pos_from_square(sq2))
+                best_rank = rank
+
+        return best
+
+    def probe_value(self, material, squares, red_to_move):
+        """ Returns the table value of a position, given its material, the squares of its pieces in slot order, and
+        the player to move. Raises a ValueError if there is no table for the material. """
+
+        if not material.is_canonical():
+            material, squares, red_to_move = _flip(material, squares, red_to_move)
+
+        name = material.get_name()
+        if name not in self._tables:
+            self._tables[name] = _TableFile(table_path(self._directory, name), material)
+
+        return self._tables[name].get_value(material.get_index(squares, red_to_move))
+
+    def close(self):
+        """ Closes every table opened. """
+
+        for table in self._tables.values():
+            table.close()
+        self._tables = {}
+
+
+class _TableFile:
+    """ One table file, read from a memory map. """
+
+    def __init__(self, path, material):
+        """ Opens and memory-maps a table file. Raises a ValueError if it is missing or is not a complete table of the
+        material. """
+
+        if not os.path.exists(path):
+            raise ValueError(f"No table for {material.get_name()}")
+
+        self._file = open(path, 'rb')
+        name = material.get_name().encode('ascii')
+        self._start = len(MAGIC) + 1 + len(name)
+
+        # A file of the wrong size, such as an empty one left by an interrupted run, which could not even be
+        # memory-mapped, is turned down before it is mapped.
+        if os.fstat(self._file.fileno()).st_size != self._start + 2 * material.get_size():
+            self._file.close()
+            raise ValueError(f"Not a complete table for {material.get_name()}: {path}")
+
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:self._start] != MAGIC + bytes([len(name)]) + name:
+            self.close()
+            raise ValueError(f"Not a complete table for {material.get_name()}: {path}")
+
+    def get_value(self, index):
+        """ Returns the value of the position with the given index. """
+
+        offset = self._start + 2 * index
+
+        return self._map[offset] | self._map[offset + 1] << 8
+
+    def close(self):
+        """ Closes the memory map and the file. """
+
+        self._map.close()
+        self._file.close()
+
+
+def table_path(directory, name):
+    """ Returns the path of the table file of the material with the given name. """
+
+    return os.path.join(directory, name + '.xqt')
+
+
+def generate(name, directory, workers=None, on_progress=None):
+    """ Generates the table of a material, given by name, in directory, after first generating the tables of every
+    smaller material a capture can lead to. Tables already in the directory are kept, and the chunks of work saved by
+    an interrupted run are reused. Moves are found by a pool of worker processes, using os.cpu_count() workers if
+    workers is None. on_progress, if given, is called with a message as each table is started and finished. Returns a
+    list of the names of the tables generated. """
+
+    material = Material(name)
+    if not material.is_canonical():
+        material = material.get_flipped()
+
+    if os.path.exists(table_path(directory, material.get_name())):
+        return []
+
+    generated = []
+
+    # Every table a capture leads to comes first.
+    for slot, kind in enumerate(material.get_kinds()):
+        if kind[0] != 'G':
+            generated += generate(material.without(slot).get_name(), directory, workers, on_progress)
+
+    if os.path.exists(table_path(directory, material.get_name())):
+        return generated
+
+    os.makedirs(directory, exist_ok=True)
+    _generate_table(material, directory, workers or os.cpu_count() or 1, on_progress)
+
+    return generated + [material.get_name()]
+
+
+def _generate_table(material, directory, workers, on_progress):
+    """ Helper function that generates one table, whose smaller tables already exist. """
+
+    name = material.get_name()
+    size = material.get_size()
+    work = table_path(directory, name) + '.work'
+    os.makedirs(work, exist_ok=True)
+
+    start = time.perf_counter()
+    if on_progress is not None:
+        on_progress(f"{name}: {size} positions")
+
+    # Find the moves of every position, one chunk at a time. Chunks saved by an earlier run are skipped.
+    chunks = [(chunk, min(chunk + CHUNK_SIZE, size)) for chunk in range(0, size, CHUNK_SIZE)]
+    missing = [(first, last) for first, last in chunks if not os.path.exists(_chunk_path(work, first))]
+
+    if workers > 1 and len(missing) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            for _ in pool.map(_generate_chunk, [(name, directory, first, last) for first, last in missing]):
+                pass
+    else:
+        for first, last in missing:
+            _generate_chunk((name, directory, first, last))
+
+    moves = []
+    for first, last in chunks:
+        chunk_moves = array('i')
+        with open(_chunk_path(work, first), 'rb') as file:
+            chunk_moves.frombytes(file.read())
+        moves.append(chunk_moves)
+
+    values = _retrograde(size, moves)
+
+    # Write the table under a temporary name first, so a table file is only ever complete.
+    encoded = name.encode('ascii')
+    if sys.byteorder != 'little':
+        values.byteswap()
+
+    temporary = table_path(directory, name) + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(MAGIC + bytes([len(encoded)]) + encoded)
+        file.write(values.tobytes())
+
+    os.replace(temporary, table_path(directory, name))
+    shutil.rmtree(work)
+
+    if on_progress is not None:
+        on_progress(f"{name}: done in {time.perf_counter() - start:.1f}s")
+
+
+def _chunk_path(work, first):
+    """ Helper function that returns the path of the saved moves of the chunk starting at the given index. """
+
+    return os.path.join(work, f"{first}.bin")
+
+
+def _generate_chunk(task):
+    """ Helper function, run by workers, that finds the moves of the positions in one chunk and saves them. task is a
+    tuple of the material name, the directory, and the first and last (excluded) indexes of the chunk.
+
+    The moves are saved as one array of ints. For each position, the number of its legal moves comes first, or -1 if
+    the position cannot occur. Then, for each move, the index of the position it leads to, or, for a capture, -1 less
+    the value of the position it leads to in the smaller table. """
+
+    name, directory, first, last = task
+    material = Material(name)
+    moves = array('i')
+
+    with Tablebase(directory) as tablebase:
+        for index in range(first, last):
+            squares, red_to_move = material.get_position(index)
+            if not material.is_placement(squares):
+                moves.append(-1)
+                continue
+
+            # A position in which the player not to move is in check cannot occur.
+            try:
+                game = XiangqiGame(fen=material.get_fen(squares, red_to_move))
+            except ValueError:
+                moves.append(-1)
+                continue
+
+            legal_moves = list(game._legal_moves())
+            moves.append(len(legal_moves))
+            slots = {sq: slot for slot, sq in enumerate(squares)}
+
+            for sq1, sq2 in legal_moves:
+                after = list(squares)
+                after[slots[sq1]] = sq2
+
+                if sq2 not in slots:
+                    moves.append(material.get_index(after, not red_to_move))
+                    continue
+
+                captured = slots[sq2]
+                del after[captured]
+                value = tablebase.probe_value(material.without(captured), after, not red_to_move)
+                moves.append(-1 - value)
+
+    path = _chunk_path(table_path(directory, name) + '.work', first)
+    if sys.byteorder != 'little':
+        moves.byteswap()
+
+    with open(path + '.tmp', 'wb') as file:
+        file.write(moves.tobytes())
+    os.replace(path + '.tmp', path)
+
+    return last - first
+
+
+def _retrograde(size, chunks):
+    """ Helper function that works the results of every position backward from the positions with no legal moves,
+    given the saved moves of each chunk. Returns an array of the table value of each position. """
+
+    values = array('H', [0]) * size
+    remaining = array('i', [0]) * size
+    longest_loss = array('i', [0]) * size
+    resolved = bytearray(size)
+
+    # Positions are resolved in order of their distance to mate. Each bucket holds the positions first found to be
+    # won or lost at that distance; won positions have odd distances and lost ones even.
+    buckets = {}
+
+    def _push(index, distance):
+        """ Adds a position to the bucket of its distance to mate. """
+
+        buckets.setdefault(distance, []).append(index)
+
+    # The moves within this table, as a list of successors and one of predecessors, each indexed by position.
+    successors = array('i')
+    offsets = array('q', [0]) * (size + 1)
+    index = 0
+
+    for chunk in chunks:
+        position = 0
+        while position < len(chunk):
+            count = chunk[position]
+            position += 1
+
+            if count < 0:
+                values[index] = VALUE_INVALID
+                resolved[index] = 1
+            elif count == 0:
+                _push(index, 0)
+            else:
+                remaining[index] = count
+
+                for move in chunk[position:position + count]:
+                    if move >= 0:
+                        successors.append(move)
+                        continue
+
+                    # A capture's result is already known from the smaller table.
+                    outcome = decode_value(-1 - move)
+                    if outcome[0] == 'LOSS':
+                        _push(index, outcome[1] + 1)
+                    elif outcome[0] == 'WIN':
+                        remaining[index] -= 1
+                        longest_loss[index] = max(longest_loss[index], outcome[1] + 1)
+
+                if remaining[index] == 0:
+                    _push(index, longest_loss[index])
+
+                position += count
+
+            index += 1
+            offsets[index] = len(successors)
+
+    # Invert the successors, counting the predecessors of each position first.
+    predecessor_offsets = array('q', [0]) * (size + 1)
+    for successor in successors:
+        predecessor_offsets[successor + 1] += 1
+    for index in range(size):
+        predecessor_offsets[index + 1] += predecessor_offsets[index]
+
+    predecessors = array('i', [0]) * len(successors)
+    filled = array('q', predecessor_offsets[:size])
+    for index in range(size):
+        for successor in successors[offsets[index]:offsets[index + 1]]:
+            predecessors[filled[successor]] = index
+            filled[successor] += 1
+
+    distance = 0
+    while len(buckets) > 0:
+        for index in buckets.pop(distance, []):
+            if resolved[index]:
+                continue
+
+            resolved[index] = 1
+            values[index] = distance + 1
+
+            for predecessor in predecessors[predecessor_offsets[index]:predecessor_offsets[index + 1]]:
+                if resolved[predecessor]:
+                    continue
+
+                # A move into a lost position wins. Once every move leads into a won position, the position is lost.
+                if distance % 2 == 0:
+                    _push(predecessor, distance + 1)
+                else:
+                    remaining[predecessor] -= 1
+                    longest_loss[predecessor] = max(longest_loss[predecessor], distance + 1)
+                    if remaining[predecessor] == 0:
+                        _push(predecessor, longest_loss[predecessor])
+
+        distance += 1
+
+    return values
+
+
+def main(argv=None):
+    """ Command line entry point. Generates a table, or probes a position. Run with -h for usage. """
+
+    parser = argparse.ArgumentParser(description="Generate or probe Xiangqi endgame tablebases.")
+    parser.add_argument('--dir', default='tablebases', help="directory of the tables (default: tablebases)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate_command = commands.add_parser('generate', help="generate the table of a material, e.g. KR-KAA")
+    generate_command.add_argument('material', help="the FEN letters of each side's pieces, Red's first")
+    generate_command.add_argument('--workers', type=int, default=None,
+                                  help="number of worker processes (default: one per CPU)")
+
+    probe = commands.add_parser('probe', help="look up a position")
+    probe.add_argument('fen', help="the position, in FEN")
+    probe.add_argument('--moves', nargs='+', default=[], metavar='MOVE',
+                       help="moves played from the position first, e.g. e2e3")
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        if args.workers is not None and args.workers < 1:
+            parser.error("workers must be at least 1")
+
+        try:
+            generated = generate(args.material, args.dir, args.workers, print)
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+
+        if len(generated) == 0:
+            print("already generated")
+            return 0
+
+        material = Material(args.material)
+        if not material.is_canonical():
+            material = material.get_flipped()
+
+        _print_summary(material, args.dir)
+        return 0
+
+    try:
+        game = game_from_moves(args.moves, args.fen)
+        with Tablebase(args.dir) as tablebase:
+            result = tablebase.probe(game)
+            best = None if result is None else tablebase.best_move(game)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    if result is None:
+        print(f"no table for {material_of(game)[0].get_name()}")
+        return 1
+
+    outcome, distance = result
+    print(outcome if distance is None else f"{outcome} in {distance} plies")
+    if best is not None:
+        print(f"best move: {best[0]}{best[1]}")
+
+    return 0
+
+
+def _print_summary(material, directory):
+    """ Helper function that prints the number of won, drawn, and lost positions of a table, and its longest mate. """
+
+    counts = {'WIN': 0, 'DRAW': 0, 'LOSS': 0}
+    longest = 0
+
+    table = _TableFile(table_path(directory, material.get_name()), material)
+    for index in range(material.get_size()):
+        result = decode_value(table.get_value(index))
+        if result is not None:
+            counts[result[0]] += 1
+            longest = max(longest, result[1] or 0)
+    table.close()
+
+    print(f"{material.get_name()}: {counts['WIN']} won, {counts['DRAW']} drawn, {counts['LOSS']} lost "
+          f"for the player to move; longest mate {longest} plies")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Tests for opening books: building a book from game records and looking moves up in it.
+
+import random
+
+import pytest
+
+from XiangqiBook import MAGIC, OpeningBook, build_book, choose_book_move
+from XiangqiGame import MOVE_PATTERN, Board, game_from_moves
+from XiangqiRecords import GameRecordWriter, encode_move
+
+
+# The games the book is built from, as their moves and results.
+GAMES = [
+    (['h3e3', 'h10g8', 'h1g3'], 'RED_WON'),
+    (['h3e3', 'h10g8', 'b1c3'], 'BLACK_WON'),
+    (['h3e3', 'b10c8'], 'DRAW'),
+    (['b3e3', 'h10g8'], 'RED_WON'),
+]
+
+
+def _counts(moves):
+    """ Returns each book move as a tuple of its move, games, wins, draws, and losses. """
+
+    return [(''.join(move.get_move()), move.get_games(), move.get_wins(), move.get_draws(), move.get_losses())
+            for move in moves]
+
+
+@pytest.fixture
+def records(tmp_path):
+    """ A game record file holding GAMES. """
+
+    path = str(tmp_path / 'games.xqr')
+
+    with GameRecordWriter(path) as writer:
+        for moves, result in GAMES:
+            squares = [map(Board.get_square_from_pos, MOVE_PATTERN.match(move).groups()) for move in moves]
+            writer.write_game([encode_move(*move) for move in squares], result)
+
+    return path
+
+
+def test_build_and_look_up(tmp_path, records):
+    """ A book holds the first max_plies moves of every game, with their games, wins, and draws counted for the
+    player who moved, most played first. Positions past max_plies are not in it. """
+
+    path = str(tmp_path / 'book.xqb')
+    assert build_book([records], path, max_plies=2) == (4, 5)
+
+    with OpeningBook(path) as book:
+        start = game_from_moves([])
+        assert _counts(book.lookup(start.get_hash())) == [('h3e3', 3, 1, 1, 1), ('b3e3', 1, 1, 0, 0)]
+        assert _counts(start.get_book_moves(book)) == _counts(book.lookup(start.get_hash()))
+
+        reply = game_from_moves(['h3e3'])
+        assert _counts(reply.get_book_moves(book)) == [('h10g8', 2, 1, 0, 1), ('b10c8', 1, 0, 1, 0)]
+
+        past_book = game_from_moves(['h3e3', 'h10g8'])
+        assert book.lookup(past_book.get_hash()) == []
+        assert past_book.get_book_moves(book) == []
+        assert choose_book_move(past_book, book, random.Random(0)) is None
+
+
+def test_min_games(tmp_path, records):
+    """ Moves played in fewer than min_games games are left out of the book, and out of the moves chosen from it. """
+
+    path = str(tmp_path / 'book.xqb')
+    assert build_book([records], path, max_plies=2, min_games=2) == (4, 2)
+
+    with OpeningBook(path) as book:
+        assert _counts(game_from_moves([]).get_book_moves(book)) == [('h3e3', 3, 1, 1, 1)]
+        assert choose_book_move(game_from_moves(['h3e3']), book, random.Random(0)) == ('h10', 'g8')
+        assert choose_book_move(game_from_moves([]), book, random.Random(0), min_games=4) is None
+
+
+def test_choose_book_move_is_seeded(tmp_path, records):
+    """ choose_book_move picks among the book moves, the same way for the same seed, and in proportion to how often
+    each was played. """
+
+    path = str(tmp_path / 'book.xqb')
+    build_book([records], path, max_plies=2)
+
+    with OpeningBook(path) as book:
+        start = game_from_moves([])
+        rng = random.Random(7)
+        choices = [choose_book_move(start, book, rng) for _ in range(200)]
+
+        assert set(choices) == {('h3', 'e3'), ('b3', 'e3')}
+        assert choose_book_move(start, book, random.Random(7)) == choices[0]
+        assert choices.count(('h3', 'e3')) > choices.count(('b3', 'e3'))
+
+
+@pytest.mark.parametrize('contents', [b'', MAGIC, MAGIC + b'\x00\x00'])
+def test_book_rejects_short_files(tmp_path, contents):
+    """ An empty file, or one that ends before the end of its header, is turned down with the same error. """
+
+    path = tmp_path / 'book.xqb'
+    path.write_bytes(contents)
+
+    with pytest.raises(ValueError, match="Not an opening book file"):
+        OpeningBook(str(path))
+
+
+def test_book_rejects_incomplete_files(tmp_path):
+    """ A book file with fewer entries than its header promises is turned down. """
+
+    path = tmp_path / 'book.xqb'
+    path.write_bytes(MAGIC + b'\x01\x00\x00\x00')
+
+    with pytest.raises(ValueError, match="incomplete"):
+        OpeningBook(str(path))
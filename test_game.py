@@ -0,0 +1,234 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Tests for XiangqiGame beyond move generation, which test_perft covers: its accessors, how games end
+#              by repetition, and setting up positions from FEN.
+
+import random
+
+import pytest
+
+from XiangqiGame import MOVE_PATTERN, START_FEN, XiangqiGame
+
+
+def test_position_keyed_views():
+    """ The position-keyed accessors agree with the square-indexed ones they wrap. """
+
+    pieces = XiangqiGame()._pieces
+
+    assert pieces.get_pieces_by_pos()['e1'].get_label() == 'GR1'
+    assert len(pieces.get_pieces_by_pos()) == 32
+    assert ('h3', 'e3') in pieces.get_all_possible_moves_by_pos('R')
+    assert len(pieces.get_all_possible_moves_by_pos('R')) == len(pieces.get_all_possible_moves('R'))
+    assert set(pieces.get_attack_map_by_pos('R')['e3']) == {'ER1', 'ER2', 'NR1', 'NR2'}
+
+    pieces.update_pos('a1', 'a2')
+    assert pieces.get_piece_by_pos('a2').get_label() == 'CR1'
+    assert pieces.get_piece_by_pos('a1') is None
+
+
+def test_board_position_and_square_queries():
+    """ The position-based Board queries agree with their square-based versions. """
+
+    board = XiangqiGame()._board
+
+    assert board.is_in_palace('e1', 'R') is True
+    assert board.is_in_palace('e1', 'B') is False
+    assert board.is_in_palace('e10', 'B') is True
+    assert board.is_in_palace('z9', 'R') is False
+    assert board.is_square_in_palace(board.get_square_from_pos('f3'), 'R') is True
+
+    assert board.is_behind_river('e1', 'R') is True
+    assert board.is_behind_river('e6', 'R') is False
+    assert board.is_behind_river('e6', 'B') is True
+    assert board.is_square_behind_river(board.get_square_from_pos('a5'), 'R') is True
+    assert board.is_square_behind_river(board.get_square_from_pos('a5'), 'B') is False
+
+
+def _play(game, moves):
+    """ Makes moves given as strings such as 'h3e3', checking that each one is legal, and returns the game. """
+
+    for move in moves:
+        assert game.make_move(*MOVE_PATTERN.match(move).groups()) is True, move
+
+    return game
+
+
+# Both Horses out and back, twice, which reaches the starting position a third time.
+HORSE_SHUFFLE = ['h1g3', 'h10g8', 'g3h1', 'g8h10'] * 2
+
+
+def test_threefold_repetition_is_a_draw():
+    """ Reaching the same position a third time with quiet moves draws the game. """
+
+    game = _play(XiangqiGame(), HORSE_SHUFFLE)
+
+    assert game.get_repetition_count() == 3
+    assert game.get_game_state() == 'DRAW'
+    assert game.get_end_reason() == 'REPETITION'
+
+
+def test_repetition_limit_none_never_adjudicates():
+    """ With repetition_limit=None, a repeated position does not end the game. """
+
+    game = _play(XiangqiGame(repetition_limit=None), HORSE_SHUFFLE * 2)
+
+    assert game.get_repetition_count() == 5
+    assert game.get_game_state() == 'UNFINISHED'
+    assert game.get_end_reason() is None
+
+
+def test_perpetual_check_loses():
+    """ A player who repeats the position by checking with every move loses. """
+
+    game = _play(XiangqiGame(fen='4k4/R8/9/9/9/9/9/9/9/3K5 w - - 0 1'), ['a9a10', 'e10e9', 'a10a9', 'e9e10'] * 2)
+
+    assert game.get_game_state() == 'BLACK_WON'
+    assert game.get_end_reason() == 'PERPETUAL_CHECK'
+
+
+def test_perpetual_chase_loses():
+    """ A player who repeats the position by attacking the same undefended piece with every move loses. """
+
+    game = _play(XiangqiGame(fen='4k4/9/n8/9/9/9/9/9/9/2RK5 w - - 0 1'), ['c1a1', 'a8c7', 'a1c1', 'c7a8'] * 2)
+
+    assert game.get_game_state() == 'BLACK_WON'
+    assert game.get_end_reason() == 'PERPETUAL_CHASE'
+
+
+def test_pop_reopens_adjudicated_game():
+    """ Taking back the move that ended a game by repetition makes it unfinished again. """
+
+    game = _play(XiangqiGame(), HORSE_SHUFFLE)
+    game.pop()
+
+    assert game.get_game_state() == 'UNFINISHED'
+    assert game.get_repetition_count() == 2
+
+
+def test_fen_round_trip():
+    """ A game set up from the FEN of another game's position has the same position, player to move, move counters,
+    hash, and legal moves. """
+
+    game = XiangqiGame()
+    assert game.get_fen() == START_FEN
+
+    for move in ['h3e3', 'h10g8', 'e3e7', 'a10a9', 'b1c3']:
+        _play(game, [move])
+        copy = XiangqiGame(fen=game.get_fen())
+
+        assert copy.get_fen() == game.get_fen()
+        assert copy.get_hash() == game.get_hash()
+        assert copy.get_game_state() == game.get_game_state()
+        assert sorted(copy.legal_moves()) == sorted(game.legal_moves())
+
+    assert game.get_fen().split()[1:] == ['b', '-', '-', '2', '3']
+
+
+@pytest.mark.parametrize('fen, message', [
+    ('4k4/9/9/9/9/9/9/9/3K5 w - - 0 1', 'expected 10 ranks'),
+    ('4k4/9/9/9/9/9/9/9/9/9/3K5 w - - 0 1', 'expected 10 ranks'),
+    ('RRR1k4/9/9/9/9/9/9/9/9/3K5 w - - 0 1', 'too many pieces'),
+    ('4k4/9/9/9/9/9/9/9/9/4K4 w - - 0 1', 'not to move is in check'),
+    ('4k4/9/9/9/9/4B4/9/9/9/3K5 w - - 0 1', 'stands where it never could'),
+    ('4k4/9/9/9/9/9/1P7/9/9/3K5 w - - 0 1', 'stands where it never could'),
+    ('4k4/9/9/9/9/9/9/9/9/K8 w - - 0 1', 'stands where it never could'),
+    ('9/9/9/9/9/9/9/9/9/3K5 w - - 0 1', 'one General'),
+    ('4k4/9/9/9/9/9/9/9/9/3K6 w - - 0 1', 'Invalid FEN rank'),
+])
+def test_invalid_fen_is_rejected(fen, message):
+    """ A FEN that is malformed or describes a position no game can reach raises a ValueError saying why. """
+
+    with pytest.raises(ValueError, match=message):
+        XiangqiGame(fen=fen)
+
+
+def test_discovered_perpetual_chase_loses():
+    """ A chase discovered by moving a screen out of a Chariot's line counts as a chase: here the Horse uncovers an
+    attack on an undefended Black Horse with every move. """
+
+    game = _play(XiangqiGame(fen='4k4/9/n1n6/9/9/9/9/N8/9/R1R2K3 w - - 0 1'), ['a3c2', 'e10d10', 'c2a3', 'd10e10'] * 2)
+
+    assert game.get_game_state() == 'BLACK_WON'
+    assert game.get_end_reason() == 'PERPETUAL_CHASE'
+
+
+def test_clone_is_independent():
+    """ Moves made or taken back in a clone leave the original as it was, and the other way around. """
+
+    game = _play(XiangqiGame(), ['h3e3', 'h10g8', 'h1g3'])
+    fen = game.get_fen()
+    position_hash = game.get_hash()
+    copy = game.clone()
+
+    assert copy.get_fen() == fen
+    assert copy.get_hash() == position_hash
+
+    _play(copy, ['i10h10', 'e3e7', 'a7a6'])
+    assert copy.pop() == ('a7', 'a6')
+    assert game.get_fen() == fen
+    assert game.get_hash() == position_hash
+    assert game.get_repetition_count() == 1
+
+    copy_fen = copy.get_fen()
+    copy_hash = copy.get_hash()
+
+    _play(game, ['b10c8', 'b3d3'])
+    assert game.pop() == ('b3', 'd3')
+    assert copy.get_fen() == copy_fen
+    assert copy.get_hash() == copy_hash
+    assert copy.pop() == ('e3', 'e7')
+    assert copy.pop() == ('i10', 'h10')
+    assert copy.get_fen() == fen
+
+    assert game.pop() == ('b10', 'c8')
+    assert game.pop() == ('h1', 'g3')
+    assert copy.get_fen() == fen
+
+
+def test_clone_pops_history_from_before_cloning():
+    """ A clone can take back the moves made in the original before it was cloned, back to the starting position, and
+    still finds repetitions that began before it. """
+
+    game = _play(XiangqiGame(), HORSE_SHUFFLE[:6])
+    copy = game.clone()
+
+    assert _play(copy, HORSE_SHUFFLE[6:]).get_end_reason() == 'REPETITION'
+    assert game.get_game_state() == 'UNFINISHED'
+
+    for move in reversed(HORSE_SHUFFLE):
+        assert copy.pop() == MOVE_PATTERN.match(move).groups()
+
+    assert copy.pop() is None
+    assert copy.get_fen() == START_FEN
+    assert copy.get_hash() == XiangqiGame(fen=START_FEN).get_hash()
+    assert game.get_fen() == _play(XiangqiGame(), HORSE_SHUFFLE[:6]).get_fen()
+
+
+def test_playing_games_leaves_the_prototype_alone():
+    """ New games from the starting position are copied from a shared prototype, which no game's moves, captures,
+    take-backs, or clones ever change. """
+
+    rng = random.Random(5)
+    start_hash = XiangqiGame(fen=START_FEN).get_hash()
+
+    for _ in range(10):
+        game = XiangqiGame()
+        for _ in range(40):
+            moves = list(game.legal_moves())
+            if len(moves) == 0:
+                break
+            game.make_move(*rng.choice(moves))
+            if rng.random() < 0.2:
+                game = game.clone()
+                game.pop()
+
+        game.pop()
+
+    prototype = XiangqiGame._prototype
+
+    assert prototype.get_fen() == START_FEN
+    assert prototype.get_hash() == start_hash
+    assert prototype._move_stack == []
+    assert XiangqiGame().get_fen() == START_FEN
+    assert XiangqiGame().get_hash() == start_hash
+    assert sorted(XiangqiGame().legal_moves()) == sorted(XiangqiGame(fen=START_FEN).legal_moves())
@@ -0,0 +1,151 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Tests for reading ICCS and WXF move notation, and for the game collection parser built on them.
+
+import pytest
+
+from XiangqiGame import XiangqiGame
+from XiangqiNotation import iccs_to_move, parse_games, parse_move, wxf_to_move
+
+
+# A position with both of Red's cannons on the d file (file 6 for Red), for WXF moves that name the front or rear piece.
+TANDEM_FEN = 'rnbakabnr/9/1c5c1/p1p1p1p1p/9/3C5/P1P1P1P1P/3C5/9/RNBAKABNR w - - 0 1'
+
+
+def _game(*moves):
+    """ Returns a game from the starting position with the given moves, in either notation, played. """
+
+    game = XiangqiGame()
+    for move in moves:
+        assert game.make_move(*parse_move(game, move)) is True
+
+    return game
+
+
+@pytest.mark.parametrize('token, move', [
+    ('h2e2', ('h3', 'e3')),
+    ('H2-E2', ('h3', 'e3')),
+    ('a0a1', ('a1', 'a2')),
+    ('h9g7', ('h10', 'g8')),
+])
+def test_iccs(token, move):
+    """ ICCS ranks count from 0 on Red's side, and may be written in upper case with a dash. """
+
+    assert iccs_to_move(token) == move
+
+
+@pytest.mark.parametrize('moves, token, move', [
+    ([], 'C2.5', ('h3', 'e3')),
+    ([], 'C8.5', ('b3', 'e3')),
+    ([], 'R1+1', ('i1', 'i2')),
+    ([], 'P7+1', ('c4', 'c5')),
+    (['h2e2'], 'C8.5', ('h8', 'e8')),
+    (['h2e2'], 'C2.5', ('b8', 'e8')),
+    (['h2e2'], 'R9+1', ('i10', 'i9')),
+    (['h2e2'], 'P3+1', ('c7', 'c6')),
+])
+def test_wxf_files_for_each_color(moves, token, move):
+    """ WXF files count from the right of the player to move, so Black's file numbers are the mirror of Red's, and
+    Black's forward is down the board. """
+
+    assert wxf_to_move(_game(*moves), token) == move
+
+
+@pytest.mark.parametrize('moves, token, move', [
+    ([], 'A4+5', ('f1', 'e2')),
+    ([], 'E3+5', ('g1', 'e3')),
+    ([], 'H2+3', ('h1', 'g3')),
+    ([], 'H8+7', ('b1', 'c3')),
+    (['A4+5', 'h9g7'], 'A5-4', ('e2', 'f1')),
+    (['H2+3', 'h9g7'], 'H3-2', ('g3', 'h1')),
+    (['h2e2'], 'H8+7', ('h10', 'g8')),
+    (['h2e2'], 'E3+5', ('c10', 'e8')),
+])
+def test_wxf_diagonal_pieces(moves, token, move):
+    """ For advisors, elephants, and horses the number after + or - is the destination file, not a count of ranks. """
+
+    assert wxf_to_move(_game(*moves), token) == move
+
+
+@pytest.mark.parametrize('token, move', [
+    ('+C.5', ('d5', 'e5')),
+    ('C+.5', ('d5', 'e5')),
+    ('-C.5', ('d3', 'e3')),
+    ('-C-1', ('d3', 'd2')),
+])
+def test_wxf_tandem_pieces(token, move):
+    """ With two pieces on one file, + names the one further forward and - the one further back, written before or
+    after the piece letter. """
+
+    assert wxf_to_move(XiangqiGame(fen=TANDEM_FEN), token) == move
+
+
+@pytest.mark.parametrize('fen, token, message', [
+    (None, 'K5+2', "not legal"),
+    (None, 'C2+9', "not legal"),
+    (None, 'A4+6', "not legal"),
+    (None, 'X2.5', "Unknown piece"),
+    (None, 'C2.', "Not a WXF move"),
+    (None, '+C.4', "does not name one file"),
+    (TANDEM_FEN, 'C6.5', "ambiguous"),
+])
+def test_wxf_errors(fen, token, message):
+    """ A WXF move that is malformed, names no legal move, or could be more than one move is turned down. """
+
+    game = XiangqiGame(fen=fen)
+    fen = game.get_fen()
+
+    with pytest.raises(ValueError, match=message):
+        wxf_to_move(game, token)
+
+    assert game.get_fen() == fen
+
+
+def test_parse_games():
+    """ Games are read with their tags, moves, and declared results, and each error is reported with its game, line,
+    ply, and move. The rest of a game after an error is skipped, and the next game is read normally. """
+
+    lines = [
+        '[Event "first"]',
+        '1. h2e2 h9g7 {a comment}',
+        '2. H2+3 C2.5 1-0',
+        '',
+        '[Event "second"]',
+        '1. C2.5 H8+7',
+        '2. K5+2 R9+1 *',
+        '[Event "third"]',
+        '1. h2e2 h9h5 0-1',
+        '',
+        '1. h2e2 h9g7 *',
+    ]
+
+    games = list(parse_games(lines))
+
+    assert [(game.get_number(), game.get_line()) for game in games] == [(1, 1), (2, 5), (3, 8), (4, 11)]
+    assert [game.get_tags() for game in games[:3]] == [{'Event': 'first'}, {'Event': 'second'}, {'Event': 'third'}]
+
+    assert games[0].is_valid() is True
+    assert games[0].get_moves() == [('h3', 'e3'), ('h10', 'g8'), ('h1', 'g3'), ('b8', 'e8')]
+    assert games[0].get_declared_result() == 'RED_WON'
+    assert games[0].get_game_state() == 'UNFINISHED'
+
+    assert games[1].is_valid() is False
+    assert games[1].get_error() == (7, 3, 'K5+2', "WXF move is not legal: K5+2")
+    assert games[1].get_moves() == [('h3', 'e3'), ('h10', 'g8')]
+
+    assert games[2].get_error() == (9, 2, 'h9h5', "Illegal move: h9h5")
+    assert games[2].get_moves() == [('h3', 'e3')]
+
+    assert games[3].is_valid() is True
+    assert games[3].get_tags() == {}
+    assert games[3].get_declared_result() == 'UNFINISHED'
+
+
+def test_parse_games_bad_fen():
+    """ A game whose FEN tag cannot be read is reported at its first line, at ply 0. """
+
+    games = list(parse_games(['[FEN "not a position"]', '1. h2e2 *']))
+
+    assert len(games) == 1
+    assert games[0].get_error()[:3] == (1, 0, 'not a position')
+    assert games[0].get_moves() == []
@@ -0,0 +1,53 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Regression tests for the move generator. Perft node counts from the starting position and from two
+#              published test positions are checked, so any change that makes or loses a legal move is caught.
+
+import pytest
+
+from XiangqiGame import XiangqiGame
+from XiangqiPerft import REFERENCE_COUNTS, perft
+
+
+# Published perft node counts of test positions given in FEN, by depth.
+FEN_REFERENCE_COUNTS = {
+    'r1ba1a3/4kn3/2n1b4/pNp1p1p1p/4c4/6P2/P1P2R2P/1CcC5/9/2BAKAB2 w - - 0 1': {1: 38, 2: 1128, 3: 43929},
+    '1cbak4/9/n2a5/2p1p3p/5cp2/2n2N3/6PCP/3AB4/2C6/3A1K1N1 w - - 0 1': {1: 7, 2: 281, 3: 8620},
+}
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3])
+def test_starting_position(depth):
+    """ Perft from the starting position matches the published counts. """
+
+    assert perft(XiangqiGame(), depth) == REFERENCE_COUNTS[depth]
+
+
+@pytest.mark.parametrize('fen', sorted(FEN_REFERENCE_COUNTS))
+def test_fen_positions(fen):
+    """ Perft from positions given in FEN matches the published counts. """
+
+    game = XiangqiGame(fen=fen)
+
+    for depth, count in FEN_REFERENCE_COUNTS[fen].items():
+        assert perft(game, depth) == count
+
+
+def test_perft_restores_position():
+    """ Perft leaves the game in the position it started in. """
+
+    game = XiangqiGame()
+    fen = game.get_fen()
+    position_hash = game.get_hash()
+
+    perft(game, 2)
+
+    assert game.get_fen() == fen
+    assert game.get_hash() == position_hash
+
+
+def test_debug_mode_matches():
+    """ Incremental attack map updates, checked against full rebuilds in debug mode, give the same counts as a game
+    that rebuilds them after every move. """
+
+    assert perft(XiangqiGame(debug=True), 2) == perft(XiangqiGame(incremental=False), 2) == REFERENCE_COUNTS[2]
@@ -0,0 +1,117 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Tests for XiangqiProfiler and for switching a game's timed methods on and off with set_profiler.
+
+import re
+
+from XiangqiGame import Board, Pieces, XiangqiGame, _ProfiledBoard, _ProfiledPieces
+from XiangqiProfiler import STAGES, Profiler, profile_random_games
+
+
+def _calls(profiler):
+    """ Returns a dictionary of the number of calls of each stage. """
+
+    return {stage: totals['calls'] for stage, totals in profiler.to_dict().items()}
+
+
+def test_stages_are_counted():
+    """ Making a move, generating legal moves, and looking for the end of the game each add to their stages' counts,
+    with time recorded for every call. """
+
+    profiler = Profiler()
+    game = XiangqiGame()
+    game.set_profiler(profiler)
+    assert set(_calls(profiler).values()) == {0}
+
+    assert game.make_move('h3', 'e3') is True
+    calls = _calls(profiler)
+    assert calls['is_valid_move'] > 0
+    assert calls['update_attack_ranges'] > 0
+    assert calls['update_layout'] > 0
+    assert calls['is_game_over'] == 1
+
+    profiler.reset()
+    moves = list(game.legal_moves())
+    assert _calls(profiler)['update_layout'] >= len(moves) > 0
+
+    profiler.reset()
+    assert game.make_move('a1', 'a1') is False
+    assert _calls(profiler) == dict(_calls(Profiler()), is_valid_move=1)
+
+    game = XiangqiGame(incremental=False)
+    game.set_profiler(profiler)
+    game.make_move('h3', 'e3')
+    assert _calls(profiler)['map_all_attack_ranges'] > 0
+
+    for stage in STAGES:
+        assert profiler.get_calls(stage) > 0
+        assert profiler.get_seconds(stage) >= 0.0
+        assert profiler.to_dict()[stage]['mean_us'] >= 0.0
+
+
+def test_removing_the_profiler_restores_the_game():
+    """ set_profiler(None) switches the pieces and board back to their untimed classes and removes the timed
+    is_game_over from the game, so nothing more is counted. """
+
+    profiler = Profiler()
+    game = XiangqiGame()
+
+    game.set_profiler(profiler)
+    assert type(game._pieces) is _ProfiledPieces
+    assert type(game._board) is _ProfiledBoard
+    assert '_is_game_over' in game.__dict__
+    assert game.get_profiler() is profiler
+
+    game.set_profiler(None)
+    assert type(game._pieces) is Pieces
+    assert type(game._board) is Board
+    assert '_is_game_over' not in game.__dict__
+    assert game.get_profiler() is None
+
+    game.make_move('h3', 'e3')
+    list(game.legal_moves())
+    assert set(_calls(profiler).values()) == {0}
+
+
+def test_clone_reports_to_the_same_profiler():
+    """ A clone of a profiled game reports to its profiler, and a clone of an unprofiled game runs no timing code. """
+
+    profiler = Profiler()
+    game = XiangqiGame()
+    game.set_profiler(profiler)
+
+    copy = game.clone()
+    assert copy.get_profiler() is profiler
+    assert type(copy._pieces) is _ProfiledPieces
+
+    copy.make_move('h3', 'e3')
+    assert _calls(profiler)['is_game_over'] == 1
+
+    game.set_profiler(None)
+    copy = game.clone()
+    assert copy.get_profiler() is None
+    assert type(copy._pieces) is Pieces
+    assert '_is_game_over' not in copy.__dict__
+
+
+def test_prometheus_text():
+    """ The Prometheus text has a HELP and TYPE line for each counter, and a sample for each stage matching the
+    dictionary totals. """
+
+    profiler = profile_random_games(2, max_plies=10)
+    text = profiler.to_prometheus(prefix='test')
+    totals = profiler.to_dict()
+
+    assert text.endswith('\n')
+
+    for metric in ('calls', 'seconds'):
+        name = f"test_stage_{metric}_total"
+        assert f"# HELP {name} " in text
+        assert f"# TYPE {name} counter\n" in text
+
+        for stage in STAGES:
+            sample = re.search(rf'^{name}{{stage="{stage}"}} (\S+)$', text, re.MULTILINE)
+            assert sample is not None
+            assert float(sample.group(1)) == totals[stage][metric]
+
+    assert len(text.splitlines()) == 2 * (2 + len(STAGES))
@@ -0,0 +1,86 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Tests for the binary game record format.
+
+import pytest
+
+from XiangqiGame import START_FEN, XiangqiGame
+from XiangqiRecords import MAGIC, GameRecordReader, GameRecordWriter, encode_move
+
+
+# A position where Red mates in one with b1b10.
+MATE_IN_ONE_FEN = '4k4/R8/9/9/9/9/9/9/9/1R3K3 w - - 0 1'
+
+
+def test_write_read_round_trip(tmp_path):
+    """ Games written directly, by a recorder listening to a game, and by a writer adding to an existing file are read
+    back with the same results, starting positions, metadata, and moves, and replay to the same positions. """
+
+    path = str(tmp_path / 'games.xqr')
+
+    # A game drawn by repetition, with a move taken back along the way, is written once it ends.
+    drawn = XiangqiGame()
+    with GameRecordWriter(path) as writer:
+        writer.record(drawn, {'event': 'test', 'round': 1})
+        drawn.make_move('b1', 'c3')
+        drawn.pop()
+        for pos1, pos2 in [('h1', 'g3'), ('h10', 'g8'), ('g3', 'h1'), ('g8', 'h10')] * 2:
+            drawn.make_move(pos1, pos2)
+
+        won = XiangqiGame(fen=MATE_IN_ONE_FEN)
+        writer.record(won)
+        won.make_move('b1', 'b10')
+
+        writer.write_game([], 'UNFINISHED')
+
+    with GameRecordWriter(path, append=True) as writer:
+        writer.write_game([encode_move(7, 24)], 'DRAW', metadata={'note': 'stopped'})
+
+    with GameRecordReader(path) as reader:
+        records = list(reader)
+
+    assert [record.get_result() for record in records] == ['DRAW', 'RED_WON', 'UNFINISHED', 'DRAW']
+    assert [record.get_fen() for record in records] == [START_FEN, MATE_IN_ONE_FEN, START_FEN, START_FEN]
+    assert [record.get_metadata() for record in records] == [{'event': 'test', 'round': 1}, None, None,
+                                                             {'note': 'stopped'}]
+    assert [record.get_move_count() for record in records] == [8, 1, 0, 1]
+    assert records[1].get_moves() == [('b1', 'b10')]
+    assert records[3].get_moves() == [('h1', 'g3')]
+
+    assert records[0].replay().get_fen() == drawn.get_fen()
+    assert records[0].replay().get_end_reason() == 'REPETITION'
+    assert records[1].replay().get_game_state() == 'RED_WON'
+
+    expected = XiangqiGame()
+    expected.make_move('h1', 'g3')
+    assert records[3].replay().get_fen() == expected.get_fen()
+
+
+@pytest.mark.parametrize('contents', [b'', MAGIC[:2], b'XQR0'])
+def test_reader_rejects_other_files(tmp_path, contents):
+    """ An empty, truncated, or foreign file is turned down with the same error. """
+
+    path = tmp_path / 'games.xqr'
+    path.write_bytes(contents)
+
+    with pytest.raises(ValueError, match="Not a game record file"):
+        GameRecordReader(str(path))
+
+
+@pytest.mark.parametrize('moves, fen, metadata, limit', [
+    ([encode_move(7, 24)] * 0x10000, None, None, "more than 65535 moves"),
+    ([], '9/' * 0x8000, None, "FEN longer than 65535 bytes"),
+    ([], None, {'comment': 'x' * 0x10000}, "metadata longer than 65535 bytes"),
+])
+def test_writer_rejects_oversized_games(tmp_path, moves, fen, metadata, limit):
+    """ A game too large for its header raises a ValueError naming the limit, and nothing is written for it. """
+
+    path = str(tmp_path / 'games.xqr')
+
+    with GameRecordWriter(path) as writer:
+        with pytest.raises(ValueError, match=limit):
+            writer.write_game(moves, 'UNFINISHED', fen, metadata)
+        writer.write_game([], 'DRAW')
+
+    with GameRecordReader(path) as reader:
+        assert [record.get_result() for record in reader] == ['DRAW']
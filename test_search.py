@@ -0,0 +1,106 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Tests for the search engine: the transposition table, the serial Searcher, and parallel_search.
+
+from XiangqiGame import XiangqiGame
+from XiangqiSearch import EXACT, LOWER_BOUND, MATE_SCORE, UPPER_BOUND, Searcher, TranspositionTable, parallel_search
+
+
+# A middlegame position with a single best move at depth 3.
+MIDDLEGAME_FEN = 'r1ba1a3/4kn3/2n1b4/pNp1p1p1p/4c4/6P2/P1P2R2P/1CcC5/9/2BAKAB2 w - - 0 1'
+
+# Red mates in one: a Chariot holds Black's General off the ninth rank, Red's General holds the f file, and the other
+# Chariot checks along the tenth rank or takes away the d file.
+MATE_IN_ONE_FEN = '4k4/R8/9/9/9/9/9/9/9/1R3K3 w - - 0 1'
+
+
+class _NoTable(TranspositionTable):
+    """ A transposition table that never remembers anything, for searching without one. """
+
+    def __init__(self):
+        """ Initializes the smallest table, which is never used. """
+
+        super().__init__(0)
+
+    def probe(self, position_hash):
+        """ Finds nothing. """
+
+        return None
+
+    def store(self, position_hash, depth, bound, score, best_move):
+        """ Stores nothing. """
+
+
+def test_table_store_and_probe():
+    """ An entry stored for a position is found again with the same depth, bound, score, and move, and other positions
+    are not found. """
+
+    table = TranspositionTable(1)
+    table.store(12345, 4, LOWER_BOUND, -250, (10, 19))
+    table.store(67890, 2, EXACT, MATE_SCORE - 3, None)
+
+    assert table.probe(12345) == (4, LOWER_BOUND, -250, (10, 19))
+    assert table.probe(67890) == (2, EXACT, MATE_SCORE - 3, None)
+    assert table.probe(54321) is None
+    assert table.get_stats()['hits'] == 2
+
+
+def test_table_replacement():
+    """ A deeper entry from the current search keeps its slot against a shallower one for another position, but gives
+    way to an entry as deep, and to any entry once a new search has started. """
+
+    table = TranspositionTable(1)
+    first, second, third = 7, 7 + table.get_size(), 7 + 2 * table.get_size()
+
+    table.store(first, 5, EXACT, 10, None)
+    table.store(second, 3, EXACT, 20, None)
+    assert table.probe(first) == (5, EXACT, 10, None)
+    assert table.probe(second) is None
+    assert table.get_stats()['collisions'] == 1
+
+    table.store(second, 5, UPPER_BOUND, 20, None)
+    assert table.probe(second) == (5, UPPER_BOUND, 20, None)
+    assert table.probe(first) is None
+
+    table.new_search()
+    table.store(third, 1, EXACT, 30, None)
+    assert table.probe(third) == (1, EXACT, 30, None)
+
+
+def test_search_finds_mate_in_one():
+    """ A search to depth 2 finds a move that mates at once, and scores it as mate in one. """
+
+    game = XiangqiGame(fen=MATE_IN_ONE_FEN)
+    result = Searcher(2, table=TranspositionTable(1)).search(game)
+
+    assert result.get_score() == MATE_SCORE - 1
+    assert result.is_mate_score()
+    assert game.push(result.get_best_move()) is True
+    assert game.get_game_state() == 'RED_WON'
+
+
+def test_table_does_not_change_best_move():
+    """ Searching with and without a transposition table finds the same best move and score. """
+
+    game = XiangqiGame(fen=MIDDLEGAME_FEN)
+    with_table = Searcher(3, table=TranspositionTable(1)).search(game)
+    without_table = Searcher(3, table=_NoTable()).search(game)
+
+    assert with_table.get_best_move() == without_table.get_best_move()
+    assert with_table.get_score() == without_table.get_score()
+    assert with_table.get_nodes() < without_table.get_nodes()
+
+
+def test_parallel_search_matches_serial():
+    """ A search split across worker processes finds the same score and best move as a search in one process, and
+    leaves the game where it was. """
+
+    game = XiangqiGame(fen=MIDDLEGAME_FEN)
+    serial = Searcher(3, table=TranspositionTable(1)).search(game)
+    parallel = parallel_search(game, workers=2, max_depth=3, table_mb=1)
+
+    assert parallel.get_depth() == serial.get_depth() == 3
+    assert parallel.get_score() == serial.get_score()
+    assert parallel.get_best_move() == serial.get_best_move()
+    assert parallel.get_pv()[0] == parallel.get_best_move()
+    assert game.get_fen() == MIDDLEGAME_FEN
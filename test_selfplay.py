@@ -0,0 +1,75 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Tests for XiangqiSelfPlay's batch runner: that its games depend only on the seed, and that its window
+#              of games in flight plays and writes every game once.
+
+import json
+
+import XiangqiSelfPlay
+from XiangqiSelfPlay import play_game, run_batch
+
+
+def _read_records(path):
+    """ Returns the records of a JSON lines output file keyed by game number, without their timings. """
+
+    records = {}
+
+    with open(path) as file:
+        for line in file:
+            record = json.loads(line)
+            del record['seconds']
+            assert record['game'] not in records
+            records[record['game']] = record
+
+    return records
+
+
+def test_same_seed_plays_same_games(tmp_path):
+    """ A run plays the same games for the same seed however many workers play them, and other games for another
+    seed. """
+
+    runs = {}
+
+    for workers, seed in ((1, 7), (3, 7), (2, 8)):
+        path = str(tmp_path / f'games-{workers}-{seed}.jsonl')
+        totals = run_batch(6, 'random', 'greedy', path, workers=workers, seed=seed, max_plies=12)
+        runs[(workers, seed)] = _read_records(path)
+
+        assert totals['games'] == 6
+        assert totals['moves'] == sum(record['plies'] for record in runs[(workers, seed)].values())
+
+    assert runs[(1, 7)] == runs[(3, 7)]
+    assert runs[(1, 7)] != runs[(2, 8)]
+    assert sorted(runs[(1, 7)]) == list(range(6))
+
+    record = play_game(4, 'random', 'greedy', seed=7, max_plies=12)
+    del record['seconds']
+    assert record == runs[(1, 7)][4]
+
+
+def test_window_writes_every_game_once(tmp_path, monkeypatch):
+    """ With many more games than fit in the window, no more than the window's worth are in flight at once, and every
+    game is recorded and written exactly once. """
+
+    waits = []
+    wait = XiangqiSelfPlay.wait
+
+    def _wait(pending, return_when):
+        """ Records the number of games in flight before waiting for them. """
+
+        waits.append(len(pending))
+        return wait(pending, return_when=return_when)
+
+    monkeypatch.setattr(XiangqiSelfPlay, 'wait', _wait)
+
+    games = 5 * 2 * XiangqiSelfPlay._JOBS_PER_WORKER
+    path = str(tmp_path / 'games.jsonl')
+    seen = []
+
+    totals = run_batch(games, output=path, workers=2, max_plies=4, on_game=lambda record: seen.append(record['game']))
+
+    assert max(waits) == 2 * XiangqiSelfPlay._JOBS_PER_WORKER
+    assert sorted(seen) == list(range(games))
+    assert sorted(_read_records(path)) == list(range(games))
+    assert totals['games'] == games
+    assert sum(totals['results'].values()) == games
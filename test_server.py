@@ -0,0 +1,66 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Tests for the game server, with requests passed to GameServer.execute directly.
+
+import asyncio
+
+from XiangqiServer import GameServer
+
+
+def _run(coroutine_function):
+    """ Runs a coroutine function with a new server, closing the server afterwards, and returns its result. """
+
+    async def _main():
+        server = GameServer(max_games=2, engine_workers=1, game_threads=2)
+        try:
+            return await coroutine_function(server)
+        finally:
+            await server.close()
+
+    return asyncio.run(_main())
+
+
+def test_unexpected_error_is_answered(monkeypatch):
+    """ An error other than a bad request still gets an ERR line, and the server keeps answering. """
+
+    async def _requests(server):
+        game_id = (await server.execute('NEW')).split()[1]
+        monkeypatch.setattr(server._sessions[game_id].get_game(), 'get_fen', _fail)
+        failed = await server.execute(f"STATE {game_id}")
+        monkeypatch.undo()
+        return failed, await server.execute(f"STATE {game_id}")
+
+    def _fail():
+        raise RuntimeError("broken")
+
+    failed, state = _run(_requests)
+
+    assert failed == "ERR internal error: RuntimeError"
+    assert state.startswith("OK UNFINISHED ")
+
+
+def test_concurrent_new_respects_limit():
+    """ Games set up at the same time count against the limit before they are hosted. """
+
+    async def _requests(server):
+        return await asyncio.gather(*(server.execute('NEW') for _ in range(4)))
+
+    responses = _run(_requests)
+
+    assert sum(response.startswith('OK ') for response in responses) == 2
+    assert responses.count("ERR too many games") == 2
+
+
+def test_close_waits_for_running_requests():
+    """ CLOSE waits for a move already running on the game, and requests queued behind it find the game gone. """
+
+    async def _requests(server):
+        game_id = (await server.execute('NEW')).split()[1]
+        responses = await asyncio.gather(server.execute(f"MOVE {game_id} h3e3"), server.execute(f"CLOSE {game_id}"),
+                                         server.execute(f"MOVE {game_id} h10g8"))
+        return game_id, responses, server.get_game_count()
+
+    game_id, responses, game_count = _run(_requests)
+
+    assert responses == ["OK UNFINISHED", "OK", f"ERR no game {game_id}"]
+    assert game_count == 0
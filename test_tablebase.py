@@ -0,0 +1,128 @@
+# Author: Nate Kimball
+# Date: 10/16/2026
+# Description: Tests for endgame tablebases: a small table is generated by retrograde analysis and checked against
+#              the alpha-beta search, and interrupted generation is resumed.
+
+import os
+
+import pytest
+
+import XiangqiTablebase
+from XiangqiGame import XiangqiGame
+from XiangqiSearch import MATE_SCORE, Searcher
+from XiangqiTablebase import Material, Tablebase, generate, table_path
+
+
+@pytest.fixture(scope='module')
+def directory(tmp_path_factory):
+    """ A directory holding the tables of a Chariot against a bare General, generated once for the module. """
+
+    directory = str(tmp_path_factory.mktemp('tables'))
+    assert generate('KR-K', directory, workers=1) == ['K-K', 'KR-K']
+
+    return directory
+
+
+@pytest.mark.parametrize('fen, distance', [
+    # The Chariot checks on the d file while Red's General holds the e file.
+    ('3k5/9/9/9/9/R8/9/9/9/4K4 w - - 0 1', 1),
+    ('3k5/9/9/9/9/9/R8/9/9/5K3 w - - 0 1', 3),
+    ('4k4/9/9/9/9/9/9/9/9/R2K5 w - - 0 1', 3),
+])
+def test_wins_match_search(directory, fen, distance):
+    """ Won positions are won in as many plies as the search finds a mate in, and the table's best move keeps the
+    win, one ply closer. """
+
+    game = XiangqiGame(fen=fen)
+
+    with Tablebase(directory) as tablebase:
+        assert tablebase.probe(game) == ('WIN', distance)
+        assert Searcher(distance + 1).search(game).get_score() == MATE_SCORE - distance
+
+        assert game.push(tablebase.best_move(game)) is True
+        if distance == 1:
+            assert game.get_game_state() == 'RED_WON'
+        else:
+            assert tablebase.probe(game) == ('LOSS', distance - 1)
+
+
+def test_draw_by_capture_matches_search(directory):
+    """ A General that can take an unprotected Chariot draws, and both the table and the search take it. """
+
+    game = XiangqiGame(fen='4k4/4R4/9/9/9/9/9/9/9/3K5 b - - 0 1')
+
+    with Tablebase(directory) as tablebase:
+        assert tablebase.probe(game) == ('DRAW', None)
+        assert tablebase.best_move(game) == ('e10', 'e9')
+        assert Searcher(3).search(game).get_best_move() == ('e10', 'e9')
+
+
+def test_stalemate_is_lost(directory):
+    """ A General with no legal move, though not in check, has lost, as the game itself finds. """
+
+    game = XiangqiGame(fen='3k5/R8/9/9/9/9/9/9/9/4K4 b - - 0 1')
+
+    with Tablebase(directory) as tablebase:
+        assert tablebase.probe(game) == ('LOSS', 0)
+        assert tablebase.best_move(game) is None
+
+    assert game.get_game_state() == 'RED_WON'
+    assert game.get_end_reason() == 'STALEMATE'
+
+
+def test_interrupted_generation_resumes(directory, tmp_path, monkeypatch):
+    """ A generation stopped after some chunks picks up from the chunks it saved, and writes the same table as an
+    uninterrupted one. """
+
+    # The smaller table a capture leads to is generated in full first.
+    assert generate('K-K', str(tmp_path), workers=1) == ['K-K']
+
+    generate_chunk = XiangqiTablebase._generate_chunk
+    generated = []
+
+    def _stop_after_two(task):
+        """ Generates two chunks, then stops the run. """
+
+        if len(generated) == 2:
+            raise KeyboardInterrupt
+        generated.append(task[2])
+        return generate_chunk(task)
+
+    monkeypatch.setattr(XiangqiTablebase, '_generate_chunk', _stop_after_two)
+    with pytest.raises(KeyboardInterrupt):
+        generate('KR-K', str(tmp_path), workers=1)
+
+    assert not os.path.exists(table_path(str(tmp_path), 'KR-K'))
+    assert len(os.listdir(table_path(str(tmp_path), 'KR-K') + '.work')) == 2
+
+    resumed = []
+
+    def _record(task):
+        """ Generates a chunk, noting which. """
+
+        resumed.append(task[2])
+        return generate_chunk(task)
+
+    monkeypatch.setattr(XiangqiTablebase, '_generate_chunk', _record)
+    assert generate('KR-K', str(tmp_path), workers=1) == ['KR-K']
+
+    assert set(resumed).isdisjoint(generated)
+    assert len(resumed) + len(generated) == len(range(0, Material('KR-K').get_size(), XiangqiTablebase.CHUNK_SIZE))
+    assert not os.path.exists(table_path(str(tmp_path), 'KR-K') + '.work')
+
+    with open(table_path(str(tmp_path), 'KR-K'), 'rb') as resumed_file, \
+            open(table_path(directory, 'KR-K'), 'rb') as fresh_file:
+        assert resumed_file.read() == fresh_file.read()
+
+
+@pytest.mark.parametrize('contents', [b'', b'XQT1'])
+def test_tablebase_rejects_incomplete_tables(tmp_path, contents):
+    """ An empty or truncated table file, such as one left by an interrupted run, is turned down with the same
+    error. """
+
+    with open(table_path(str(tmp_path), 'K-K'), 'wb') as file:
+        file.write(contents)
+
+    with Tablebase(str(tmp_path)) as tablebase:
+        with pytest.raises(ValueError, match="Not a complete table for K-K"):
+            tablebase.probe(XiangqiGame(fen='4k4/9/9/9/9/9/9/9/9/3K5 w - - 0 1'))